@@ -1,16 +1,92 @@
 # app.py
-from flask import Flask, render_template, request
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+import csv
+import io
 import joblib
+import json
 import numpy as np
 import os
+import sys
+import time
+from packed_forest import PackedForest
+from quote_table import QuoteTable
+from trips import TripSchema, TripError, ID_FIELD
 
 app = Flask(__name__)
 
 # Load model safely
 model_path = os.path.join("models", "taxi_fare_model (1).joblib")
-model = joblib.load(model_path)
-if isinstance(model, dict):  # handle accidental dict saving
-    model = model.get("model", None)
+# "auto" serves the packed forest (python package_model.py) when it was built from
+# model_path, else the joblib model; "packed" requires the pack, "joblib" ignores it.
+# The pack is memory-mapped and needs no sklearn import, so workers stay small.
+MODEL_MODE = os.environ.get("TAXI_MODEL", "auto")
+MODEL_PACK_PATH = os.environ.get("TAXI_MODEL_PACK", os.path.join("models", "taxi_fare_model.forest.npy"))
+
+def load_model(mode):
+    """Returns (model, features, kind) where kind is "packed" or "joblib"."""
+    if mode != "joblib" and os.path.exists(MODEL_PACK_PATH):
+        forest = PackedForest.load(MODEL_PACK_PATH)
+        if forest.matches(model_path):
+            return forest, forest.features, "packed"
+        app.logger.warning("Ignoring %s: packed from a different model file", MODEL_PACK_PATH)
+    if mode == "packed":
+        raise RuntimeError(f"TAXI_MODEL=packed but {MODEL_PACK_PATH} is missing or stale; run package_model.py")
+    model = joblib.load(model_path)
+    features = None
+    if isinstance(model, dict):  # handle accidental dict saving
+        features = model.get("features")
+        model = model.get("model", None)
+    return model, features, "joblib"
+
+_load_start = time.perf_counter()
+model, features, model_kind = load_model(MODEL_MODE)
+MODEL_LOAD_SECONDS = time.perf_counter() - _load_start
+trip_schema = TripSchema(features)
+
+def process_memory():
+    """This process's memory in kB: rss, pss (shared pages split between sharers), shared, private."""
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+              "Private_Clean": "private", "Private_Dirty": "private"}
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] = usage.get(fields[key], 0) + int(rest.split()[0])
+    except OSError:  # not Linux: peak RSS only
+        import resource
+        usage["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+# /api/fare limits: trips per JSON body, rows per model.predict call on streamed uploads
+API_MAX_TRIPS = int(os.environ.get("TAXI_API_MAX_TRIPS", "100000"))
+STREAM_CHUNK_ROWS = int(os.environ.get("TAXI_STREAM_CHUNK_ROWS", "8192"))
+
+# Optional precomputed quote table (python build_quote_table.py); "" disables it.
+# It is only used if it was built from this exact model file and its measured
+# max error (dollars) is within TAXI_QUOTE_MAX_ERROR.
+QUOTE_TABLE_PATH = os.environ.get("TAXI_QUOTE_TABLE", os.path.join("models", "fare_quote_table.npy"))
+QUOTE_MAX_ERROR = float(os.environ.get("TAXI_QUOTE_MAX_ERROR", "0.01"))
+
+def load_quote_table(path):
+    if model is None or not path or not os.path.exists(path):
+        return None
+    try:
+        table = QuoteTable.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        app.logger.warning("Ignoring quote table %s: %s", path, e)
+        return None
+    if not table.matches(model_path):
+        app.logger.warning("Ignoring quote table %s: built from a different model file", path)
+        return None
+    if table.max_error > QUOTE_MAX_ERROR:
+        app.logger.warning("Ignoring quote table %s: max error $%.4f > $%.4f", path, table.max_error, QUOTE_MAX_ERROR)
+        return None
+    return table
+
+quote_table = load_quote_table(QUOTE_TABLE_PATH)
+app.logger.info("Loaded %s model in %.3fs (pid %d, %s)", model_kind, MODEL_LOAD_SECONDS, os.getpid(), process_memory())
 
 @app.route("/")
 def index():
@@ -36,12 +112,98 @@ def prediction():
             month = int(request.form["month"])
 
             features = np.array([[distance_miles, passenger_count, hour_of_day, day_of_week, month]])
-            pred = model.predict(features)[0]
+            pred = quote(features)[0]
             prediction_result = f"Estimated Taxi Fare: ${pred:.2f}"
         except Exception as e:
             prediction_result = f"Error: {str(e)}"
     return render_template("prediction.html", prediction_result=prediction_result)
 
+def quote(X):
+    """Fares rounded to cents: quote table lookup where it covers the trip, the model otherwise."""
+    fares = quote_table.quote(X, model) if quote_table is not None else model.predict(X)
+    return np.round(fares, 2)
+
+def stream_fares(chunks, fmt):
+    """
+    One model.predict per chunk; NDJSON or CSV lines go out as each chunk finishes.
+    Headers are already sent, so any failure (bad row, decode error, model error) ends
+    the stream with an error record: "# error: ..." in CSV, {"error": ...} in NDJSON.
+    """
+    if fmt == "csv":
+        yield "row,id,fare\n"
+    done = 0  # trips already quoted and sent
+    try:
+        for X, ids, offset in chunks:
+            fares = quote(X).tolist()
+            ids = ids or [None] * len(fares)
+            if fmt == "csv":
+                # ids come from the client and may contain commas, quotes or newlines
+                buf = io.StringIO()
+                csv.writer(buf, lineterminator="\n").writerows(
+                    (offset + i, "" if ids[i] is None else ids[i], fare) for i, fare in enumerate(fares))
+                yield buf.getvalue()
+            else:
+                yield "".join(json.dumps({"row": offset + i, ID_FIELD: ids[i], "fare": fare}) + "\n"
+                              for i, fare in enumerate(fares))
+            done = offset + len(fares)
+    except Exception as e:
+        if isinstance(e, TripError):
+            message = str(e)
+        else:
+            app.logger.exception("Streaming fares failed after %d trips", done)
+            message = f"quoting failed after {done} trips ({type(e).__name__})"
+        yield f"# error: {message}\n" if fmt == "csv" else json.dumps({"error": message}) + "\n"
+
+@app.route("/api/fare", methods=["POST"])
+def api_fare():
+    """
+    Batch fare quotes.
+    - application/json: [trip, ...], {"trips": [...]} or {"columns": {...}} -> {"count", "fares"[, "ids"]}
+    - application/x-ndjson or text/csv: streamed in, quotes streamed back in the same format
+    A trip is an object keyed by feature name (see GET /api/schema), optionally with an "id",
+    or a positional array of the feature values.
+    """
+    if model is None:
+        return jsonify(error="Model not loaded."), 503
+    mimetype = request.mimetype
+    try:
+        if mimetype in ("application/x-ndjson", "text/csv"):
+            fmt = "csv" if mimetype == "text/csv" else "ndjson"
+            reader = trip_schema.iter_csv if fmt == "csv" else trip_schema.iter_ndjson
+            chunks = reader(request.stream, STREAM_CHUNK_ROWS)
+            first = next(chunks, None)  # surface header / first-chunk errors as a 400
+            if first is None:
+                raise TripError("No trips in upload.")
+            body = stream_fares(_prepend(first, chunks), fmt)
+            return Response(stream_with_context(body), mimetype="text/csv" if fmt == "csv" else "application/x-ndjson")
+
+        X, ids = trip_schema.from_json(request.get_json(silent=True))
+        if len(X) > API_MAX_TRIPS:
+            raise TripError(f"Too many trips in one request (max {API_MAX_TRIPS}); stream NDJSON or CSV instead.")
+    except TripError as e:
+        return jsonify(error=str(e)), 400
+    result = {"count": len(X), "fares": quote(X).tolist()}
+    if ids is not None:
+        result["ids"] = ids
+    return jsonify(result)
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+@app.route("/api/schema")
+def api_schema():
+    info = trip_schema.describe()
+    info["quote_table"] = quote_table.stats() if quote_table is not None else None
+    return jsonify(info)
+
+@app.route("/metrics")
+def metrics():
+    """Per-worker numbers; with gunicorn's preload_app, compare pss with rss to see what is shared."""
+    return jsonify(pid=os.getpid(), model=model_kind, model_load_seconds=round(MODEL_LOAD_SECONDS, 4),
+                   memory_kb=process_memory(), sklearn_imported="sklearn" in sys.modules,
+                   quote_table=quote_table.stats() if quote_table is not None else None)
+
 @app.route("/tutorial")
 def tutorial():
     return render_template("tutorial.html")
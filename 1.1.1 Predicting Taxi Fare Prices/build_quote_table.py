@@ -0,0 +1,143 @@
+# build_quote_table.py
+"""
+Build the fare quote table used by quote_table.QuoteTable (offline, run once per model).
+
+The forest only changes its output at split thresholds, so it is evaluated once
+per (discrete feature combination, distance interval between consecutive
+thresholds) and stored in cents. The result is then checked against the model
+on a random sample of trips plus every threshold edge; the measured max error
+is written to the metadata and the app refuses tables above TAXI_QUOTE_MAX_ERROR.
+
+Usage:
+    python build_quote_table.py                        # models/fare_quote_table.npy + .json
+    python build_quote_table.py --max-distance 40      # smaller table; longer trips use the model
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+from quote_table import CENTS, QuoteTable, file_fingerprint
+
+MODEL_PATH = os.path.join("models", "taxi_fare_model (1).joblib")
+TABLE_PATH = os.path.join("models", "fare_quote_table.npy")
+DISTANCE_FEATURE = "distance_miles"
+
+
+def split_thresholds(model, j):
+    return np.unique(np.concatenate([est.tree_.threshold[est.tree_.feature == j] for est in model.estimators_]))
+
+
+def float32_at_or_below(x):
+    f = np.float32(x)
+    return f if f <= x else np.nextafter(f, np.float32(-np.inf))
+
+
+def float32_above(x):
+    f = np.float32(x)
+    return f if f > x else np.nextafter(f, np.float32(np.inf))
+
+
+def distance_representatives(thresholds):
+    """One float32 distance inside each interval (-inf, t0], (t0, t1], ..., (t_last, inf)."""
+    reps = [float32_at_or_below(t) for t in thresholds]
+    reps.append(float32_above(thresholds[-1]) if len(thresholds) else np.float32(0))
+    return np.asarray(reps, dtype=np.float32)
+
+
+def build(model, features, max_distance=None, block_combos=64):
+    d_col = features.index(DISTANCE_FEATURE)
+    thresholds = split_thresholds(model, d_col)
+    if max_distance is not None:
+        thresholds = thresholds[thresholds < max_distance]
+    discrete = []
+    for j, name in enumerate(features):
+        if j == d_col:
+            continue
+        th = split_thresholds(model, j)
+        # below the first / above the last split every value lands in the same leaves
+        lo, hi = (int(np.floor(th.min())), int(np.floor(th.max())) + 1) if len(th) else (0, 0)
+        discrete.append([name, lo, hi])
+
+    axes = [np.arange(lo, hi + 1) for _, lo, hi in discrete]
+    combos = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(axes))
+    reps = distance_representatives(thresholds)
+    max_leaf = max(float(est.tree_.value.max()) for est in model.estimators_)
+    dtype = np.uint16 if max_leaf * CENTS < np.iinfo(np.uint16).max else np.uint32
+
+    table = np.empty((len(combos), len(reps)), dtype=dtype)
+    disc_cols = [features.index(name) for name, _, _ in discrete]
+    start = time.perf_counter()
+    for b in range(0, len(combos), block_combos):
+        block = combos[b:b + block_combos]
+        X = np.empty((len(block) * len(reps), len(features)), dtype=np.float32)
+        X[:, d_col] = np.tile(reps, len(block))
+        X[:, disc_cols] = np.repeat(block, len(reps), axis=0)
+        table[b:b + len(block)] = np.rint(model.predict(X) * CENTS).reshape(len(block), len(reps))
+        done = b + len(block)
+        print(f"\r{done}/{len(combos)} combinations ({time.perf_counter() - start:.0f}s)", end="", file=sys.stderr)
+    print(file=sys.stderr)
+
+    meta = {
+        "features": list(features),
+        "distance_feature": DISTANCE_FEATURE,
+        "discrete": discrete,
+        "distance_thresholds": thresholds.tolist(),
+        "max_distance": float(max_distance) if max_distance is not None else float("inf"),
+        "dtype": np.dtype(dtype).name,
+    }
+    return table, meta
+
+
+def verify(qt, model, n_samples=200_000, seed=0):
+    """Max |table - model| over random in-range trips plus every distance threshold edge."""
+    rng = np.random.default_rng(seed)
+    top = min(qt.max_distance, (qt.thresholds[-1] if len(qt.thresholds) else 1.0) * 1.1)
+    edges = np.concatenate([qt.thresholds, np.nextafter(qt.thresholds.astype(np.float32), np.float32(np.inf))])
+    edges = edges[edges <= qt.max_distance]
+    dist = np.concatenate([rng.uniform(0, top, n_samples), edges])
+    X = np.empty((len(dist), len(qt.features)), dtype=np.float32)
+    X[:, qt.distance_col] = dist
+    for col, (_, lo, hi) in zip(qt.discrete_cols, qt.discrete):
+        X[:, col] = rng.integers(max(lo - 1, 0), hi + 3, len(dist))  # a little past the edges too
+    fares, covered = qt.lookup(X)
+    if not covered.all():
+        raise RuntimeError("in-range sample trips were not covered by the table")
+    err = np.abs(fares - model.predict(X))
+    return {"max_error": float(err.max()), "mean_error": float(err.mean()), "samples": int(len(X))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--out", default=TABLE_PATH)
+    parser.add_argument("--max-distance", type=float, help="only tabulate trips up to this many miles")
+    parser.add_argument("--samples", type=int, default=200_000, help="random trips used to measure the error")
+    parser.add_argument("--jobs", type=int, default=-1, help="model.n_jobs while building")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    bundle = joblib.load(args.model)
+    model, features = bundle["model"], bundle["features"]
+    model.n_jobs = args.jobs
+    table, meta = build(model, features, args.max_distance)
+    meta["model_sha256"] = file_fingerprint(args.model)
+    meta.update(verify(QuoteTable(table, dict(meta, max_error=0.0)), model, args.samples))
+    meta["built_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    np.save(args.out, table)
+    with open(os.path.splitext(args.out)[0] + ".json", "w") as f:
+        json.dump(meta, f)
+    print(f"wrote {args.out}: {table.shape} {table.dtype} ({table.nbytes / 1e6:.0f} MB), "
+          f"max error ${meta['max_error']:.4f} over {meta['samples']} trips")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# package_model.py
+"""
+Package the taxi fare model for serving (offline, run once per model).
+
+Flattens the RandomForestRegressor in the joblib file into one memory-mappable
+node array (see packed_forest.PackedForest), checks it against the sklearn
+model on random trips plus every split threshold, and writes the measured max
+error and the source file's sha256 next to it. The app uses the pack when it
+matches the joblib file (TAXI_MODEL=auto|packed|joblib).
+
+Usage:
+    python package_model.py                 # models/taxi_fare_model.forest.npy + .json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+from packed_forest import PackedForest, pack_dtype
+from quote_table import file_fingerprint
+
+MODEL_PATH = os.path.join("models", "taxi_fare_model (1).joblib")
+PACK_PATH = os.path.join("models", "taxi_fare_model.forest.npy")
+TOLERANCE = 1e-9  # float64 means summed in a different order
+
+
+def pack(model, features):
+    estimators = getattr(model, "estimators_", None)
+    if not estimators or not all(hasattr(est, "tree_") for est in estimators) or model.__class__.__name__ != "RandomForestRegressor":
+        raise TypeError(f"expected a fitted RandomForestRegressor, got {type(model).__name__}")
+    packed = np.zeros((), dtype=pack_dtype(sum(est.tree_.node_count for est in estimators)))
+    children = packed["children"].reshape(-1, 2)
+    roots, depth, start = [], 0, 0
+    for est in estimators:
+        tree = est.tree_
+        n = tree.node_count
+        ids = np.arange(start, start + n)
+        leaf = tree.children_left == -1
+        packed["feature"][ids] = np.where(leaf, 0, tree.feature)
+        children[ids, 0] = np.where(leaf, ids, tree.children_left + start)
+        children[ids, 1] = np.where(leaf, ids, tree.children_right + start)
+        packed["threshold"][ids] = np.where(leaf, np.inf, tree.threshold)
+        packed["value"][ids] = tree.value.reshape(n, -1)[:, 0]
+        roots.append(start)
+        depth = max(depth, tree.max_depth)
+        start += n
+    meta = {"features": list(features), "roots": roots, "max_depth": int(depth)}
+    return packed, meta
+
+
+def verify(forest, model, n_samples=100_000, seed=0):
+    """Max |pack - sklearn| over random trips plus every threshold of every feature."""
+    rng = np.random.default_rng(seed)
+    internal = np.flatnonzero(np.isfinite(forest.threshold))
+    feature, threshold = forest.feature[internal], forest.threshold[internal]
+    X = np.empty((n_samples + 2 * len(internal), len(forest.features)), dtype=np.float32)
+    for j in range(X.shape[1]):
+        th = threshold[feature == j]
+        lo, hi = (th.min(), th.max()) if len(th) else (0.0, 1.0)
+        X[:, j] = rng.uniform(lo - 1, hi + 1, len(X))
+    # land exactly on each split and just past it
+    edge_rows = n_samples + np.arange(len(internal))
+    X[edge_rows, feature] = threshold
+    X[edge_rows + len(internal), feature] = np.nextafter(threshold.astype(np.float32), np.float32(np.inf))
+    err = np.abs(forest.predict(X) - model.predict(X))
+    return {"max_error": float(err.max()), "samples": int(len(X))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--out", default=PACK_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    bundle = joblib.load(args.model)
+    model, features = (bundle["model"], bundle["features"]) if isinstance(bundle, dict) else (bundle, None)
+    features = features or [f"x{j}" for j in range(model.n_features_in_)]
+    packed, meta = pack(model, features)
+    meta["source_sha256"] = file_fingerprint(args.model)
+    meta.update(verify(PackedForest(packed, meta), model))
+    if meta["max_error"] > args.tolerance:
+        print(f"packed forest disagrees with the model (max error {meta['max_error']:.3g})", file=sys.stderr)
+        return 1
+    meta["built_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    np.save(args.out, packed)
+    with open(os.path.splitext(args.out)[0] + ".json", "w") as f:
+        json.dump(meta, f)
+    start = time.perf_counter()
+    forest = PackedForest.load(args.out)
+    print(f"wrote {args.out}: {len(meta['roots'])} trees, {len(forest.value)} nodes ({packed.nbytes / 1e6:.1f} MB), "
+          f"max error {meta['max_error']:.3g}, loads in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
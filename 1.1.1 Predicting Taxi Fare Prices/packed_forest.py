@@ -0,0 +1,76 @@
+# packed_forest.py
+"""
+NumPy-only predictor for the taxi RandomForestRegressor (written by package_model.py).
+- Every tree's nodes are concatenated into one .npy holding a single record of
+  contiguous arrays (feature, children, threshold, value); leaves point at
+  themselves, so all trees are walked together for a fixed max_depth steps,
+  in blocks of BLOCK_ROWS rows so the per-step gathers stay in cache
+- The file is opened with mmap_mode="r": workers never copy the node arrays
+  (unpickling sklearn trees always does), pages are shared through the page
+  cache, and serving never imports sklearn/scipy (most of a worker's RSS)
+- Same decisions as sklearn: X is cast to float32 and compared with
+  "x <= threshold" against the float64 thresholds
+"""
+
+import json
+import os
+
+import numpy as np
+
+from quote_table import file_fingerprint
+
+BLOCK_ROWS = 1024
+
+
+def pack_dtype(n_nodes):
+    """children[2*i] / children[2*i + 1] are node i's left / right child."""
+    return np.dtype([("feature", "<i8", (n_nodes,)), ("children", "<i8", (2 * n_nodes,)),
+                     ("threshold", "<f8", (n_nodes,)), ("value", "<f8", (n_nodes,))])
+
+
+class PackedForest:
+    def __init__(self, pack, meta):
+        self.pack = pack
+        self.meta = meta
+        self.features = meta["features"]
+        self.roots = np.asarray(meta["roots"], dtype=np.int64)
+        self.max_depth = int(meta["max_depth"])
+        # contiguous field views on the (memory-mapped) record; nothing is copied.
+        # asarray drops the np.memmap subclass, whose bookkeeping dominates small gathers
+        self.feature = np.asarray(pack["feature"])
+        self.children = np.asarray(pack["children"])
+        self.threshold = np.asarray(pack["threshold"])
+        self.value = np.asarray(pack["value"])
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            meta = json.load(f)
+        return cls(np.load(path, mmap_mode="r"), meta)
+
+    def matches(self, model_path):
+        """True when this pack was built from the given joblib file."""
+        return self.meta.get("source_sha256") == file_fingerprint(model_path)
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(self.features):
+            raise ValueError(f"X has {X.shape[-1]} features, but the model expects {len(self.features)}")
+        if np.isnan(X).any():
+            raise ValueError("Input X contains NaN.")
+        if len(X) <= BLOCK_ROWS:
+            return self._predict_block(X)
+        return np.concatenate([self._predict_block(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)])
+
+    def _predict_block(self, X):
+        flat = X.ravel()
+        row_base = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, None]
+        node = np.repeat(self.roots[None, :], len(X), axis=0)  # (n_rows, n_trees)
+        for _ in range(self.max_depth):
+            go_right = flat[row_base + self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+        return self.value[node].mean(axis=1)
+
+    def stats(self):
+        return {"trees": len(self.roots), "nodes": len(self.value), "max_depth": self.max_depth,
+                "bytes": int(self.pack.nbytes), "max_error": self.meta.get("max_error")}
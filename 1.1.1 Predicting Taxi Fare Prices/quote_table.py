@@ -0,0 +1,92 @@
+# quote_table.py
+"""
+Precomputed fare quote table for the taxi RandomForest (built by build_quote_table.py).
+- A forest is piecewise constant: fares only change where some tree splits. The
+  table stores one fare (in integer cents) per combination of the discrete
+  features (passenger_count, hour_of_day, day_of_week, month) and per interval
+  between consecutive distance split thresholds, so a lookup reproduces the
+  model to within half a cent
+- Discrete values outside the split range behave like the nearest edge value
+  (e.g. every passenger_count >= 6 lands in the same leaves), so they are clamped
+- The table is a .npy file opened with mmap_mode="r": pages load on demand and
+  are shared between gunicorn workers through the page cache
+- Rows the table can't answer exactly (fractional discrete values, distances
+  past the table's range, NaN) fall back to the real model
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CENTS = 100.0
+
+
+def file_fingerprint(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class QuoteTable:
+    def __init__(self, table, meta):
+        self.table = table                  # (n_combos, n_intervals) uint16 cents
+        self.meta = meta
+        self.features = meta["features"]
+        self.distance_feature = meta["distance_feature"]
+        self.distance_col = self.features.index(self.distance_feature)
+        self.discrete = meta["discrete"]    # [[feature, lo, hi], ...] in table axis order
+        self.discrete_cols = [self.features.index(name) for name, _, _ in self.discrete]
+        self.lo = np.array([lo for _, lo, _ in self.discrete], dtype=np.int64)
+        self.hi = np.array([hi for _, _, hi in self.discrete], dtype=np.int64)
+        sizes = self.hi - self.lo + 1
+        # row-major strides over the discrete axes
+        self.strides = np.cumprod(np.r_[1, sizes[:0:-1]])[::-1].astype(np.int64)
+        self.thresholds = np.asarray(meta["distance_thresholds"], dtype=np.float64)
+        self.max_distance = float(meta["max_distance"])
+        self.max_error = float(meta["max_error"])
+        self.hits = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            meta = json.load(f)
+        return cls(np.load(path, mmap_mode="r"), meta)
+
+    def matches(self, model_path):
+        return self.meta.get("model_sha256") == file_fingerprint(model_path)
+
+    def lookup(self, X):
+        """Returns (fares, covered mask). Uncovered rows hold NaN."""
+        X = np.asarray(X, dtype=np.float32)
+        disc = X[:, self.discrete_cols]
+        dist = X[:, self.distance_col]
+        covered = np.all(disc == np.floor(disc), axis=1) & (dist >= 0) & (dist <= self.max_distance)
+        idx = np.clip(np.nan_to_num(disc).astype(np.int64), self.lo, self.hi) - self.lo
+        combo = idx @ self.strides
+        # a tree sends x left when x <= threshold, so the interval is the count of thresholds < x
+        interval = np.searchsorted(self.thresholds, dist.astype(np.float64), side="left")
+        interval = np.minimum(interval, self.table.shape[1] - 1)
+        fares = np.full(len(X), np.nan)
+        rows = np.flatnonzero(covered)
+        fares[rows] = self.table[combo[rows], interval[rows]] / CENTS
+        return fares, covered
+
+    def quote(self, X, model):
+        """Fares for every row: table where covered, model.predict for the rest."""
+        fares, covered = self.lookup(X)
+        missing = ~covered
+        n_missing = int(missing.sum())
+        if n_missing:
+            fares[missing] = model.predict(np.asarray(X, dtype=np.float32)[missing])
+        self.hits += len(fares) - n_missing
+        self.fallbacks += n_missing
+        return fares
+
+    def stats(self):
+        return {"shape": list(self.table.shape), "max_error": self.max_error,
+                "max_distance": self.max_distance, "hits": self.hits, "fallbacks": self.fallbacks}
@@ -0,0 +1,11 @@
+# tests/conftest.py
+# Make the app's modules (app, trips, quote_table, ...) importable, and run from the app
+# directory, which app.py resolves models/ against, when pytest starts anywhere else.
+import os
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+os.chdir(APP_DIR)
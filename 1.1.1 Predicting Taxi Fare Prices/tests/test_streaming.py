@@ -0,0 +1,92 @@
+# tests/test_streaming.py
+import csv
+import io
+import json
+
+import pytest
+
+import app as taxi
+
+FEATURES = ["distance_miles", "passenger_count", "hour_of_day", "day_of_week", "month"]
+TRIP = [2.5, 1, 8, 2, 5]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(taxi, "STREAM_CHUNK_ROWS", 4)
+    return taxi.app.test_client()
+
+
+def csv_upload(ids, bad_row=None):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(FEATURES + ["id"])
+    for i, trip_id in enumerate(ids):
+        writer.writerow(([-1.0] + TRIP[1:] if i == bad_row else TRIP) + [trip_id])
+    return buf.getvalue()
+
+
+def ndjson_upload(n):
+    return "".join(json.dumps({**dict(zip(FEATURES, TRIP)), "id": f"t{i}"}) + "\n" for i in range(n))
+
+
+def fail_on_call(monkeypatch, call_no):
+    real_quote, calls = taxi.quote, []
+
+    def flaky_quote(X):
+        calls.append(len(X))
+        if len(calls) == call_no:
+            raise RuntimeError("model exploded")
+        return real_quote(X)
+
+    monkeypatch.setattr(taxi, "quote", flaky_quote)
+
+
+def test_csv_ids_with_delimiters_round_trip(client):
+    ids = ["a,0", 'say "hi"', "two\nlines", "plain", ""]
+    response = client.post("/api/fare", data=csv_upload(ids), content_type="text/csv")
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ["row", "id", "fare"]
+    assert [r[1] for r in rows[1:]] == ids
+    assert [r[0] for r in rows[1:]] == [str(i) for i in range(len(ids))]
+    assert len({r[2] for r in rows[1:]}) == 1
+
+
+def test_ndjson_streams_one_record_per_trip(client):
+    response = client.post("/api/fare", data=ndjson_upload(10), content_type="application/x-ndjson")
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r["row"] for r in records] == list(range(10))
+    assert [r["id"] for r in records] == [f"t{i}" for i in range(10)]
+    assert all(isinstance(r["fare"], float) for r in records)
+
+
+def test_bad_row_in_a_later_chunk_ends_csv_with_an_error_line(client):
+    response = client.post("/api/fare", data=csv_upload([f"t{i}" for i in range(10)], bad_row=9),
+                           content_type="text/csv")
+    lines = response.get_data(as_text=True).splitlines()
+    assert response.status_code == 200
+    assert len(lines) == 1 + 8 + 1
+    assert lines[-1].startswith("# error: trip 9")
+
+
+def test_unexpected_failure_ends_csv_with_an_error_line(client, monkeypatch):
+    fail_on_call(monkeypatch, 2)
+    response = client.post("/api/fare", data=csv_upload([f"t{i}" for i in range(10)]), content_type="text/csv")
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 1 + 4 + 1
+    assert lines[-1] == "# error: quoting failed after 4 trips (RuntimeError)"
+
+
+def test_unexpected_failure_ends_ndjson_with_an_error_record(client, monkeypatch):
+    fail_on_call(monkeypatch, 3)
+    response = client.post("/api/fare", data=ndjson_upload(10), content_type="application/x-ndjson")
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(records) == 8 + 1
+    assert records[-1] == {"error": "quoting failed after 8 trips (RuntimeError)"}
+
+
+def test_bad_first_chunk_is_a_400(client):
+    response = client.post("/api/fare", data=csv_upload(["t0", "t1"], bad_row=1), content_type="text/csv")
+    assert response.status_code == 400
+    assert "trip 1" in response.get_json()["error"]
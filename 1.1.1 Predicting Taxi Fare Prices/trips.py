@@ -0,0 +1,160 @@
+# trips.py
+"""
+Trip parsing for the batch fare API (/api/fare).
+- JSON bodies: an array of trips (objects keyed by feature name, or positional
+  arrays), {"trips": [...]}, or column-oriented {"columns": {name: [...]}}
+- Streamed bodies: NDJSON (one trip per line) or CSV with a header row, read
+  in chunks of CHUNK_ROWS so the whole upload never sits in memory
+- Every chunk becomes one C-contiguous float32 array (the dtype the forest
+  uses internally, so predict doesn't copy it again) and is range-checked
+  before it reaches the model
+"""
+
+import csv
+import io
+import json
+
+import numpy as np
+
+DEFAULT_FEATURES = ["distance_miles", "passenger_count", "hour_of_day", "day_of_week", "month"]
+ID_FIELD = "id"  # optional, echoed back and never passed to the model
+CHUNK_ROWS = 8192
+READ_BUFFER = 1 << 16
+
+# inclusive bounds; values outside them are rejected instead of extrapolated
+RANGES = {
+    "distance_miles": (0.0, None),
+    "passenger_count": (0, None),
+    "hour_of_day": (0, 23),
+    "day_of_week": (0, 6),
+    "month": (1, 12),
+}
+
+
+class TripError(ValueError):
+    """Invalid trip payload; maps to HTTP 400."""
+
+
+class TripSchema:
+    def __init__(self, features=None):
+        self.features = list(features) if features else list(DEFAULT_FEATURES)
+        self._index = {name: j for j, name in enumerate(self.features)}
+
+    def describe(self):
+        return {"features": self.features, "id_field": ID_FIELD,
+                "ranges": {k: v for k, v in RANGES.items() if k in self._index}}
+
+    def _empty(self, n):
+        return np.empty((n, len(self.features)), dtype=np.float32)
+
+    def validate(self, X, offset=0):
+        """Raise TripError naming the first trip with a missing or out-of-range value."""
+        bad = np.isnan(X)
+        for name, (lo, hi) in RANGES.items():
+            j = self._index.get(name)
+            if j is None:
+                continue
+            col = X[:, j]
+            if lo is not None:
+                bad[:, j] |= col < lo
+            if hi is not None:
+                bad[:, j] |= col > hi
+        if bad.any():
+            i, j = np.argwhere(bad)[0]
+            raise TripError(f"trip {offset + i}: {self.features[j]} is missing or out of range ({float(X[i, j])})")
+        return X
+
+    def from_records(self, rows, offset=0):
+        """(float32 array, ids or None) from a list of objects or positional arrays."""
+        X = self._empty(len(rows))
+        ids = None
+        width = len(self.features)
+        for i, row in enumerate(rows):
+            try:
+                if isinstance(row, dict):
+                    X[i] = [row.get(name, np.nan) for name in self.features]
+                    if ID_FIELD in row:
+                        if ids is None:
+                            ids = [None] * len(rows)
+                        ids[i] = row[ID_FIELD]
+                elif isinstance(row, (list, tuple)) and len(row) == width:
+                    X[i] = row
+                else:
+                    raise TripError(f"trip {offset + i}: expected an object or an array of {width} numbers")
+            except (TypeError, ValueError) as e:
+                if isinstance(e, TripError):
+                    raise
+                raise TripError(f"trip {offset + i}: values must be numeric")
+        return self.validate(X, offset), ids
+
+    def from_columns(self, columns):
+        if not isinstance(columns, dict):
+            raise TripError("'columns' must be an object of feature -> list of values")
+        missing = [name for name in self.features if name not in columns]
+        if missing:
+            raise TripError(f"missing columns: {', '.join(missing)}")
+        lengths = {len(columns[name]) for name in self.features}
+        if len(lengths) != 1:
+            raise TripError("all columns must have the same length")
+        X = self._empty(lengths.pop())
+        try:
+            for j, name in enumerate(self.features):
+                X[:, j] = columns[name]
+        except (TypeError, ValueError):
+            raise TripError(f"column {name} must be numeric")
+        ids = columns.get(ID_FIELD)
+        return self.validate(X), list(ids) if ids is not None else None
+
+    def from_json(self, payload):
+        if isinstance(payload, dict) and "columns" in payload:
+            return self.from_columns(payload["columns"])
+        trips = payload.get("trips") if isinstance(payload, dict) else payload
+        if not isinstance(trips, list) or not trips:
+            raise TripError('Body must be a non-empty JSON array of trips, {"trips": [...]} or {"columns": {...}}')
+        return self.from_records(trips)
+
+    # --- streamed uploads ---
+    def iter_ndjson(self, stream, chunk_rows=CHUNK_ROWS):
+        """Yield (X, ids, offset) per chunk of an NDJSON byte stream."""
+        rows, offset = [], 0
+        # WSGI input streams read line by line are slow; buffer them
+        for line_no, line in enumerate(io.BufferedReader(stream, READ_BUFFER)):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                raise TripError(f"line {line_no + 1} is not valid JSON")
+            if len(rows) >= chunk_rows:
+                X, ids = self.from_records(rows, offset)
+                yield X, ids, offset
+                offset += len(rows)
+                rows = []
+        if rows:
+            X, ids = self.from_records(rows, offset)
+            yield X, ids, offset
+
+    def iter_csv(self, stream, chunk_rows=CHUNK_ROWS):
+        """Yield (X, ids, offset) per chunk of a CSV byte stream with a header row."""
+        reader = csv.reader(io.TextIOWrapper(io.BufferedReader(stream, READ_BUFFER), encoding="utf-8", newline=""))
+        header = [h.strip() for h in next(reader, [])]
+        missing = [name for name in self.features if name not in header]
+        if missing:
+            raise TripError(f"CSV header is missing: {', '.join(missing)}")
+        cols = [header.index(name) for name in self.features]
+        id_col = header.index(ID_FIELD) if ID_FIELD in header else None
+        offset = 0
+        while True:
+            block = [row for _, row in zip(range(chunk_rows), reader) if row]
+            if not block:
+                return
+            X = self._empty(len(block))
+            try:
+                for i, row in enumerate(block):
+                    X[i] = [row[j] if row[j] != "" else "nan" for j in cols]
+            except (IndexError, ValueError):
+                raise TripError(f"trip {offset + i}: expected {len(header)} numeric fields")
+            ids = [row[id_col] for row in block] if id_col is not None else None
+            yield self.validate(X, offset), ids, offset
+            offset += len(block)
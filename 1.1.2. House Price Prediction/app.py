@@ -1,13 +1,18 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, abort, Response, jsonify
 import joblib
 import pandas as pd
 import numpy as np
 import os
 import random
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+import sys
+
+# serving_common/ (shared asset cache) lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serving_common.assets import AssetCache, build_response
+from charts import ChartRenderer
+from listings import ListingSchema, ListingError
 
 app = Flask(__name__)
 app.secret_key = "supersecretkey_eric_2025"
@@ -20,6 +25,19 @@ VIDEO_TUTORIAL_LINK = "https://youtu.be/Wqmtf9SA_kk"
 DATASET_LINK = "https://www.kaggle.com/datasets/juhibhojani/house-price"
 MODEL_FILENAME = "house_price_model.joblib"
 MODEL_PATH = os.path.join("models", MODEL_FILENAME)
+NOTEBOOK_DIR = "notebooks"
+
+# ---------- Chart rendering config ----------
+# "url": page links to /charts/<value>.<fmt> and the browser fetches it once rendered
+# "inline": the chart is embedded as a data URI (one request, waits for the render)
+CHART_MODE = os.environ.get("HOUSE_CHART_MODE", "url")
+CHART_FORMAT = os.environ.get("HOUSE_CHART_FORMAT", "png")  # "png" or "svg"
+CHART_WORKERS = int(os.environ.get("HOUSE_CHART_WORKERS", "2"))
+CHART_CACHE_ENTRIES = int(os.environ.get("HOUSE_CHART_CACHE_ENTRIES", "256"))
+CHART_ROUND_TO = int(os.environ.get("HOUSE_CHART_ROUND_TO", "100"))  # dollars; charts are keyed by rounded price
+
+# ---------- JSON API config ----------
+API_MAX_LISTINGS = int(os.environ.get("HOUSE_API_MAX_LISTINGS", "100000"))
 
 # ---------- Ensure static subfolders exist ----------
 for folder in ["static/css", "static/js", "static/images", "static/slides", "static/charts", "models", "notebooks"]:
@@ -33,6 +51,7 @@ if os.path.exists(MODEL_PATH):
         app.logger.info(f"Model loaded from {MODEL_PATH}")
     except Exception as e:
         app.logger.error(f"Failed to load model: {e}")
+listing_schema = ListingSchema.for_model(model)
 
 # ---------- Helper functions ----------
 def url_for_static(path):
@@ -48,31 +67,31 @@ def choose_random_house_image():
     except:
         return None
 
-def save_prediction_chart(prediction_value, chart_filename="prediction_chart.png"):
+charts = ChartRenderer(CHART_WORKERS, CHART_CACHE_ENTRIES, CHART_ROUND_TO, CHART_FORMAT)
+
+def prediction_chart(prediction_value, inline=False):
     try:
-        avg_price = 180000
-        values = [avg_price, prediction_value]
-        labels = ["Average Price", "Predicted Price"]
-
-        plt.figure(figsize=(6, 4))
-        bars = plt.bar(labels, values)
-        bars[0].set_alpha(0.6)
-        bars[1].set_color("#2b8c2b")
-
-        plt.ylabel("Price ($)")
-        plt.title("Predicted vs Average House Price")
-
-        for bar, val in zip(bars, values):
-            plt.text(bar.get_x() + bar.get_width()/2, val*1.01, f"${val:,.0f}", ha="center")
-
-        chart_path = os.path.join("static/charts", chart_filename)
-        plt.tight_layout()
-        plt.savefig(chart_path)
-        plt.close()
-        return url_for_static("charts/" + chart_filename)
-    except:
+        if inline:
+            return charts.data_uri(prediction_value)
+        key = charts.submit(prediction_value)
+        return url_for("chart_image", key=key, ext=charts.fmt)
+    except Exception as e:
+        app.logger.error(f"Chart rendering failed: {e}")
         return None
 
+# ---------- Notebook cache ----------
+# exported notebooks are served from memory (gzip/brotli, ETag, 304, ranges) and
+# the listing is only re-read when the folder's mtime changes
+ASSETS = AssetCache()
+_notebook_listing = {"mtime": None, "files": []}
+
+def list_notebooks():
+    mtime = os.stat(NOTEBOOK_DIR).st_mtime_ns
+    if _notebook_listing["mtime"] != mtime:
+        files = sorted(f for f in os.listdir(NOTEBOOK_DIR) if f.lower().endswith(".html"))
+        _notebook_listing.update(mtime=mtime, files=files)
+    return _notebook_listing["files"]
+
 # ---------- Context processor ----------
 @app.context_processor
 def inject_globals():
@@ -87,9 +106,19 @@ def index():
 
 @app.route("/notebooks")
 def notebooks():
-    notebook_dir = "notebooks"
-    notebooks_list = [f for f in os.listdir(notebook_dir) if f.lower().endswith(".html")]
-    return render_template("notebooks.html", notebooks=notebooks_list)
+    return render_template("notebooks.html", notebooks=list_notebooks())
+
+@app.route("/notebooks/<name>")
+def notebook_file(name):
+    # only names from the listing are served, so the path can't escape the folder
+    if name not in list_notebooks():
+        abort(404)
+    try:
+        asset = ASSETS.get(name, [os.path.join(NOTEBOOK_DIR, name)])
+    except FileNotFoundError:
+        abort(404)
+    status, headers, body = build_response(asset, request.headers)
+    return Response(body, status=status, headers=headers)
 
 @app.route("/datasets")
 def datasets():
@@ -122,13 +151,59 @@ def prediction():
                 "Street": street if street else np.nan
             }])
             prediction_value = float(model.predict(df)[0])
-            chart_url = save_prediction_chart(prediction_value)
+            inline = request.args.get("chart", CHART_MODE) == "inline"
+            chart_url = prediction_chart(prediction_value, inline=inline)
             house_image = choose_random_house_image()
         except Exception as e:
             flash(f"Error: {e}", "danger")
 
     return render_template("prediction.html", prediction=prediction_value, chart_url=chart_url, house_image=house_image, model_warning=model_warning, input_data=input_data)
 
+@app.route("/api/predict", methods=["POST"])
+def api_predict():
+    """
+    Batch pricing: body is a JSON array of listings (or {"listings": [...]}), each an
+    object with the model's columns (see GET /api/schema) and an optional "id".
+    All listings go through a single model.predict call.
+    """
+    if model is None:
+        return jsonify(error="Model not loaded. Predictions disabled."), 503
+    payload = request.get_json(silent=True)
+    try:
+        listings = ListingSchema.listings_from_payload(payload)
+        if len(listings) > API_MAX_LISTINGS:
+            raise ListingError(f"Too many listings in one request (max {API_MAX_LISTINGS}).")
+        df, ids = listing_schema.to_frame(listings)
+    except ListingError as e:
+        return jsonify(error=str(e)), 400
+    try:
+        predictions = np.asarray(model.predict(df), dtype=np.float64)
+    except Exception as e:
+        return jsonify(error=f"Prediction failed: {e}"), 400
+    result = {"count": len(predictions), "predictions": predictions.tolist()}
+    if ids is not None:
+        result["ids"] = ids
+    return jsonify(result)
+
+@app.route("/api/schema")
+def api_schema():
+    return jsonify(listing_schema.describe())
+
+@app.route("/charts/<key>.<ext>")
+def chart_image(key, ext):
+    try:
+        key = int(key)
+    except ValueError:
+        abort(404)
+    if ext != charts.fmt or key != charts.key_for(key):
+        abort(404)
+    try:
+        data = charts.get(key)
+    except Exception:
+        abort(503)
+    # a key always renders the same image, so browsers may keep it
+    return Response(data, mimetype=charts.media_type, headers={"Cache-Control": "public, max-age=86400"})
+
 @app.route("/tutorial")
 def tutorial():
     embed = VIDEO_TUTORIAL_LINK
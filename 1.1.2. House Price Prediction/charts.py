@@ -0,0 +1,222 @@
+# charts.py
+"""
+Prediction chart rendering off the request thread.
+- Charts are keyed by the prediction rounded to CHART_ROUND_TO dollars, so the
+  same (rounded) price is rendered once and shared by every user
+- Rendering runs on a small thread pool; the page can link to the chart
+  (/charts/<value>.png, served when ready) or embed it as a data URI
+- Rendered images live in a bounded in-memory LRU, so nothing is written to
+  static/ and concurrent requests can't overwrite each other's chart
+- PNGs are drawn from a per-thread template figure with the object-oriented Agg
+  API (no pyplot state, no lock); SVGs are generated directly as markup
+"""
+
+import base64
+import io
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+from PIL import Image
+
+AVERAGE_PRICE = 180000
+LABELS = ["Average Price", "Predicted Price"]
+PREDICTED_COLOR = "#2b8c2b"
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+PNG_COMPRESS_LEVEL = 1  # ~18 KB either way; level 1 encodes much faster
+MAX_BACKGROUNDS = 32     # cached axis ranges per thread (~1 MB each)
+
+
+def nice_ceil(value):
+    """Smallest "round" number (1, 1.5, 2, ... 8 x 10^k) >= value, so axis limits come from a small set."""
+    if value <= 0:
+        return 1.0
+    exp = 10 ** math.floor(math.log10(value))
+    for step in (1, 1.5, 2, 2.5, 3, 4, 5, 6, 8, 10):
+        if step * exp >= value:
+            return step * exp
+    return 10 * exp
+
+
+def axis_limits(prediction_value):
+    top = nice_ceil(max(AVERAGE_PRICE, prediction_value) * 1.1)
+    bottom = -nice_ceil(-prediction_value * 1.1) if prediction_value < 0 else 0.0
+    return bottom, top
+
+
+class ChartTemplate:
+    """
+    Prebuilt "Predicted vs Average" figure (object-oriented Agg API, no pyplot).
+    Everything but the predicted bar and its label is drawn once per axis range
+    and cached as a background; a render restores it and draws two artists.
+    Not thread-safe by itself: each thread gets its own (see _template()).
+    """
+
+    def __init__(self):
+        self.fig = Figure(figsize=(6, 4))
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        bars = self.ax.bar(LABELS, [AVERAGE_PRICE, AVERAGE_PRICE])
+        bars[0].set_alpha(0.6)
+        bars[1].set_color(PREDICTED_COLOR)
+        self.ax.set_ylabel("Price ($)")
+        self.ax.set_title("Predicted vs Average House Price")
+        self.ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"{x:,.0f}"))
+        center = [bar.get_x() + bar.get_width()/2 for bar in bars]
+        self.ax.text(center[0], AVERAGE_PRICE*1.01, f"${AVERAGE_PRICE:,.0f}", ha="center")
+        self.bar = bars[1]
+        self.label = self.ax.text(center[1], 0, "", ha="center")
+        # animated artists are skipped by canvas.draw(), so they stay out of the background
+        self.bar.set_animated(True)
+        self.label.set_animated(True)
+        # lay out once with wide tick labels so every axis range fits
+        self.ax.set_ylim(-1e7, 1e7)
+        self.fig.tight_layout()
+        self._backgrounds = {}
+
+    def _background(self, limits):
+        bg = self._backgrounds.get(limits)
+        if bg is None:
+            if len(self._backgrounds) >= MAX_BACKGROUNDS:
+                self._backgrounds.clear()
+            self.ax.set_ylim(*limits)
+            self.canvas.draw()
+            bg = self._backgrounds[limits] = self.canvas.copy_from_bbox(self.fig.bbox)
+        return bg
+
+    def render_png(self, prediction_value):
+        limits = axis_limits(prediction_value)
+        self.canvas.restore_region(self._background(limits))
+        self.ax.set_ylim(*limits)
+        self.bar.set_height(prediction_value)
+        self.label.set_y(prediction_value*1.01)
+        self.label.set_text(f"${prediction_value:,.0f}")
+        self.ax.draw_artist(self.bar)
+        self.ax.draw_artist(self.label)
+        width, height = self.canvas.get_width_height()
+        img = Image.frombuffer("RGBA", (width, height), self.canvas.buffer_rgba(), "raw", "RGBA", 0, 1)
+        buf = io.BytesIO()
+        img.convert("RGB").save(buf, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+        return buf.getvalue()
+
+
+_local = threading.local()
+
+
+def _template():
+    template = getattr(_local, "template", None)
+    if template is None:
+        template = _local.template = ChartTemplate()
+    return template
+
+
+def render_svg(prediction_value, width=600, height=400):
+    """Hand-built SVG of the same chart; no matplotlib involved (a few microseconds)."""
+    bottom, top = axis_limits(prediction_value)
+    left, right, y0, y1 = 80, width - 20, height - 40, 40
+
+    def y(v):
+        return y1 + (top - v) / (top - bottom) * (y0 - y1)
+
+    bar_w = (right - left) * 0.4
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="12">',
+             f'<text x="{(left + right) / 2}" y="24" text-anchor="middle" font-size="14">'
+             f'Predicted vs Average House Price</text>',
+             f'<text transform="translate(18 {(y0 + y1) / 2}) rotate(-90)" text-anchor="middle">Price ($)</text>']
+    for i in range(5):
+        tick = bottom + (top - bottom) * i / 4
+        parts.append(f'<line x1="{left - 4}" x2="{left}" y1="{y(tick):.1f}" y2="{y(tick):.1f}" stroke="#000"/>'
+                     f'<text x="{left - 8}" y="{y(tick) + 4:.1f}" text-anchor="end">{tick:,.0f}</text>')
+    zero = y(0)
+    for i, (label, value, style) in enumerate(zip(LABELS, [AVERAGE_PRICE, prediction_value],
+                                                  ['fill="#1f77b4" fill-opacity="0.6"', f'fill="{PREDICTED_COLOR}"'])):
+        x = left + (right - left) * (0.05 + 0.5 * i)
+        top_y, bar_h = min(y(value), zero), abs(zero - y(value))
+        parts.append(f'<rect x="{x:.1f}" y="{top_y:.1f}" width="{bar_w:.1f}" height="{bar_h:.1f}" {style}/>'
+                     f'<text x="{x + bar_w / 2:.1f}" y="{y(value * 1.01) - 2:.1f}" text-anchor="middle">${value:,.0f}</text>'
+                     f'<text x="{x + bar_w / 2:.1f}" y="{y0 + 18}" text-anchor="middle">{label}</text>')
+    parts.append(f'<path d="M{left} {y1}V{y0}H{right}" fill="none" stroke="#000"/></svg>')
+    return "".join(parts).encode("utf-8")
+
+
+def render_chart(prediction_value, fmt="png"):
+    """Thread-safe: PNGs come from a per-thread template figure, SVGs are plain strings."""
+    if fmt == "svg":
+        return render_svg(prediction_value)
+    return _template().render_png(prediction_value)
+
+
+class ChartRenderer:
+    """
+    Thread pool + LRU of rendered charts. submit() starts a render and returns
+    its key right away; get() waits for it (or renders on a cache miss).
+    """
+
+    def __init__(self, max_workers=2, max_entries=256, round_to=100, fmt="png", timeout=10.0):
+        self.round_to = max(int(round_to), 1)
+        self.fmt = fmt
+        self.media_type = MEDIA_TYPES[fmt]
+        self.max_entries = max(int(max_entries), 1)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chart")
+        self._cache = OrderedDict()  # key -> image bytes
+        self._pending = {}           # key -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+
+    def key_for(self, prediction_value):
+        return int(round(float(prediction_value) / self.round_to) * self.round_to)
+
+    def _render(self, key):
+        try:
+            data = render_chart(key, self.fmt)
+        except Exception:
+            with self._lock:
+                self._pending.pop(key, None)  # let the next request retry
+            raise
+        with self._lock:
+            self._cache[key] = data
+            self._pending.pop(key, None)
+            self.renders += 1
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return data
+
+    def submit(self, prediction_value):
+        """Start rendering the chart for a prediction (if needed); returns its key."""
+        key = self.key_for(prediction_value)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            elif key not in self._pending:
+                self._pending[key] = self._pool.submit(self._render, key)
+        return key
+
+    def get(self, key):
+        """Image bytes for a key, waiting up to timeout for an in-flight render."""
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+                return data
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._pool.submit(self._render, key)
+        return future.result(timeout=self.timeout)
+
+    def data_uri(self, prediction_value):
+        data = self.get(self.submit(prediction_value))
+        return f"data:{self.media_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+    def stats(self):
+        return {"entries": len(self._cache), "pending": len(self._pending), "hits": self.hits,
+                "renders": self.renders, "evictions": self.evictions}
@@ -0,0 +1,120 @@
+# listings.py
+"""
+Validation and batching for JSON listing payloads (/api/predict).
+- Expected columns come from the model (feature_names_in_) or fall back to the
+  five fields of the prediction form
+- Numeric columns come from the model too: whatever its ColumnTransformer does
+  not route through a categorical encoder (all of them when there is none)
+- Each column is filled into one preallocated array (float64 for numeric
+  fields, object for categorical ones) and the batch becomes one DataFrame,
+  so the model is called once per request instead of once per listing
+- Unknown fields and non-numeric values are reported with the listing index
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
+DEFAULT_FEATURES = ["MSSubClass", "MSZoning", "LotFrontage", "LotArea", "Street"]
+NUMERIC_FEATURES = {"MSSubClass", "LotFrontage", "LotArea"}  # of DEFAULT_FEATURES, when there is no model
+ID_FIELD = "id"  # optional, echoed back and never passed to the model
+
+
+class ListingError(ValueError):
+    """Invalid listing payload; maps to HTTP 400."""
+
+
+def _find_column_transformer(model):
+    while isinstance(model, Pipeline):
+        found = [step for _, step in model.steps if isinstance(step, ColumnTransformer)]
+        if found:
+            return found[0]
+        model = model.steps[-1][1]
+    return model if isinstance(model, ColumnTransformer) else None
+
+
+def _is_categorical(transformer):
+    steps = transformer.steps if isinstance(transformer, Pipeline) else [(None, transformer)]
+    return any(isinstance(step, (OneHotEncoder, OrdinalEncoder)) for _, step in steps)
+
+
+def numeric_columns(model, columns):
+    """
+    The columns the fitted model treats as numbers: those its ColumnTransformer does
+    not encode as categories, or every column when the model has no ColumnTransformer
+    (a bare estimator only accepts numbers).
+    """
+    ct = _find_column_transformer(model)
+    if ct is None:
+        return list(columns)
+    names = list(getattr(ct, "feature_names_in_", columns))
+    categorical = set()
+    for _, transformer, cols in ct.transformers_:
+        if transformer == "drop" or not _is_categorical(transformer):
+            continue
+        cols = np.asarray(cols).ravel()
+        if cols.dtype == bool:
+            cols = np.asarray(names)[cols]
+        categorical.update(names[c] if isinstance(c, (int, np.integer)) else str(c) for c in cols)
+    return [c for c in columns if c not in categorical]
+
+
+class ListingSchema:
+    def __init__(self, columns=None, numeric=None):
+        self.columns = list(columns) if columns is not None else list(DEFAULT_FEATURES)
+        numeric = NUMERIC_FEATURES if numeric is None else set(numeric)
+        self.numeric = [c for c in self.columns if c in numeric]
+        self._known = set(self.columns) | {ID_FIELD}
+
+    @classmethod
+    def for_model(cls, model):
+        names = getattr(model, "feature_names_in_", None)
+        if names is None:
+            return cls()
+        columns = [str(c) for c in names]
+        return cls(columns, numeric_columns(model, columns))
+
+    def describe(self):
+        return {"columns": self.columns, "numeric": self.numeric, "id_field": ID_FIELD}
+
+    @staticmethod
+    def listings_from_payload(payload):
+        """Accept a bare JSON array or {"listings": [...]}."""
+        listings = payload.get("listings") if isinstance(payload, dict) else payload
+        if not isinstance(listings, list) or not listings:
+            raise ListingError('Body must be a non-empty JSON array of listings or {"listings": [...]}')
+        return listings
+
+    def to_frame(self, listings):
+        """Returns (DataFrame in model column order, list of ids or None)."""
+        n = len(listings)
+        for i, row in enumerate(listings):
+            if not isinstance(row, dict):
+                raise ListingError(f"listing {i} is not an object")
+            unknown = row.keys() - self._known
+            if unknown:
+                raise ListingError(f"listing {i} has unknown fields: {', '.join(sorted(unknown))}")
+
+        arrays = {}
+        for c in self.columns:
+            values = [row.get(c) for row in listings]
+            if c in self.numeric:
+                out = np.empty(n, dtype=np.float64)
+                try:
+                    out[:] = [np.nan if v is None or v == "" else v for v in values]
+                except (TypeError, ValueError):
+                    # slow path only to name the offending listing
+                    for i, v in enumerate(values):
+                        try:
+                            float(np.nan if v is None or v == "" else v)
+                        except (TypeError, ValueError):
+                            raise ListingError(f"listing {i}: {c} must be numeric, got {v!r}")
+                    raise
+            else:
+                out = np.empty(n, dtype=object)
+                out[:] = [np.nan if v is None or v == "" else v for v in values]
+            arrays[c] = out
+        ids = [row.get(ID_FIELD) for row in listings] if any(ID_FIELD in row for row in listings) else None
+        return pd.DataFrame(arrays, columns=self.columns, copy=False), ids
@@ -0,0 +1,68 @@
+# tests/test_listings.py
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from listings import DEFAULT_FEATURES, ListingError, ListingSchema
+
+TRAIN = pd.DataFrame({
+    "Bedrooms": [2, 3, 4, 3, 2, 5],
+    "Suburb": ["north", "south", "north", "east", "east", "south"],
+    "Area": [70.0, 95.5, 120.0, 88.0, 64.0, 150.0],
+    "Zone": ["RL", "RM", "RL", "RL", "RM", "RL"],
+})
+PRICE = np.array([200, 260, 330, 250, 190, 420], dtype=float)
+
+
+def notebook_pipeline(num_cols, cat_cols):
+    # same shape as the training notebook: imputed numbers, imputed + one-hot categories
+    preprocessor = ColumnTransformer([
+        ("num", Pipeline([("imputer", SimpleImputer(strategy="median"))]), num_cols),
+        ("cat", Pipeline([("imputer", SimpleImputer(strategy="most_frequent")),
+                          ("encoder", OneHotEncoder(handle_unknown="ignore", sparse_output=False))]), cat_cols),
+    ])
+    model = Pipeline([("preprocess", preprocessor), ("regressor", RandomForestRegressor(n_estimators=5))])
+    return model.fit(TRAIN, PRICE)
+
+
+def test_numeric_columns_come_from_the_fitted_pipeline():
+    schema = ListingSchema.for_model(notebook_pipeline(["Bedrooms", "Area"], ["Suburb", "Zone"]))
+    assert schema.columns == list(TRAIN.columns)
+    assert schema.numeric == ["Bedrooms", "Area"]
+
+
+def test_positional_column_specs_are_resolved():
+    schema = ListingSchema.for_model(notebook_pipeline([0, 2], [1, 3]))
+    assert schema.numeric == ["Bedrooms", "Area"]
+
+
+def test_bare_estimator_treats_every_column_as_numeric():
+    model = LinearRegression().fit(TRAIN[["Bedrooms", "Area"]], PRICE)
+    assert ListingSchema.for_model(model).numeric == ["Bedrooms", "Area"]
+
+
+def test_without_a_model_the_form_fields_are_used():
+    schema = ListingSchema.for_model(None)
+    assert schema.columns == DEFAULT_FEATURES
+    assert schema.numeric == ["MSSubClass", "LotFrontage", "LotArea"]
+
+
+def test_batch_is_scored_with_model_derived_types():
+    model = notebook_pipeline(["Bedrooms", "Area"], ["Suburb", "Zone"])
+    schema = ListingSchema.for_model(model)
+    listings = [{"id": "a", "Bedrooms": "3", "Suburb": "north", "Area": 90, "Zone": "RL"},
+                {"id": "b", "Bedrooms": 2, "Suburb": None, "Area": "", "Zone": "RM"}]
+    frame, ids = schema.to_frame(listings)
+    assert ids == ["a", "b"]
+    assert frame["Bedrooms"].dtype == np.float64
+    assert not pd.api.types.is_numeric_dtype(frame["Suburb"])
+    assert len(model.predict(frame)) == 2
+
+    with pytest.raises(ListingError, match="listing 1: Area must be numeric"):
+        schema.to_frame([listings[0], {"Bedrooms": 2, "Suburb": "east", "Area": "big", "Zone": "RL"}])
@@ -1,45 +1,183 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Request, Query
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+import asyncio
 import joblib
-import pandas as pd
-import json
 import os
+import sys
+import tempfile
+
+# serving_common/ (shared inference executor) lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serving_common.executor import InferenceExecutor, ExecutorSaturated
+from worker_model import load_worker_model, worker_predict_proba
+from feature_schema import FeatureSchema, SchemaError
+from bulk_score import iter_chunks, score_chunk
+from linear_scorer import load_scorer
+from thresholds import ThresholdPolicy, ThresholdError
+from response_formats import choose_format, render
 
 # --- Paths ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "model.joblib")
 FEATURES_PATH = os.path.join(BASE_DIR, "feature_columns.json")
+THRESHOLDS_PATH = os.environ.get("CREDIT_THRESHOLDS_PATH", os.path.join(BASE_DIR, "thresholds.json"))
+
+# --- Inference executor config ---
+EXECUTOR_KIND = os.environ.get("CREDIT_EXECUTOR", "thread")  # "thread" or "process"
+EXECUTOR_WORKERS = int(os.environ.get("CREDIT_EXECUTOR_WORKERS", "2"))
+EXECUTOR_MAX_QUEUE = int(os.environ.get("CREDIT_EXECUTOR_MAX_QUEUE", "64"))
+
+# --- Scorer: "auto" (flattened NumPy scorer, sklearn fallback), "linear" or "sklearn" ---
+SCORER_MODE = os.environ.get("CREDIT_SCORER", "auto")
+
+# --- Decision threshold: request > tenant (X-Tenant + thresholds.json) > default ---
+DEFAULT_THRESHOLD = float(os.environ.get("CREDIT_DEFAULT_THRESHOLD", "0.5"))
+STRICT_TENANTS = os.environ.get("CREDIT_STRICT_TENANTS", "0") == "1"  # reject unknown X-Tenant values
+
+# --- Bulk scoring config (/predict/bulk) ---
+BULK_MAX_BYTES = int(float(os.environ.get("CREDIT_BULK_MAX_MB", "1024")) * 1024 * 1024)
+BULK_CHUNK_SIZE = int(os.environ.get("CREDIT_BULK_CHUNK_SIZE", "10000"))
+BULK_SPOOL_BYTES = 8 * 1024 * 1024  # request bodies past this go to a temp file
 
 # --- Load artifacts ---
 model = joblib.load(MODEL_PATH)
-with open(FEATURES_PATH) as f:
-    expected_cols = json.load(f)
+schema = FeatureSchema.from_files(FEATURES_PATH, model)
+expected_cols = schema.columns
+model_predict_proba, scorer_name = load_scorer(model, SCORER_MODE, MODEL_PATH)
+thresholds = ThresholdPolicy(THRESHOLDS_PATH, DEFAULT_THRESHOLD, STRICT_TENANTS)
 
 # --- FastAPI setup ---
 app = FastAPI(title="Credit Scoring API")
 app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static")
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 
+if EXECUTOR_KIND == "process":
+    inference = InferenceExecutor("process", EXECUTOR_WORKERS, EXECUTOR_MAX_QUEUE,
+                                  initializer=load_worker_model, initargs=(MODEL_PATH, scorer_name))
+    predict_proba = worker_predict_proba
+else:
+    inference = InferenceExecutor("thread", EXECUTOR_WORKERS, EXECUTOR_MAX_QUEUE)
+    predict_proba = model_predict_proba
+
+@app.on_event("shutdown")
+async def shutdown_inference():
+    inference.shutdown(wait=False)
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.post("/predict", response_class=JSONResponse)
-async def predict(payload: dict):
-    """Payload must be: {"data": [ {col: val, ...}, {...} ]}"""
-    rows = payload.get("data")
-    if not rows:
-        return JSONResponse({"error": "JSON must include key 'data' with records"}, status_code=400)
-
-    df = pd.DataFrame(rows)
-    # ensure all columns exist and in order
-    for c in expected_cols:
-        if c not in df.columns:
-            df[c] = None
-    df = df[expected_cols]
-
-    probs = model.predict_proba(df)[:, 1]
-    preds = (probs >= 0.5).astype(int)
-    return {"predictions": preds.tolist(), "probabilities": probs.tolist()}
+async def predict(payload: dict, request: Request, threshold: float = None, fmt: str = Query(None, alias="format")):
+    """Payload must be: {"data": [ {col: val, ...}, {...} ]} or {"columns": {col: [val, ...], ...}}
+    Optional: "threshold" (0-1) and "format" (json, compact, ndjson, float32), in the body or query string."""
+    try:
+        cutoff = thresholds.resolve(payload.get("threshold", threshold), request.headers.get("x-tenant"))
+        fmt = choose_format(payload.get("format", fmt), request.headers.get("accept", ""))
+        # large batches take a while to assemble, so keep it off the event loop
+        df = await asyncio.get_running_loop().run_in_executor(None, schema.from_payload, payload)
+    except (SchemaError, ThresholdError, ValueError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    try:
+        probs = (await inference.run(predict_proba, df))[:, 1]
+    except ExecutorSaturated as e:
+        return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
+    return render(probs, cutoff, fmt)
+
+@app.post("/predict/bulk")
+async def predict_bulk(request: Request, chunk_size: int = BULK_CHUNK_SIZE, threshold: float = None,
+                       id_column: str = None):
+    """Score a raw CSV (text/csv) or Parquet (application/vnd.apache.parquet) request body.
+    Streams back CSV rows: row[,id_column],prediction,probability, one chunk at a time.
+    Errors after the first chunk (the status is already sent) end the body with a "# error: ..." line."""
+    fmt = "parquet" if "parquet" in request.headers.get("content-type", "") else "csv"
+    try:
+        threshold = thresholds.resolve(threshold, request.headers.get("x-tenant"))
+    except ThresholdError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    chunk_size = max(1, min(chunk_size, 100_000))
+    spool = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_BYTES)
+    size = 0
+    async for part in request.stream():
+        size += len(part)
+        if size > BULK_MAX_BYTES:
+            spool.close()
+            return JSONResponse({"error": f"Body exceeds the {BULK_MAX_BYTES // (1024 * 1024)} MB limit."},
+                                status_code=413)
+        spool.write(part)
+    if size == 0:
+        spool.close()
+        return JSONResponse({"error": "Request body is empty."}, status_code=400)
+    spool.seek(0)
+
+    loop = asyncio.get_running_loop()
+    chunks = iter_chunks(spool, schema, fmt, chunk_size)
+
+    def release():
+        chunks.close()  # the reader must let go of the spool before it is closed
+        spool.close()
+
+    try:
+        # parse and score the first chunk up front so bad input gets a proper 400 / 503
+        first = await loop.run_in_executor(None, next, chunks, None)
+        if first is None:
+            raise SchemaError("File contains no rows.")
+        missing = [c for c in schema.columns if c not in first.columns]
+        if missing:
+            raise SchemaError(f"Missing columns: {', '.join(missing)}")
+        if id_column and id_column not in first.columns:
+            raise SchemaError(f"id_column {id_column!r} not found in input.")
+        first_scores = await inference.run(score_chunk, first, schema, predict_proba, 0, threshold, id_column)
+    except ExecutorSaturated as e:
+        release()
+        return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
+    except Exception as e:
+        release()
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    async def body():
+        try:
+            yield first_scores.to_csv(index=False)
+            rows = len(first_scores)
+            while True:
+                try:
+                    chunk = await loop.run_in_executor(None, next, chunks, None)
+                    if chunk is None:
+                        break
+                    # bulk jobs wait for a free inference slot instead of failing mid-stream
+                    scores = await inference.run_when_free(score_chunk, chunk, schema, predict_proba, rows,
+                                                           threshold, id_column)
+                except Exception as e:
+                    # a truncated file must not pass for a complete one: close with an error trailer
+                    yield f"# error: {e}\n"
+                    break
+                rows += len(scores)
+                yield scores.to_csv(index=False, header=False)
+        finally:
+            release()
+
+    return StreamingResponse(body(), media_type="text/csv",
+                             headers={"Content-Disposition": 'attachment; filename="scores.csv"'})
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "model_loaded": model is not None, "scorer": scorer_name}
+
+@app.get("/schema")
+def feature_schema():
+    """Expected input columns, split into numeric and categorical."""
+    return schema.describe()
+
+@app.get("/thresholds")
+def decision_thresholds():
+    """Default and per-tenant decision thresholds currently in effect."""
+    return thresholds.describe()
+
+@app.get("/metrics")
+def metrics():
+    """Inference queue depth and throughput counters."""
+    return {"executor": inference.stats()}
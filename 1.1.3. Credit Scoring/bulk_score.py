@@ -0,0 +1,136 @@
+"""Bulk scoring for the Credit Scoring model.
+
+Streams a CSV (or Parquet) portfolio through the model in fixed-size chunks
+and writes prediction / probability rows out as each chunk finishes, so memory
+stays bounded by the chunk size rather than the file size. The same helpers
+back the POST /predict/bulk endpoint in app.py.
+
+Usage:
+    python bulk_score.py german_credit_data.csv -o scores.csv
+    python bulk_score.py portfolio.parquet -o scores.parquet --chunk-size 20000 --id-column applicant_id
+
+Parquet needs pyarrow; CSV has no extra dependencies.
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import pandas as pd
+
+from feature_schema import FeatureSchema
+from linear_scorer import load_scorer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, "model.joblib")
+FEATURES_PATH = os.path.join(BASE_DIR, "feature_columns.json")
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def detect_format(name, default="csv"):
+    name = (name or "").lower()
+    if name.endswith((".parquet", ".pq")):
+        return "parquet"
+    if name.endswith((".csv", ".csv.gz", ".txt")):
+        return "csv"
+    return default
+
+
+def iter_chunks(source, schema, fmt="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrame chunks of at most chunk_size rows from a path or binary file object."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+        return
+    # categoricals as str so a chunk of digit-only codes can't change the column's type
+    dtype = {c: str for c in schema.categorical}
+    yield from pd.read_csv(source, chunksize=chunk_size, dtype=dtype)
+
+
+def score_chunk(df, schema, predict_proba, start_row=0, threshold=0.5, id_column=None):
+    """Score one chunk; returns a DataFrame with row index (and id), prediction, probability."""
+    probs = predict_proba(schema.from_frame(df, start_row))[:, 1]
+    out = {"row": range(start_row, start_row + len(df))}
+    if id_column:
+        out[id_column] = df[id_column].to_numpy()
+    out["prediction"] = (probs >= threshold).astype("int8")
+    out["probability"] = probs
+    return pd.DataFrame(out)
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file as they arrive."""
+
+    def __init__(self, path, fmt="csv"):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._parquet = None
+        if fmt == "csv":
+            self._fh = open(path, "w", newline="", encoding="utf-8")
+
+    def write(self, chunk):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            chunk.to_csv(self._fh, header=self.rows == 0, index=False)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self.fmt == "csv":
+            self._fh.close()
+
+
+def score_file(source, out_path, schema, predict_proba, chunk_size=DEFAULT_CHUNK_SIZE,
+               threshold=0.5, id_column=None, in_format=None, out_format=None, progress=None):
+    in_format = in_format or detect_format(str(source))
+    out_format = out_format or detect_format(str(out_path))
+    writer = ChunkWriter(out_path, out_format)
+    try:
+        for chunk in iter_chunks(source, schema, in_format, chunk_size):
+            writer.write(score_chunk(chunk, schema, predict_proba, writer.rows, threshold, id_column))
+            if progress:
+                progress(writer.rows)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV or Parquet file with the feature_columns.json columns")
+    parser.add_argument("-o", "--output", required=True, help="output .csv or .parquet")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--id-column", help="input column copied to the output next to each score")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scorer", choices=["auto", "linear", "sklearn"], default="auto")
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model)
+    schema = FeatureSchema.from_files(FEATURES_PATH, model)
+    predict_proba, scorer_name = load_scorer(model, args.scorer, args.model)
+    print(f"scoring with the {scorer_name} scorer", file=sys.stderr)
+    start = time.perf_counter()
+
+    def progress(rows):
+        print(f"\r{rows} rows scored ({rows / (time.perf_counter() - start):.0f} rows/s)", end="", file=sys.stderr)
+
+    rows = score_file(args.input, args.output, schema, predict_proba, args.chunk_size,
+                      args.threshold, args.id_column, progress=progress)
+    print(f"\nwrote {rows} rows to {args.output} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Compiled input schema for the Credit Scoring model.
+
+FeatureSchema is built once at startup from feature_columns.json plus the
+fitted ColumnTransformer inside model.joblib, which tells us which columns are
+numeric (scaled) and which are categorical (one-hot encoded). Request payloads
+are turned into model input by filling one preallocated array per column and
+wrapping them in a single DataFrame that is already in training order, so no
+per-request column insertion or reordering is needed.
+
+Two payload layouts are accepted:
+    row-oriented:    {"data": [{"status": ..., "duration": 6, ...}, ...]}
+    column-oriented: {"columns": {"status": [...], "duration": [...], ...}}
+Numeric columns are required in every row: the model's numeric pipeline has
+no imputer, so a missing, empty or non-numeric value is a SchemaError (HTTP
+400) rather than a NaN that fails inside the scorer. Missing categorical
+values become None (encoded as all zeros); unknown keys are ignored.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
+
+class SchemaError(ValueError):
+    """Raised for payloads that cannot be mapped onto the schema; maps to HTTP 400."""
+
+
+def _find_column_transformer(model):
+    """Walk calibrated / pipeline wrappers down to the fitted ColumnTransformer."""
+    seen = 0
+    while model is not None and seen < 10:
+        seen += 1
+        if isinstance(model, ColumnTransformer):
+            return model
+        if isinstance(model, Pipeline):
+            found = [step for _, step in model.steps if isinstance(step, ColumnTransformer)]
+            if found:
+                return found[0]
+            model = model.steps[-1][1]
+        elif hasattr(model, "calibrated_classifiers_"):
+            model = model.calibrated_classifiers_[0].estimator
+        else:
+            model = getattr(model, "estimator", None)
+    return None
+
+
+def _is_categorical(transformer):
+    steps = transformer.steps if isinstance(transformer, Pipeline) else [(None, transformer)]
+    return any(isinstance(step, (OneHotEncoder, OrdinalEncoder)) for _, step in steps)
+
+
+class FeatureSchema:
+    def __init__(self, columns, numeric=()):
+        self.columns = list(columns)
+        self.numeric = [c for c in self.columns if c in set(numeric)]
+        self.categorical = [c for c in self.columns if c not in set(numeric)]
+        self._is_numeric = {c: c in set(numeric) for c in self.columns}
+
+    @classmethod
+    def from_files(cls, features_path, model=None):
+        """Load column order from feature_columns.json; numeric columns come from the model."""
+        with open(features_path) as f:
+            columns = json.load(f)
+        numeric = []
+        ct = _find_column_transformer(model)
+        if ct is not None:
+            for _, transformer, cols in ct.transformers_:
+                if transformer in ("drop", "passthrough") or not isinstance(cols, (list, tuple, np.ndarray)):
+                    continue
+                if not _is_categorical(transformer):
+                    numeric.extend(cols)
+        return cls(columns, numeric)
+
+    def describe(self):
+        return {"columns": self.columns, "numeric": self.numeric, "categorical": self.categorical}
+
+    def _check_complete(self, name, out, start_row=0):
+        missing = np.isnan(out)
+        if missing.any():
+            row = start_row + int(np.argmax(missing))
+            raise SchemaError(f"Column {name!r} is required; missing or NaN in row {row}.")
+        return out
+
+    def _numeric_array(self, name, values, n):
+        out = np.empty(n, dtype=np.float64)
+        try:
+            out[:] = [np.nan if v is None or v == "" else v for v in values]
+        except (TypeError, ValueError):
+            raise SchemaError(f"Column {name!r} must be numeric.")
+        return self._check_complete(name, out)
+
+    def _categorical_array(self, values, n):
+        out = np.empty(n, dtype=object)
+        out[:] = values
+        return out
+
+    def _frame(self, arrays, n):
+        # one construction, columns already in training order
+        return pd.DataFrame(arrays, columns=self.columns, index=pd.RangeIndex(n), copy=False)
+
+    def from_records(self, rows):
+        """Model input from a list of {column: value} dicts."""
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise SchemaError("'data' must be a list of objects.")
+        n = len(rows)
+        arrays = {}
+        for c in self.columns:
+            values = [r.get(c) for r in rows]
+            if self._is_numeric[c]:
+                arrays[c] = self._numeric_array(c, values, n)
+            else:
+                arrays[c] = self._categorical_array(values, n)
+        return self._frame(arrays, n)
+
+    def from_columns(self, columns):
+        """Model input from a {column: [values, ...]} mapping."""
+        if not isinstance(columns, dict):
+            raise SchemaError("'columns' must be an object of column -> list of values.")
+        lengths = {len(v) for k, v in columns.items() if k in self._is_numeric and isinstance(v, list)}
+        if any(k in self._is_numeric and not isinstance(v, list) for k, v in columns.items()):
+            raise SchemaError("Every entry in 'columns' must be a list.")
+        if len(lengths) != 1:
+            raise SchemaError("All columns must have the same, non-zero length." if lengths else
+                              "'columns' does not contain any known feature.")
+        n = lengths.pop()
+        arrays = {}
+        for c in self.columns:
+            if self._is_numeric[c]:
+                values = columns.get(c)
+                if values is None:
+                    raise SchemaError(f"Missing numeric column {c!r}.")
+                elif all(type(v) in (int, float) for v in values):
+                    arrays[c] = self._check_complete(c, np.asarray(values, dtype=np.float64))
+                else:
+                    arrays[c] = self._numeric_array(c, values, n)
+            else:
+                arrays[c] = self._categorical_array(columns.get(c, [None] * n), n)
+        return self._frame(arrays, n)
+
+    def from_frame(self, df, start_row=0):
+        """
+        Model input from a DataFrame chunk (bulk scoring); extra columns are dropped.
+        start_row is the chunk's first row in the whole input, so errors name the input row.
+        """
+        n = len(df)
+        arrays = {}
+        for c in self.columns:
+            if c not in df.columns:
+                if self._is_numeric[c]:
+                    raise SchemaError(f"Missing numeric column {c!r}.")
+                arrays[c] = np.full(n, None, dtype=object)
+            elif self._is_numeric[c]:
+                try:
+                    values = df[c].to_numpy(dtype=np.float64, na_value=np.nan)
+                except (TypeError, ValueError):
+                    raise SchemaError(f"Column {c!r} must be numeric.")
+                arrays[c] = self._check_complete(c, values, start_row)
+            else:
+                col = df[c].to_numpy(dtype=object)
+                arrays[c] = np.where(pd.isna(col), None, col)
+        return self._frame(arrays, n)
+
+    def from_payload(self, payload):
+        """Dispatch on payload layout; raises SchemaError when neither key is present."""
+        if payload.get("columns") is not None:
+            frame = self.from_columns(payload["columns"])
+        elif payload.get("data"):
+            frame = self.from_records(payload["data"])
+        else:
+            raise SchemaError("JSON must include key 'data' with records or 'columns' with column arrays")
+        if len(frame) == 0:
+            raise SchemaError("Payload contains no rows.")
+        return frame
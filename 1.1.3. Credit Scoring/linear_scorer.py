@@ -0,0 +1,351 @@
+"""Precompiled NumPy scorer for the calibrated logistic regression in model.joblib.
+
+model.joblib is CalibratedClassifierCV(Pipeline(ColumnTransformer(StandardScaler |
+OneHotEncoder), LogisticRegression)). Every fold of that model is linear, so it
+can be flattened into:
+    - per numeric column: weight / scale (the StandardScaler folded in), plus the
+      -mean * weight / scale terms folded into the bias
+    - per categorical column: a lookup table category -> weight, where unknown
+      categories contribute 0 (same as OneHotEncoder(handle_unknown="ignore"))
+    - per fold: a sigmoid (a, b) or isotonic (x, y) calibration map
+and P(class 1) = mean over folds of calibrate(bias + X_num @ w + sum(tables)).
+That is one small matrix product and a few hash lookups per call, with none of
+sklearn's per-call validation.
+
+Usage:
+    python linear_scorer.py export             # writes linear_scorer.npz next to model.joblib
+    python linear_scorer.py verify             # compares against sklearn on the dataset + edge cases
+
+Serving: CREDIT_SCORER=auto|linear|sklearn (see load_scorer). auto uses the
+exported artifact when it matches model.joblib, otherwise compiles in memory,
+and falls back to sklearn when the model is not a supported shape or fails the
+startup self-check.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+from sklearn.compose import ColumnTransformer
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, "model.joblib")
+FEATURES_PATH = os.path.join(BASE_DIR, "feature_columns.json")
+SCORER_PATH = os.path.join(BASE_DIR, "linear_scorer.npz")
+DATA_PATH = os.path.join(BASE_DIR, "german_credit_data.csv")
+
+logger = logging.getLogger(__name__)
+
+# float64 sums in a different order than sklearn; anything past this is a real mismatch
+TOLERANCE = 1e-9
+# below this many rows, plain dict lookups beat building a pandas hash table per column
+SMALL_BATCH = 256
+
+
+class UnsupportedModel(ValueError):
+    """The fitted model is not a shape this scorer can flatten."""
+
+
+def model_fingerprint(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _unwrap(pipeline):
+    if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+        raise UnsupportedModel("expected Pipeline(preprocessor, classifier)")
+    ct, clf = pipeline.steps[0][1], pipeline.steps[1][1]
+    if not isinstance(ct, ColumnTransformer) or not isinstance(clf, LogisticRegression):
+        raise UnsupportedModel("expected ColumnTransformer + LogisticRegression")
+    if clf.coef_.shape[0] != 1:
+        raise UnsupportedModel("only binary logistic regression is supported")
+    return ct, clf
+
+
+def _leaf(transformer, cls):
+    if isinstance(transformer, Pipeline):
+        if len(transformer.steps) != 1:
+            raise UnsupportedModel("column pipelines must hold a single step")
+        transformer = transformer.steps[0][1]
+    return transformer if isinstance(transformer, cls) else None
+
+
+def _compile_fold(pipeline):
+    """Return (bias, numeric weights dict, {column: {category: weight}}) for one fitted pipeline."""
+    ct, clf = _unwrap(pipeline)
+    coef = clf.coef_[0]
+    bias = float(clf.intercept_[0])
+    num_w, cat_w = {}, {}
+    offset = 0
+    for name, transformer, cols in ct.transformers_:
+        if name == "remainder":
+            if transformer != "drop":
+                raise UnsupportedModel("remainder columns are not supported")
+            continue
+        scaler = _leaf(transformer, StandardScaler)
+        encoder = _leaf(transformer, OneHotEncoder)
+        if scaler is not None:
+            mean = scaler.mean_ if scaler.with_mean else np.zeros(len(cols))
+            scale = scaler.scale_ if scaler.with_std else np.ones(len(cols))
+            w = coef[offset:offset + len(cols)] / scale
+            bias -= float(np.dot(w, mean))
+            num_w.update(zip(cols, w))
+            offset += len(cols)
+        elif encoder is not None:
+            if encoder.handle_unknown != "ignore" or encoder.drop is not None:
+                raise UnsupportedModel("OneHotEncoder must use handle_unknown='ignore' and no drop")
+            for col, cats in zip(cols, encoder.categories_):
+                cat_w[col] = dict(zip(cats.tolist(), coef[offset:offset + len(cats)]))
+                offset += len(cats)
+        else:
+            raise UnsupportedModel(f"unsupported transformer in column group {name!r}")
+    if offset != len(coef):
+        raise UnsupportedModel("coefficient count does not match the encoded width")
+    return bias, num_w, cat_w
+
+
+class LinearScorer:
+    """Flattened calibrated logistic regression. predict_proba matches the sklearn model."""
+
+    def __init__(self, numeric, categorical, categories, bias, num_weights, cat_tables, calibration):
+        self.numeric = list(numeric)
+        self.categorical = list(categorical)
+        self.categories = [np.asarray(c, dtype=object) for c in categories]
+        self.bias = np.asarray(bias, dtype=np.float64)                    # (folds,)
+        self.num_weights = np.asarray(num_weights, dtype=np.float64)      # (n_numeric, folds)
+        # (n_categories + 1, folds); the trailing zero row is what index -1 (unknown) picks
+        self.cat_tables = [np.asarray(t, dtype=np.float64) for t in cat_tables]
+        self.calibration = calibration                                    # per fold: ("sigmoid", a, b) | ("isotonic", x, y)
+        self._index = [pd.Index(c) for c in self.categories]
+        self._lookup = [{cat: i for i, cat in enumerate(c)} for c in self.categories]
+
+    @classmethod
+    def from_model(cls, model):
+        if not hasattr(model, "calibrated_classifiers_"):
+            raise UnsupportedModel("expected a fitted CalibratedClassifierCV")
+        if list(model.classes_) != [0, 1]:
+            raise UnsupportedModel("expected classes [0, 1]")
+        folds = model.calibrated_classifiers_
+        ct, _ = _unwrap(folds[0].estimator)
+        numeric, categorical = [], []
+        for name, transformer, cols in ct.transformers_:
+            if _leaf(transformer, StandardScaler) is not None:
+                numeric.extend(cols)
+            elif _leaf(transformer, OneHotEncoder) is not None:
+                categorical.extend(cols)
+        compiled = [_compile_fold(fold.estimator) for fold in folds]
+
+        all_categories = []
+        for col in categorical:
+            # folds may have seen different categories; take the union
+            seen = []
+            for _, _, cat_w in compiled:
+                seen.extend(c for c in cat_w[col] if c not in seen)
+            all_categories.append(seen)
+
+        bias = [b for b, _, _ in compiled]
+        num_weights = [[num_w[c] for _, num_w, _ in compiled] for c in numeric]
+        cat_tables = []
+        for col, cats in zip(categorical, all_categories):
+            table = np.zeros((len(cats) + 1, len(compiled)))
+            for k, (_, _, cat_w) in enumerate(compiled):
+                for i, cat in enumerate(cats):
+                    table[i, k] = cat_w[col].get(cat, 0.0)
+            cat_tables.append(table)
+
+        calibration = []
+        for fold in folds:
+            if len(fold.calibrators) != 1:
+                raise UnsupportedModel("expected one calibrator per fold")
+            cal = fold.calibrators[0]
+            if type(cal).__name__ == "_SigmoidCalibration":
+                # private sklearn class: P = expit(-(a_ * logit + b_)); check it still looks that way
+                if not (hasattr(cal, "a_") and hasattr(cal, "b_")):
+                    raise UnsupportedModel(
+                        "sklearn's _SigmoidCalibration no longer exposes a_ / b_; the linear scorer "
+                        "needs updating for this scikit-learn version (use CREDIT_SCORER=sklearn)")
+                calibration.append(("sigmoid", float(cal.a_), float(cal.b_)))
+            elif isinstance(cal, IsotonicRegression):
+                if cal.out_of_bounds != "clip":
+                    raise UnsupportedModel("isotonic calibration must clip out of bounds")
+                calibration.append(("isotonic", np.asarray(cal.X_thresholds_, dtype=np.float64),
+                                    np.asarray(cal.y_thresholds_, dtype=np.float64)))
+            else:
+                raise UnsupportedModel(f"unsupported calibrator {type(cal).__name__}")
+        return cls(numeric, categorical, all_categories, bias, num_weights, cat_tables, calibration)
+
+    # --- persistence ---
+    def save(self, path, fingerprint=None):
+        arrays = {"bias": self.bias, "num_weights": self.num_weights}
+        meta = {"numeric": self.numeric, "categorical": self.categorical, "fingerprint": fingerprint,
+                "calibration": []}
+        for i, (cats, table) in enumerate(zip(self.categories, self.cat_tables)):
+            if not all(isinstance(c, str) for c in cats):
+                raise UnsupportedModel("only string categories can be exported")
+            arrays[f"cat_{i}_values"] = np.asarray([str(c) for c in cats], dtype=str)
+            arrays[f"cat_{i}_table"] = table
+        for k, cal in enumerate(self.calibration):
+            if cal[0] == "sigmoid":
+                meta["calibration"].append(["sigmoid", cal[1], cal[2]])
+            else:
+                arrays[f"iso_{k}_x"], arrays[f"iso_{k}_y"] = cal[1], cal[2]
+                meta["calibration"].append(["isotonic"])
+        arrays["meta"] = np.asarray(json.dumps(meta))
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            categories = [data[f"cat_{i}_values"].tolist() for i in range(len(meta["categorical"]))]
+            tables = [data[f"cat_{i}_table"] for i in range(len(meta["categorical"]))]
+            calibration = []
+            for k, cal in enumerate(meta["calibration"]):
+                if cal[0] == "sigmoid":
+                    calibration.append(("sigmoid", cal[1], cal[2]))
+                else:
+                    calibration.append(("isotonic", data[f"iso_{k}_x"], data[f"iso_{k}_y"]))
+            scorer = cls(meta["numeric"], meta["categorical"], categories, data["bias"], data["num_weights"],
+                         tables, calibration)
+        scorer.fingerprint = meta.get("fingerprint")
+        return scorer
+
+    # --- scoring ---
+    def decision_function(self, X):
+        """Per-fold logits, shape (n, folds). X is a DataFrame with the schema columns."""
+        x_num = np.column_stack([X[c].to_numpy(dtype=np.float64) for c in self.numeric])
+        if np.isnan(x_num).any():
+            raise ValueError("Input X contains NaN.")
+        logits = x_num @ self.num_weights
+        logits += self.bias
+        small = len(X) <= SMALL_BATCH
+        for col, index, lookup, table in zip(self.categorical, self._index, self._lookup, self.cat_tables):
+            values = X[col].to_numpy(dtype=object)
+            # unseen values map to -1, which lands on the zero row
+            rows = [lookup.get(v, -1) for v in values] if small else index.get_indexer(values)
+            logits += table[rows]
+        return logits
+
+    def predict_proba(self, X):
+        logits = self.decision_function(X)
+        pos = np.empty_like(logits)
+        for k, cal in enumerate(self.calibration):
+            if cal[0] == "sigmoid":
+                pos[:, k] = expit(-(cal[1] * logits[:, k] + cal[2]))
+            else:
+                pos[:, k] = np.interp(logits[:, k], cal[1], cal[2])
+        p1 = pos.mean(axis=1)
+        return np.column_stack([1.0 - p1, p1])
+
+
+# --- Equivalence checks ---
+def equivalence_cases(model, n_random=2000, seed=0):
+    """Dataset rows, random category/number combinations, unknown and missing categories."""
+    df = pd.read_csv(DATA_PATH).drop(columns="credit_risk")
+    with open(FEATURES_PATH) as f:
+        columns = json.load(f)
+    df = df[columns]
+    scorer = LinearScorer.from_model(model)
+    rng = np.random.default_rng(seed)
+    rand = {}
+    for col in columns:
+        if col in scorer.numeric:
+            lo, hi = df[col].min(), df[col].max()
+            rand[col] = rng.uniform(lo - (hi - lo), hi + (hi - lo), n_random)
+        else:
+            values = np.asarray(list(df[col].unique()) + ["__unseen__", None], dtype=object)
+            rand[col] = values[rng.integers(0, len(values), n_random)]
+    cases = {"dataset": df, "random": pd.DataFrame(rand, columns=columns), "single_row": df.head(1)}
+    unknown = df.head(50).copy()
+    for col in scorer.categorical:
+        unknown[col] = "__unseen__"
+    cases["all_unknown"] = unknown
+    return cases
+
+
+def verify(model, scorer, tolerance=TOLERANCE, verbose=True):
+    """Compare scorer and sklearn on equivalence_cases; returns the largest abs difference."""
+    worst = 0.0
+    for name, X in equivalence_cases(model).items():
+        expected = model.predict_proba(X)
+        actual = scorer.predict_proba(X)
+        diff = float(np.max(np.abs(expected - actual)))
+        worst = max(worst, diff)
+        if verbose:
+            print(f"{name:12s} rows={len(X):6d}  max|diff|={diff:.2e}")
+    if verbose:
+        print("EQUIVALENT" if worst <= tolerance else "MISMATCH", f"(tolerance {tolerance:.0e})")
+    return worst
+
+
+def self_check(model, scorer, tolerance=TOLERANCE):
+    """Quick startup check on a handful of dataset rows."""
+    X = pd.read_csv(DATA_PATH, nrows=32).drop(columns="credit_risk")
+    return float(np.max(np.abs(model.predict_proba(X) - scorer.predict_proba(X)))) <= tolerance
+
+
+def load_scorer(model, mode="auto", model_path=MODEL_PATH, scorer_path=SCORER_PATH):
+    """Return (predict_proba callable, scorer name) for CREDIT_SCORER mode auto|linear|sklearn.
+    'linear' raises when the model cannot be flattened; 'auto' falls back to sklearn."""
+    if mode == "sklearn":
+        return model.predict_proba, "sklearn"
+    try:
+        scorer = None
+        if os.path.exists(scorer_path):
+            scorer = LinearScorer.load(scorer_path)
+            if scorer.fingerprint != model_fingerprint(model_path):
+                scorer = None  # exported from another model.joblib
+        if scorer is None:
+            scorer = LinearScorer.from_model(model)
+        if os.path.exists(DATA_PATH) and not self_check(model, scorer):
+            raise UnsupportedModel("linear scorer disagrees with the sklearn model")
+        return scorer.predict_proba, "linear"
+    except Exception as e:
+        if mode == "linear":
+            raise
+        logger.warning("Linear scorer unavailable (%s); scoring with sklearn.", e)
+        return model.predict_proba, "sklearn"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--out", default=SCORER_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model)
+    if args.command == "export":
+        scorer = LinearScorer.from_model(model)
+        scorer.save(args.out, fingerprint=model_fingerprint(args.model))
+        print(f"wrote {args.out} ({os.path.getsize(args.out) / 1024:.1f} KB)")
+    scorer = LinearScorer.load(args.out) if os.path.exists(args.out) else LinearScorer.from_model(model)
+    worst = verify(model, scorer, args.tolerance)
+
+    X = pd.read_csv(DATA_PATH, nrows=1).drop(columns="credit_risk")
+    for name, fn in (("sklearn", model.predict_proba), ("linear", scorer.predict_proba)):
+        start = time.perf_counter()
+        for _ in range(200):
+            fn(X)
+        print(f"single-row latency {name:8s} {(time.perf_counter() - start) / 200 * 1000:.3f} ms")
+    return 0 if worst <= args.tolerance else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Response encodings for /predict.
+
+    json     {"threshold": t, "predictions": [...], "probabilities": [...]}  (default)
+    compact  {"threshold": t, "probabilities": [...]}, rounded, no whitespace
+    ndjson   one {"prediction": y, "probability": p} line per row, streamed
+    float32  raw little-endian float32 probabilities, streamed; the threshold
+             and row count travel in X-Threshold / X-Rows headers
+
+The streaming formats are produced in blocks of STREAM_BLOCK_ROWS rows, so a
+large batch never exists as one serialised document in memory.
+"""
+import json
+
+import numpy as np
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+FORMATS = ("json", "compact", "ndjson", "float32")
+MEDIA_TYPES = {"application/x-ndjson": "ndjson", "application/octet-stream": "float32"}
+STREAM_BLOCK_ROWS = 4096
+COMPACT_DECIMALS = 6
+
+
+def choose_format(requested=None, accept=""):
+    """Explicit format wins; otherwise pick from the Accept header; default json."""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        return requested
+    for media_type, fmt in MEDIA_TYPES.items():
+        if media_type in (accept or ""):
+            return fmt
+    return "json"
+
+
+def _ndjson_blocks(probs, preds):
+    for start in range(0, len(probs), STREAM_BLOCK_ROWS):
+        p = probs[start:start + STREAM_BLOCK_ROWS].tolist()
+        y = preds[start:start + STREAM_BLOCK_ROWS].tolist()
+        yield "".join(f'{{"prediction":{yi},"probability":{pi!r}}}\n' for yi, pi in zip(y, p)).encode()
+
+
+def _float32_blocks(probs):
+    data = np.ascontiguousarray(probs, dtype="<f4")
+    view = memoryview(data).cast("B")
+    step = STREAM_BLOCK_ROWS * 4
+    for start in range(0, len(view), step):
+        yield bytes(view[start:start + step])
+
+
+def render(probs, threshold, fmt="json"):
+    """Build the response for probabilities of the positive class."""
+    probs = np.asarray(probs, dtype=np.float64)
+    headers = {"X-Threshold": repr(threshold), "X-Rows": str(len(probs))}
+    if fmt == "compact":
+        body = json.dumps({"threshold": threshold, "probabilities": probs.round(COMPACT_DECIMALS).tolist()},
+                          separators=(",", ":"))
+        return Response(body, media_type="application/json", headers=headers)
+    if fmt == "float32":
+        return StreamingResponse(_float32_blocks(probs), media_type="application/octet-stream", headers=headers)
+    preds = (probs >= threshold).astype(np.int8)
+    if fmt == "ndjson":
+        return StreamingResponse(_ndjson_blocks(probs, preds), media_type="application/x-ndjson", headers=headers)
+    return JSONResponse({"threshold": threshold, "predictions": preds.tolist(), "probabilities": probs.tolist()},
+                        headers=headers)
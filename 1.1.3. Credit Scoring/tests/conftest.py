@@ -0,0 +1,11 @@
+# tests/conftest.py
+# Make the app's modules (app, feature_schema, bulk_score, ...) and the shared serving_common package
+# importable when pytest runs from any directory.
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+if str(APP_DIR.parent) not in sys.path:
+    sys.path.append(str(APP_DIR.parent))
@@ -0,0 +1,77 @@
+# tests/test_bulk_endpoint.py
+import asyncio
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import app as credit
+from serving_common.executor import ExecutorSaturated, InferenceExecutor
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(credit.app)
+
+
+@pytest.fixture(scope="module")
+def portfolio():
+    return pd.read_csv(APP_DIR / "german_credit_data.csv").drop(columns="credit_risk")
+
+
+def post_csv(client, df, **params):
+    return client.post("/predict/bulk", params={"chunk_size": 100, **params},
+                       content=df.to_csv(index=False).encode(), headers={"content-type": "text/csv"})
+
+
+def test_streams_every_row(client, portfolio):
+    response = post_csv(client, portfolio)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "row,prediction,probability"
+    assert len(lines) == len(portfolio) + 1
+    assert not response.text.startswith("#") and "# error" not in response.text
+
+
+def test_bad_row_in_a_later_chunk_ends_with_an_error_trailer(client, portfolio):
+    broken = portfolio.copy()
+    broken.loc[250, "duration"] = None
+    response = post_csv(client, broken)
+    assert response.status_code == 200  # already streaming when the bad chunk is reached
+    lines = response.text.splitlines()
+    assert lines[-1].startswith("# error:") and "row 250" in lines[-1]
+    assert len(lines) == 1 + 200 + 1  # header, the two good chunks, the trailer
+
+
+def test_bad_first_chunk_is_a_400(client, portfolio):
+    broken = portfolio.copy()
+    broken.loc[3, "duration"] = None
+    response = post_csv(client, broken)
+    assert response.status_code == 400
+    assert "row 3" in response.json()["error"]
+
+
+def test_run_when_free_waits_for_a_slot_instead_of_failing():
+    executor = InferenceExecutor("thread", 1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(sum, [1, 2])
+        waiting = asyncio.ensure_future(executor.run_when_free(sum, [1, 2]))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        release.set()
+        assert await busy is True
+        return await asyncio.wait_for(waiting, 2)
+
+    try:
+        assert asyncio.run(scenario()) == 3
+    finally:
+        executor.shutdown()
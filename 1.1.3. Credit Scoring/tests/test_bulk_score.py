@@ -0,0 +1,54 @@
+# tests/test_bulk_score.py
+import io
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import pytest
+
+from bulk_score import score_file
+from feature_schema import FeatureSchema, SchemaError
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load(APP_DIR / "model.joblib")
+
+
+@pytest.fixture(scope="module")
+def schema(model):
+    return FeatureSchema.from_files(APP_DIR / "feature_columns.json", model)
+
+
+@pytest.fixture(scope="module")
+def portfolio():
+    return pd.read_csv(APP_DIR / "german_credit_data.csv").drop(columns="credit_risk")
+
+
+def as_csv(df):
+    return io.BytesIO(df.to_csv(index=False).encode())
+
+
+def test_scores_every_row_across_chunks(tmp_path, model, schema, portfolio):
+    out = tmp_path / "scores.csv"
+    rows = score_file(as_csv(portfolio), out, schema, model.predict_proba, chunk_size=100, in_format="csv")
+    scores = pd.read_csv(out)
+    assert rows == len(portfolio) == len(scores)
+    assert scores["row"].tolist() == list(range(len(portfolio)))
+
+
+def test_missing_value_error_names_the_input_row_not_the_chunk_row(tmp_path, model, schema, portfolio):
+    broken = portfolio.copy()
+    broken.loc[537, "amount"] = None
+    with pytest.raises(SchemaError, match=r"'amount'.* row 537\b"):
+        score_file(as_csv(broken), tmp_path / "scores.csv", schema, model.predict_proba,
+                   chunk_size=100, in_format="csv")
+
+
+def test_from_frame_offsets_row_numbers(schema, portfolio):
+    chunk = portfolio.iloc[200:300].reset_index(drop=True)
+    chunk.loc[5, "age"] = None
+    with pytest.raises(SchemaError, match=r"row 205\b"):
+        schema.from_frame(chunk, start_row=200)
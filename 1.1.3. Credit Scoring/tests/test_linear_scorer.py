@@ -0,0 +1,42 @@
+# tests/test_linear_scorer.py
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+from linear_scorer import TOLERANCE, LinearScorer, UnsupportedModel, equivalence_cases
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load(APP_DIR / "model.joblib")
+
+
+@pytest.fixture(scope="module")
+def scorer(model):
+    return LinearScorer.from_model(model)
+
+
+@pytest.mark.parametrize("case", ["dataset", "random", "single_row", "all_unknown"])
+def test_matches_calibrated_classifier(model, scorer, case):
+    X = equivalence_cases(model)[case]
+    np.testing.assert_allclose(scorer.predict_proba(X), model.predict_proba(X), rtol=0, atol=TOLERANCE)
+
+
+def test_exported_artifact_matches(model, scorer, tmp_path):
+    path = tmp_path / "scorer.npz"
+    scorer.save(path)
+    X = equivalence_cases(model)["random"]
+    np.testing.assert_allclose(LinearScorer.load(path).predict_proba(X), model.predict_proba(X),
+                               rtol=0, atol=TOLERANCE)
+
+
+def test_sigmoid_calibrator_without_private_attributes_is_rejected(model, monkeypatch):
+    calibrator = model.calibrated_classifiers_[0].calibrators[0]
+    assert type(calibrator).__name__ == "_SigmoidCalibration"
+    monkeypatch.delattr(calibrator, "a_")
+    with pytest.raises(UnsupportedModel, match="a_ / b_"):
+        LinearScorer.from_model(model)
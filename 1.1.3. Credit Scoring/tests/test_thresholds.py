@@ -0,0 +1,94 @@
+# tests/test_thresholds.py
+import json
+import logging
+import os
+
+import pytest
+
+from thresholds import ThresholdError, ThresholdPolicy
+
+
+def write_policy(path, content, bump=0):
+    path.write_text(content if isinstance(content, str) else json.dumps(content))
+    # distinct mtimes even on coarse-grained filesystems
+    stamp = 1_700_000_000 + bump
+    os.utime(path, (stamp, stamp))
+
+
+@pytest.fixture
+def policy_file(tmp_path):
+    path = tmp_path / "thresholds.json"
+    write_policy(path, {"default": 0.4, "tenants": {"acme-bank": 0.35, "retail": 0.6}})
+    return path
+
+
+def test_request_beats_tenant_beats_default(policy_file):
+    policy = ThresholdPolicy(policy_file, default=0.5)
+    assert policy.resolve(0.9, "acme-bank") == 0.9
+    assert policy.resolve(None, "acme-bank") == 0.35
+    assert policy.resolve(None, "someone-else") == 0.4   # file default
+    assert policy.resolve() == 0.4
+
+
+def test_configured_default_without_a_file(tmp_path):
+    policy = ThresholdPolicy(tmp_path / "missing.json", default=0.55)
+    assert policy.resolve(None, "acme-bank") == 0.55
+    assert policy.describe() == {"default": 0.55, "tenants": {}}
+
+
+def test_invalid_request_threshold_is_a_client_error(policy_file):
+    policy = ThresholdPolicy(policy_file)
+    for bad in ("abc", 1.5, -0.1):
+        with pytest.raises(ThresholdError):
+            policy.resolve(bad, "acme-bank")
+
+
+def test_strict_tenants_rejects_unknown_tenant(policy_file):
+    policy = ThresholdPolicy(policy_file, strict_tenants=True)
+    assert policy.resolve(None, "retail") == 0.6
+    with pytest.raises(ThresholdError, match="unknown tenant"):
+        policy.resolve(None, "someone-else")
+    assert policy.resolve(None, None) == 0.4  # no header: default, even when strict
+
+
+def test_file_changes_are_picked_up(policy_file):
+    policy = ThresholdPolicy(policy_file)
+    assert policy.resolve(None, "new-tenant") == 0.4
+    write_policy(policy_file, {"tenants": {"new-tenant": 0.2}}, bump=1)
+    assert policy.resolve(None, "new-tenant") == 0.2
+    assert policy.resolve(None, "acme-bank") == 0.5
+
+
+@pytest.mark.parametrize("broken", ["{not json", '{"tenants": {"acme-bank": 2}}', "[0.3]"])
+def test_malformed_file_keeps_the_last_good_policy(policy_file, caplog, broken):
+    policy = ThresholdPolicy(policy_file)
+    assert policy.resolve(None, "acme-bank") == 0.35
+    write_policy(policy_file, broken, bump=1)
+    with caplog.at_level(logging.ERROR, logger="thresholds"):
+        assert policy.resolve(None, "acme-bank") == 0.35
+        assert policy.resolve(None, "retail") == 0.6
+    assert len(caplog.records) == 1  # reported once, not per request
+
+
+def test_malformed_file_at_startup_falls_back_to_configured_default(tmp_path):
+    path = tmp_path / "thresholds.json"
+    write_policy(path, "{not json")
+    assert ThresholdPolicy(path, default=0.45).resolve(None, "acme-bank") == 0.45
+
+
+def test_predict_endpoint_applies_the_resolved_threshold(policy_file, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app as credit
+
+    monkeypatch.setattr(credit, "thresholds", ThresholdPolicy(policy_file, strict_tenants=True))
+    client = TestClient(credit.app)
+    row = {"status": "no checking account", "duration": 12, "amount": 2000, "installment_rate": 2,
+           "present_residence": 2, "age": 35, "number_credits": 1, "people_liable": 1}
+    payload = {"data": [row]}
+
+    assert client.post("/predict", json=payload, headers={"X-Tenant": "retail"}).headers["X-Threshold"] == "0.6"
+    assert client.post("/predict?threshold=0.1", json=payload,
+                       headers={"X-Tenant": "retail"}).headers["X-Threshold"] == "0.1"
+    assert client.post("/predict", json=payload).headers["X-Threshold"] == "0.4"
+    assert client.post("/predict", json=payload, headers={"X-Tenant": "nobody"}).status_code == 400
@@ -0,0 +1,88 @@
+"""Decision thresholds for the Credit Scoring API.
+
+The cut-off that turns a probability into a 0/1 prediction is resolved per
+request, in this order:
+    1. "threshold" in the request (JSON body or query string)
+    2. the tenant's threshold, from the X-Tenant header and thresholds.json
+    3. the configured default (CREDIT_DEFAULT_THRESHOLD, else 0.5)
+
+thresholds.json is optional and looks like:
+    {"default": 0.5, "tenants": {"acme-bank": 0.35, "retail": 0.6}}
+It is re-read when its mtime changes, so tenants can be added without a restart.
+A file that fails to parse or validate is a server configuration fault, not a
+bad request: the error is logged and the last good policy stays in force
+(the configured default alone if none has loaded yet).
+"""
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ThresholdError(ValueError):
+    """Invalid threshold or unknown tenant; maps to HTTP 400."""
+
+
+def validate_threshold(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ThresholdError("threshold must be a number")
+    if not 0.0 <= value <= 1.0:
+        raise ThresholdError("threshold must be between 0 and 1")
+    return value
+
+
+class ThresholdPolicy:
+    def __init__(self, path=None, default=0.5, strict_tenants=False):
+        self.path = path
+        self.default = validate_threshold(default)
+        self.strict_tenants = strict_tenants
+        self._tenants = {}
+        self._file_default = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._tenants, self._file_default, self._mtime = {}, None, None
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            # remember the mtime either way, so a broken file is reported once, not per request
+            self._mtime = mtime
+            try:
+                with open(self.path) as f:
+                    config = json.load(f)
+                tenants = {str(k): validate_threshold(v) for k, v in config.get("tenants", {}).items()}
+                file_default = validate_threshold(config["default"]) if "default" in config else None
+            except (OSError, ValueError, AttributeError) as e:
+                logger.error("Ignoring invalid thresholds file %s (%s); keeping the previous policy.", self.path, e)
+                return
+            self._tenants, self._file_default = tenants, file_default
+
+    def resolve(self, requested=None, tenant=None):
+        """Return the threshold for a request; raises ThresholdError on bad input."""
+        if requested is not None:
+            return validate_threshold(requested)
+        self._refresh()
+        if tenant:
+            if tenant in self._tenants:
+                return self._tenants[tenant]
+            if self.strict_tenants:
+                raise ThresholdError(f"unknown tenant {tenant!r}")
+        return self._file_default if self._file_default is not None else self.default
+
+    def describe(self):
+        self._refresh()
+        return {"default": self._file_default if self._file_default is not None else self.default,
+                "tenants": dict(self._tenants)}
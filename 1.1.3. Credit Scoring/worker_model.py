@@ -0,0 +1,25 @@
+"""Process-pool worker side of the Credit Scoring inference executor.
+
+With CREDIT_EXECUTOR=process every worker loads its own copy of the model in
+load_worker_model (the pool initializer) and scores through
+worker_predict_proba; the executor itself is serving_common.executor.
+"""
+import joblib
+
+
+# --- Process-pool workers: each loads its own copy of the model ---
+_WORKER_MODEL = None
+_WORKER_PREDICT = None
+
+
+def load_worker_model(model_path, scorer_mode="sklearn"):
+    global _WORKER_MODEL, _WORKER_PREDICT
+    _WORKER_MODEL = joblib.load(model_path)
+    _WORKER_PREDICT = _WORKER_MODEL.predict_proba
+    if scorer_mode != "sklearn":
+        from linear_scorer import load_scorer
+        _WORKER_PREDICT, _ = load_scorer(_WORKER_MODEL, scorer_mode, model_path)
+
+
+def worker_predict_proba(X):
+    return _WORKER_PREDICT(X)
@@ -1,45 +1,258 @@
 """
 FastAPI web service for Land Use Classification.
 - Serves pages (index, prediction, datasets, notebooks, about, contact, tutorial)
-- Serves embedded exported notebook HTML (renders inline, not just download)
-- Loads model at startup (supports .joblib)
+- Serves embedded exported notebook HTML (renders inline, not just download); the
+  rendered page is cached in memory with gzip/brotli variants, ETags, 304s and ranges
+- Loads model in the background at startup (supports .joblib), warms it up with
+  synthetic batches, and reports "warming" on /health until it is ready
 - Exposes programmatic /api/predict and UI upload /predict
+- Groups concurrent predictions into micro-batches (one forward pass per batch)
+- Exposes /api/predict/batch for many files or a zip/tar archive of tiles
+- Runs every model call on a bounded inference executor (503 when saturated, stats on /metrics)
+- Caches predictions by content hash + model version (LRU, size and TTL bounded)
+- Streams uploads in chunks with a size limit; stores them under content-addressed names
 - Designed for local testing with: uvicorn app:app --reload
 """
 
-from fastapi import FastAPI, Request, File, UploadFile
-from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, Request, File, UploadFile, Form
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
+from typing import List
+import asyncio
+import time
+import numpy as np
 import uvicorn
 import os
+import sys
 import traceback
 
-from utils.prediction_helper import load_model_for_inference, predict_from_image_bytes
+# serving_common/ (shared inference executor, asset cache) lives at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.prediction_helper import (load_model_for_inference, run_model, postprocess_batch,
+                                     init_worker_model, run_worker_model, warm_up_model, INPUT_SHAPE)
+from utils.preprocessing import preprocess_image_bytes
+from utils.batching import MicroBatcher
+from serving_common.assets import AssetCache, build_response
+from serving_common.executor import InferenceExecutor, ExecutorSaturated
+from utils.cache import PredictionCache
+from utils.batch_io import iter_batch_items, decode_stream, ArchiveTooLarge
+from utils.uploads import ingest_upload, persist_upload, RequestSizeLimit, UploadTooLarge
 
 BASE_DIR = Path(__file__).parent.resolve()
 MODELS_DIR = BASE_DIR / "models"
 NOTEBOOKS_DIR = BASE_DIR / "notebooks"
+NOTEBOOK_PATH = NOTEBOOKS_DIR / "2_6_1_Land_use_classification.html"
+TEMPLATES_DIR = BASE_DIR / "templates"
 UPLOAD_DIR = BASE_DIR / "static" / "uploads"
 
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# Micro-batching: max rows per forward pass and max time a request waits for company
+BATCH_MAX_SIZE = int(os.environ.get("LANDUSE_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("LANDUSE_BATCH_MAX_WAIT_MS", "5"))
+
+# /api/predict/batch: max images per request and parallel decode threads
+BATCH_MAX_FILES = int(os.environ.get("LANDUSE_BATCH_MAX_FILES", "10000"))
+DECODE_WORKERS = int(os.environ.get("LANDUSE_DECODE_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Upload limits: per image on /predict and /api/predict, per request on /api/predict/batch
+MAX_UPLOAD_BYTES = int(float(os.environ.get("LANDUSE_MAX_UPLOAD_MB", "10")) * 1024 * 1024)
+MAX_BATCH_UPLOAD_BYTES = int(float(os.environ.get("LANDUSE_MAX_BATCH_UPLOAD_MB", "512")) * 1024 * 1024)
+UPLOAD_LIMITS = {"/predict": MAX_UPLOAD_BYTES, "/api/predict": MAX_UPLOAD_BYTES,
+                 "/api/predict/batch": MAX_BATCH_UPLOAD_BYTES}
+MULTIPART_OVERHEAD = 64 * 1024  # boundaries + part headers on top of the file itself
+# Archives on /api/predict/batch: decompressed size caps per member and per request
+ARCHIVE_MAX_MEMBER_BYTES = int(float(os.environ.get("LANDUSE_ARCHIVE_MAX_MEMBER_MB", "10")) * 1024 * 1024)
+ARCHIVE_MAX_TOTAL_BYTES = int(float(os.environ.get("LANDUSE_ARCHIVE_MAX_TOTAL_MB", "1024")) * 1024 * 1024)
+
+# Inference executor: "thread" or "process" pool, its size, and max admitted calls before 503
+EXECUTOR_KIND = os.environ.get("LANDUSE_EXECUTOR", "thread")
+EXECUTOR_WORKERS = int(os.environ.get("LANDUSE_EXECUTOR_WORKERS", "1"))
+EXECUTOR_MAX_QUEUE = int(os.environ.get("LANDUSE_EXECUTOR_MAX_QUEUE", "64"))
+# /api/predict/batch: max BATCH_MAX_SIZE-row requests one call keeps queued on the batcher
+BATCH_WINDOW = max(EXECUTOR_WORKERS + 1, 2)
+
+# Prediction cache (0 entries disables it; TTL 0 keeps entries until evicted)
+CACHE_MAX_ENTRIES = int(os.environ.get("LANDUSE_CACHE_MAX_ENTRIES", "4096"))
+CACHE_MAX_MB = float(os.environ.get("LANDUSE_CACHE_MAX_MB", "16"))
+CACHE_TTL_SECONDS = float(os.environ.get("LANDUSE_CACHE_TTL_SECONDS", "3600"))
+
+# Warm-up: synthetic batch sizes run through the model before /health reports ready
+WARMUP_BATCH_SIZES = tuple(sorted({int(n) for n in os.environ.get(
+    "LANDUSE_WARMUP_BATCH_SIZES", f"1,{BATCH_MAX_SIZE}").split(",") if n.strip()}))
+
 app = FastAPI(title="LandUseLab - Land Use Classification")
+# 413 for bodies over the route limit, counted while they stream in (see UPLOAD_LIMITS)
+app.add_middleware(RequestSizeLimit, limits=UPLOAD_LIMITS, overhead=MULTIPART_OVERHEAD)
 
 # Mount static + templates
 app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+
+# Model is loaded in the background on startup (see load_and_warm_up)
+MODEL = None
+CLASS_NAMES = []
+MODEL_META = {}
+MODEL_STATUS = "warming"  # warming -> ready | error
+
+
+class ModelNotReady(RuntimeError):
+    """Raised while the model is still loading / warming up; maps to HTTP 503."""
+
+
+def forward(arr):
+    return run_model(MODEL, arr)
+
+
+if EXECUTOR_KIND == "process":
+    # each worker process loads its own copy of the model
+    INFERENCE = InferenceExecutor("process", EXECUTOR_WORKERS, EXECUTOR_MAX_QUEUE,
+                                  initializer=init_worker_model, initargs=(str(MODELS_DIR), WARMUP_BATCH_SIZES))
+    FORWARD_FN = run_worker_model
+else:
+    INFERENCE = InferenceExecutor("thread", EXECUTOR_WORKERS, EXECUTOR_MAX_QUEUE)
+    FORWARD_FN = forward
+
+PREDICTION_CACHE = PredictionCache(CACHE_MAX_ENTRIES, int(CACHE_MAX_MB * 1024 * 1024), CACHE_TTL_SECONDS)
+IN_FLIGHT = {}  # cache key -> task classifying those bytes right now (shared by identical uploads)
+
+BATCHER = MicroBatcher(FORWARD_FN, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+                       executor=INFERENCE, max_queue=EXECUTOR_MAX_QUEUE)
+
+
+async def load_and_warm_up():
+    """
+    Load the model off the event loop, then push synthetic batches through the
+    same executor path real requests use so tracing cost is paid up front.
+    """
+    global MODEL, CLASS_NAMES, MODEL_META, MODEL_STATUS
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        MODEL, CLASS_NAMES, MODEL_META = await loop.run_in_executor(None, load_model_for_inference, str(MODELS_DIR))
+        MODEL_META["load_seconds"] = round(time.perf_counter() - start, 3)
+
+        warm_start = time.perf_counter()
+        if EXECUTOR_KIND == "process":
+            # workers warm up in their initializer; touch each one so they all start now
+            for _ in range(EXECUTOR_WORKERS):
+                await INFERENCE.run(FORWARD_FN, np.zeros((1,) + INPUT_SHAPE, dtype="float32"))
+        else:
+            MODEL_META["warmup"] = await INFERENCE.run(warm_up_model, MODEL, WARMUP_BATCH_SIZES)
+        MODEL_META["warmup_seconds"] = round(time.perf_counter() - warm_start, 3)
+        MODEL_STATUS = "ready"
+    except Exception as e:
+        MODEL = None
+        CLASS_NAMES = []
+        MODEL_META = {"error": str(e)}
+        MODEL_STATUS = "error"
+        print("Model load error:", e)
+        traceback.print_exc()
+
+
+@app.on_event("startup")
+async def start_batcher():
+    await BATCHER.start()
+    app.state.model_loader = asyncio.create_task(load_and_warm_up())
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await BATCHER.stop()
+    INFERENCE.shutdown(wait=False)
+
+
+def output_activation():
+    # known from the loaded artifact; the EuroSAT CNN ends in softmax
+    return MODEL_META.get("output_activation", "softmax") if isinstance(MODEL_META, dict) else "softmax"
+
+
+def ensure_model_ready():
+    if MODEL_STATUS == "warming":
+        raise ModelNotReady("Model is warming up.")
+    if MODEL is None:
+        raise RuntimeError("Model is not loaded.")
+
+
+def busy_response(message: str = "Server busy, retry shortly."):
+    return JSONResponse({"error": message}, status_code=503, headers={"Retry-After": "1"})
+
+
+async def predict_rows(arr: np.ndarray) -> np.ndarray:
+    """
+    Forward a large (N,64,64,3) batch through the shared micro-batcher in
+    BATCH_MAX_SIZE-row requests, so it obeys the batch size limit and shares
+    forward passes with other traffic. At most BATCH_WINDOW of this call's
+    requests are queued at once, keeping it within the batcher's max_queue.
+    """
+    window = asyncio.Semaphore(BATCH_WINDOW)
+
+    async def submit(chunk):
+        async with window:
+            return await BATCHER.submit(chunk)
+
+    tasks = [asyncio.ensure_future(submit(arr[i:i + BATCH_MAX_SIZE])) for i in range(0, len(arr), BATCH_MAX_SIZE)]
+    try:
+        return np.concatenate(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
 
-# Load model at startup
-try:
-    MODEL, CLASS_NAMES, MODEL_META = load_model_for_inference(models_dir=str(MODELS_DIR))
-except Exception as e:
-    MODEL = None
-    CLASS_NAMES = []
-    MODEL_META = {"error": str(e)}
-    print("Model load error:", e)
-    traceback.print_exc()
+async def classify_upload(upload, cache_key):
+    """Decode one upload, run it through the micro-batcher and cache the (label, score) result."""
+    # PIL reads the spooled upload directly; no full-size bytes copy
+    arr = await asyncio.get_running_loop().run_in_executor(None, preprocess_image_bytes, upload.file)
+    preds = await BATCHER.submit(arr)
+    top = postprocess_batch(preds, CLASS_NAMES, 1, output_activation())
+    result = (str(top["labels"][0, 0]), float(top["scores"][0, 0]))
+    PREDICTION_CACHE.put(cache_key, result)
+    return result
+
+
+def _forget_in_flight(cache_key, task):
+    if IN_FLIGHT.get(cache_key) is task:
+        del IN_FLIGHT[cache_key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved when nobody is waiting any more
+
+
+async def predict_image(upload):
+    """
+    Preprocess one ingested upload and run it through the shared micro-batcher.
+    Returns (label, score) exactly like predict_from_image_bytes.
+    Identical uploads are answered from the prediction cache without decoding.
+
+    Concurrent identical uploads share one classification, run as its own task:
+    a waiter that goes away (client disconnect) never cancels it for the others,
+    and if the shared run fails or is cancelled a follower classifies its own copy.
+    """
+    ensure_model_ready()
+    cache_key = PredictionCache.key_for_digest(upload.digest, MODEL_META.get("version", "unversioned"))
+    cached = PREDICTION_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    if not PREDICTION_CACHE.enabled:
+        return await classify_upload(upload, cache_key)
+
+    shared = IN_FLIGHT.get(cache_key)
+    if shared is None:
+        shared = asyncio.ensure_future(classify_upload(upload, cache_key))
+        IN_FLIGHT[cache_key] = shared
+        shared.add_done_callback(lambda task: _forget_in_flight(cache_key, task))
+        # wait() never cancels the task, so a disconnect here leaves it running for followers
+        await asyncio.wait({shared})
+        return shared.result()
+
+    await asyncio.wait({shared})
+    if not shared.cancelled() and shared.exception() is None:
+        return shared.result()
+    # the shared run failed (e.g. the leader's upload went away); don't inherit its error
+    return await classify_upload(upload, cache_key)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -58,20 +271,30 @@ async def predict(request: Request, file: UploadFile = File(...)):
     UI-driven prediction. Accepts file upload and returns template with result.
     """
     try:
-        contents = await file.read()
-        pred_class, pred_score = predict_from_image_bytes(contents, MODEL, CLASS_NAMES)
+        upload = await ingest_upload(file, MAX_UPLOAD_BYTES)
+        pred_class, pred_score = await predict_image(upload)
 
-        # save uploaded file for display
-        save_path = UPLOAD_DIR / file.filename
-        with open(save_path, "wb") as f:
-            f.write(contents)
+        # save uploaded file for display (content-addressed, written off the event loop)
+        saved = await asyncio.get_running_loop().run_in_executor(None, persist_upload, upload, UPLOAD_DIR)
 
         result = {
             "class": pred_class,
             "score": float(pred_score),
-            "filename": f"/static/uploads/{file.filename}"
+            "filename": f"/static/uploads/{saved.name}"
         }
         return templates.TemplateResponse("prediction.html", {"request": request, "result": result, "error": None})
+    except (ExecutorSaturated, ModelNotReady) as e:
+        return templates.TemplateResponse(
+            "prediction.html",
+            {"request": request, "result": None, "error": f"{str(e)} Please retry shortly."},
+            status_code=503,
+        )
+    except UploadTooLarge as e:
+        return templates.TemplateResponse(
+            "prediction.html",
+            {"request": request, "result": None, "error": str(e)},
+            status_code=413,
+        )
     except Exception as e:
         tb = traceback.format_exc()
         return templates.TemplateResponse(
@@ -86,29 +309,88 @@ async def api_predict(file: UploadFile = File(...)):
     Programmatic JSON endpoint for inference.
     """
     try:
-        contents = await file.read()
-        pred_class, pred_score = predict_from_image_bytes(contents, MODEL, CLASS_NAMES)
+        upload = await ingest_upload(file, MAX_UPLOAD_BYTES)
+        pred_class, pred_score = await predict_image(upload)
         return {"predicted_class": pred_class, "score": float(pred_score)}
+    except (ExecutorSaturated, ModelNotReady) as e:
+        return busy_response(f"{e} Retry shortly.")
+    except UploadTooLarge as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
+@app.post("/api/predict/batch")
+async def api_predict_batch(files: List[UploadFile] = File(...), top_k: int = Form(3)):
+    """
+    Batch JSON endpoint: accepts many image files and/or zip/tar archives of tiles.
+    Archives are expanded member by member under decompressed size caps, images
+    are decoded in parallel chunks, stacked into one (N,64,64,3) array and
+    classified through the shared micro-batcher, BATCH_MAX_SIZE rows at a time.
+    """
+    try:
+        ensure_model_ready()
+        loop = asyncio.get_running_loop()
+        total = sum(upload.size or 0 for upload in files)
+        if total > MAX_BATCH_UPLOAD_BYTES:
+            raise UploadTooLarge(f"Upload exceeds the {MAX_BATCH_UPLOAD_BYTES // (1024 * 1024)} MB limit.")
+        # uploads stay spooled; archives are read member by member while decoding
+        items = iter_batch_items([(upload.filename, upload.file) for upload in files], BATCH_MAX_FILES,
+                                 ARCHIVE_MAX_MEMBER_BYTES, ARCHIVE_MAX_TOTAL_BYTES)
+        arr, names, errors = await loop.run_in_executor(None, decode_stream, items, DECODE_WORKERS)
+        if not names and not errors:
+            raise ValueError("No images found in upload.")
+        preds = await predict_rows(arr) if len(names) else []
+        top = postprocess_batch(preds, CLASS_NAMES, top_k, output_activation()) if len(names) else None
+
+        results = []
+        if top is not None:
+            for name, labels, scores in zip(names, top["labels"].tolist(), top["scores"].tolist()):
+                results.append({
+                    "filename": name,
+                    "predicted_class": labels[0],
+                    "score": scores[0],
+                    "top_k": [{"class": label, "score": score} for label, score in zip(labels, scores)],
+                })
+        return {"count": len(results), "results": results, "errors": errors}
+    except (ExecutorSaturated, ModelNotReady) as e:
+        return busy_response(f"{e} Retry shortly.")
+    except (UploadTooLarge, ArchiveTooLarge) as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=400)
 
 
 # --- Embedded Notebook Routes ---
+ASSETS = AssetCache()
+
+
+def render_notebook_page() -> bytes:
+    notebook_html = NOTEBOOK_PATH.read_text(encoding="utf-8")
+    return templates.get_template("notebooks.html").render(notebook_html=notebook_html).encode("utf-8")
+
+
+def asset_response(request: Request, asset, extra_headers=None) -> Response:
+    status, headers, body = build_response(asset, request.headers, extra_headers=extra_headers)
+    return Response(content=body, status_code=status, headers=headers)
+
+
 @app.get("/notebooks", response_class=HTMLResponse)
 async def notebooks(request: Request):
     """
     Renders the exported Jupyter notebook directly inside the web UI.
+    The rendered page is rebuilt only when the notebook or its templates change.
     """
-    nb_path = NOTEBOOKS_DIR / "2_6_1_Land_use_classification.html"
-    notebook_html = ""
-    if nb_path.exists():
-        try:
-            with open(nb_path, "r", encoding="utf-8") as f:
-                notebook_html = f.read()
-        except Exception as e:
-            notebook_html = f"<p>Error reading notebook: {str(e)}</p>"
-    else:
+    deps = [NOTEBOOK_PATH, TEMPLATES_DIR / "notebooks.html", TEMPLATES_DIR / "base.html"]
+    try:
+        asset = await asyncio.get_running_loop().run_in_executor(
+            None, ASSETS.get, "notebooks_page", deps, render_notebook_page)
+    except FileNotFoundError:
         notebook_html = "<p>Notebook file not found.</p>"
+    except Exception as e:
+        notebook_html = f"<p>Error reading notebook: {str(e)}</p>"
+    else:
+        return asset_response(request, asset)
 
     return templates.TemplateResponse(
         "notebooks.html",
@@ -117,11 +399,14 @@ async def notebooks(request: Request):
 
 
 @app.get("/notebooks/exported")
-def exported_notebook():
-    nb_path = NOTEBOOKS_DIR / "2_6_1_Land_use_classification.html"
-    if nb_path.exists():
-        return FileResponse(nb_path, media_type="text/html", filename=nb_path.name)
-    return RedirectResponse("/notebooks")
+async def exported_notebook(request: Request):
+    try:
+        asset = await asyncio.get_running_loop().run_in_executor(
+            None, ASSETS.get, "notebook_export", [NOTEBOOK_PATH])
+    except FileNotFoundError:
+        return RedirectResponse("/notebooks")
+    return asset_response(request, asset,
+                          {"Content-Disposition": f'attachment; filename="{NOTEBOOK_PATH.name}"'})
 
 
 @app.get("/datasets", response_class=HTMLResponse)
@@ -157,9 +442,21 @@ async def contact(request: Request):
 
 @app.get("/health")
 def health():
-    ok = True
     model_loaded = MODEL is not None
-    return {"status": "ok" if ok else "error", "model_loaded": model_loaded}
+    if MODEL_STATUS == "warming":
+        # not ready for traffic yet: load balancers should hold off
+        return JSONResponse({"status": "warming", "model_loaded": model_loaded}, status_code=503)
+    return {"status": "ok" if MODEL_STATUS == "ready" else "error", "model_loaded": model_loaded,
+            "load_seconds": MODEL_META.get("load_seconds"), "warmup_seconds": MODEL_META.get("warmup_seconds")}
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Queue-depth and throughput counters for the inference path.
+    """
+    return {"executor": INFERENCE.stats(), "batcher": BATCHER.stats(), "cache": PREDICTION_CACHE.stats(),
+            "assets": ASSETS.stats()}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""
+Export the EuroSAT CNN to a lightweight inference format and check parity.
+- numpy:  models/eurosat_cnn_model.npz  (no extra runtime; see utils/backends.py)
+- onnx:   models/eurosat_cnn_model.onnx (needs tf2onnx to export, onnxruntime to serve)
+- tflite: models/eurosat_cnn_model.tflite (needs tensorflow to export, tflite_runtime or tf to serve)
+After exporting, the artifact is reloaded through the backend registry and compared
+against the Keras model on random tiles plus any images in static/uploads.
+
+Usage:
+    python export_model.py --format numpy
+    python export_model.py --format onnx --tolerance 1e-4
+    python export_model.py --format numpy --verify-only
+"""
+
+import argparse
+import glob
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils.backends import ARTIFACT_STEM, BACKENDS, export_numpy_model, load_exported_model
+from utils.prediction_helper import load_model_for_inference, run_model, get_output_activation, INPUT_SHAPE
+from utils.preprocessing import preprocess_image_bytes
+
+BASE_DIR = Path(__file__).parent.resolve()
+MODELS_DIR = BASE_DIR / "models"
+UPLOAD_DIR = BASE_DIR / "static" / "uploads"
+
+# float32 reorderings in BLAS / ORT stay well under this; TFLite may fuse ops more aggressively
+DEFAULT_TOLERANCE = {"numpy": 1e-4, "onnx": 1e-4, "tflite": 1e-3}
+
+
+def export(keras_model, fmt: str, out_path: Path, class_names):
+    meta = {"output_activation": get_output_activation(keras_model), "class_names": list(class_names)}
+    if fmt == "numpy":
+        export_numpy_model(keras_model, out_path, class_names)
+        return
+    if fmt == "onnx":
+        import tensorflow as tf
+        import tf2onnx
+        spec = (tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name="input"),)
+        tf2onnx.convert.from_keras(keras_model, input_signature=spec, opset=13, output_path=str(out_path))
+    elif fmt == "tflite":
+        import tensorflow as tf
+        converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+        out_path.write_bytes(converter.convert())
+    else:
+        raise ValueError(f"Unknown format {fmt!r}")
+    # ONNX / TFLite have nowhere to keep these, so they go next to the artifact
+    Path(str(out_path) + ".json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
+def parity_inputs(n_random: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    batches = [rng.random((n_random,) + INPUT_SHAPE, dtype=np.float32)]
+    for path in sorted(glob.glob(str(UPLOAD_DIR / "*"))):
+        try:
+            batches.append(preprocess_image_bytes(Path(path).read_bytes()))
+        except Exception:
+            continue
+    return np.concatenate(batches, axis=0)
+
+
+def verify(keras_model, exported, inputs: np.ndarray, tolerance: float) -> bool:
+    start = time.perf_counter()
+    expected = np.asarray(run_model(keras_model, inputs), dtype=np.float32)
+    keras_s = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = np.asarray(run_model(exported, inputs), dtype=np.float32)
+    exported_s = time.perf_counter() - start
+
+    max_diff = float(np.max(np.abs(expected - actual)))
+    top1 = float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1)))
+    print(f"parity on {len(inputs)} inputs: max |diff| = {max_diff:.2e} (tolerance {tolerance:.0e}), "
+          f"top-1 agreement = {top1:.2%}")
+    print(f"timing: keras {keras_s * 1000:.1f} ms, {exported.backend} {exported_s * 1000:.1f} ms")
+    return max_diff <= tolerance and top1 == 1.0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=sorted(BACKENDS), default="numpy")
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    parser.add_argument("--out", help="artifact path (default: <models-dir>/eurosat_cnn_model.<ext>)")
+    parser.add_argument("--tolerance", type=float, help="max allowed |keras - exported| per output")
+    parser.add_argument("--samples", type=int, default=32, help="random tiles used for the parity check")
+    parser.add_argument("--verify-only", action="store_true", help="skip export, only compare an existing artifact")
+    args = parser.parse_args(argv)
+
+    models_dir = Path(args.models_dir)
+    out_path = Path(args.out) if args.out else models_dir / f"{ARTIFACT_STEM}{BACKENDS[args.format][0]}"
+    tolerance = args.tolerance if args.tolerance is not None else DEFAULT_TOLERANCE.get(args.format, 1e-4)
+
+    keras_model, class_names, meta = load_model_for_inference(str(models_dir), backend="keras")
+    print(f"reference model: {meta.get('source')} ({meta.get('type')})")
+
+    if not args.verify_only:
+        export(keras_model, args.format, out_path, class_names)
+        print(f"wrote {out_path} ({out_path.stat().st_size / (1024 * 1024):.2f} MB)")
+
+    exported = load_exported_model(args.format, out_path)
+    ok = verify(keras_model, exported, parity_inputs(args.samples), tolerance)
+    print("PARITY OK" if ok else "PARITY FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+# tests/test_backends.py
+import numpy as np
+import pytest
+
+from utils.backends import ExportedModel, _Identity, _Layer
+
+
+def test_backend_without_predict_cannot_be_instantiated():
+    class Incomplete(ExportedModel):
+        backend = "incomplete"
+
+    with pytest.raises(TypeError, match="predict"):
+        Incomplete("model.bin")
+
+
+def test_layer_without_call_cannot_be_instantiated():
+    class Incomplete(_Layer):
+        pass
+
+    with pytest.raises(TypeError, match="__call__"):
+        Incomplete()
+
+
+def test_concrete_layer_runs():
+    x = np.ones((2, 4), dtype=np.float32)
+    assert np.array_equal(_Identity()(x), x)
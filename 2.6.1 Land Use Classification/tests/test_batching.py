@@ -0,0 +1,134 @@
+# tests/test_batching.py
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.batching import MicroBatcher
+from serving_common.executor import ExecutorSaturated, InferenceExecutor
+
+
+class Recorder:
+    """predict_fn that doubles its input and records batch sizes and peak concurrency."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batch_sizes = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, arr):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.batch_sizes.append(arr.shape[0])
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return arr * 2
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_requests_share_batches_and_get_their_own_rows():
+    fn = Recorder(delay=0.01)
+
+    async def main():
+        batcher = MicroBatcher(fn, max_batch_size=4, max_wait_ms=20)
+        results = await asyncio.gather(*[batcher.submit(np.full((1, 2), i, dtype="float32")) for i in range(10)])
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = run(main())
+    for i, out in enumerate(results):
+        np.testing.assert_array_equal(out, np.full((1, 2), 2 * i))
+    assert max(fn.batch_sizes) <= 4
+    assert sum(fn.batch_sizes) == 10
+    assert len(fn.batch_sizes) < 10  # requests were actually grouped
+    assert stats["items"] == 10
+
+
+def test_multi_row_requests_are_never_split():
+    fn = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(fn, max_batch_size=4, max_wait_ms=20)
+        outs = await asyncio.gather(batcher.submit(np.ones((3, 2))), batcher.submit(np.ones((3, 2))))
+        await batcher.stop()
+        return outs
+
+    outs = run(main())
+    assert [o.shape[0] for o in outs] == [3, 3]
+    assert fn.batch_sizes == [3, 3]
+
+
+def test_batches_run_concurrently_up_to_the_executor_worker_count():
+    fn = Recorder(delay=0.1)
+    executor = InferenceExecutor("thread", max_workers=3, max_queue=64)
+
+    async def main():
+        batcher = MicroBatcher(fn, max_batch_size=1, max_wait_ms=0, executor=executor)
+        await asyncio.gather(*[batcher.submit(np.ones((1, 2))) for _ in range(9)])
+        await batcher.stop()
+
+    try:
+        start = time.perf_counter()
+        run(main())
+        elapsed = time.perf_counter() - start
+    finally:
+        executor.shutdown()
+    assert fn.peak == 3
+    assert elapsed < 0.6  # 9 passes of 0.1s on 3 workers, not 0.9s back to back
+
+
+def test_forward_pass_errors_reach_every_caller_in_the_batch():
+    def boom(arr):
+        raise RuntimeError("model exploded")
+
+    async def main():
+        batcher = MicroBatcher(boom, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*[batcher.submit(np.ones((1, 2))) for _ in range(3)],
+                                       return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = run(main())
+    assert all(isinstance(r, RuntimeError) and "exploded" in str(r) for r in results)
+
+
+def test_full_queue_is_rejected():
+    fn = Recorder(delay=0.2)
+
+    async def main():
+        batcher = MicroBatcher(fn, max_batch_size=1, max_wait_ms=0, max_queue=1)
+        await batcher.start()
+        first = asyncio.create_task(batcher.submit(np.ones((1, 2))))
+        await asyncio.sleep(0.05)  # first is now running; the queue is empty again
+        second = asyncio.create_task(batcher.submit(np.ones((1, 2))))
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorSaturated):
+            await batcher.submit(np.ones((1, 2)))
+        await asyncio.gather(first, second)
+        await batcher.stop()
+        return batcher.stats()
+
+    assert run(main())["rejected"] == 1
+
+
+def test_stop_fails_waiting_requests_instead_of_hanging():
+    fn = Recorder(delay=0.2)
+
+    async def main():
+        batcher = MicroBatcher(fn, max_batch_size=1, max_wait_ms=0)
+        tasks = [asyncio.create_task(batcher.submit(np.ones((1, 2)))) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
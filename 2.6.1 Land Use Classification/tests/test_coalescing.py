@@ -0,0 +1,128 @@
+# tests/test_coalescing.py
+import asyncio
+import io
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import app as landuse
+from utils.cache import content_digest
+from utils.uploads import IngestedUpload
+
+N_CLASSES = 10
+
+
+def png_bytes(seed):
+    pixels = np.random.default_rng(seed).integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def upload(data):
+    return IngestedUpload(io.BytesIO(data), "tile.png", len(data), content_digest(data))
+
+
+class GatedForward:
+    """Forward pass that blocks until released, counts calls and can fail its first call."""
+
+    def __init__(self, fail_first=False):
+        self.calls = 0
+        self.fail_first = fail_first
+        self.release = threading.Event()
+
+    def __call__(self, arr):
+        self.calls += 1
+        call = self.calls
+        self.release.wait(5)
+        if self.fail_first and call == 1:
+            raise RuntimeError("leader failed")
+        return np.tile(np.eye(N_CLASSES, dtype="float32")[2], (len(arr), 1))
+
+
+@pytest.fixture
+def forward(monkeypatch):
+    fn = GatedForward()
+    monkeypatch.setattr(landuse, "ensure_model_ready", lambda: None)
+    monkeypatch.setattr(landuse, "CLASS_NAMES", [f"class{i}" for i in range(N_CLASSES)])
+    monkeypatch.setattr(landuse, "MODEL_META", {"version": "test", "output_activation": "softmax"})
+    monkeypatch.setattr(landuse.BATCHER, "predict_fn", fn)
+    monkeypatch.setattr(landuse.BATCHER, "executor", None)
+    landuse.PREDICTION_CACHE.clear()
+    landuse.IN_FLIGHT.clear()
+    return fn
+
+
+async def with_batcher(coro):
+    await landuse.BATCHER.start()
+    try:
+        return await coro
+    finally:
+        await landuse.BATCHER.stop()
+
+
+def test_identical_concurrent_uploads_share_one_forward_pass(forward):
+    data = png_bytes(1)
+
+    async def main():
+        tasks = [asyncio.create_task(landuse.predict_image(upload(data))) for _ in range(5)]
+        await asyncio.sleep(0.1)
+        forward.release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(with_batcher(main()))
+    assert results == [("class2", 1.0)] * 5
+    assert forward.calls == 1
+    assert not landuse.IN_FLIGHT
+
+
+def test_leader_disconnect_does_not_cancel_followers(forward):
+    data = png_bytes(2)
+
+    async def main():
+        leader = asyncio.create_task(landuse.predict_image(upload(data)))
+        await asyncio.sleep(0.05)
+        followers = [asyncio.create_task(landuse.predict_image(upload(data))) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        leader.cancel()  # the leader's client went away
+        await asyncio.sleep(0.05)
+        forward.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(with_batcher(main())) == [("class2", 1.0)] * 3
+    assert forward.calls == 1
+
+
+def test_followers_do_not_inherit_the_leaders_error(forward):
+    forward.fail_first = True
+    data = png_bytes(3)
+
+    async def main():
+        leader = asyncio.create_task(landuse.predict_image(upload(data)))
+        await asyncio.sleep(0.05)
+        follower = asyncio.create_task(landuse.predict_image(upload(data)))
+        await asyncio.sleep(0.05)
+        forward.release.set()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader_result, follower_result = asyncio.run(with_batcher(main()))
+    assert isinstance(leader_result, RuntimeError)
+    assert follower_result == ("class2", 1.0)
+
+
+def test_repeated_upload_is_served_from_the_cache(forward):
+    forward.release.set()
+    data = png_bytes(4)
+
+    async def main():
+        first = await landuse.predict_image(upload(data))
+        second = await landuse.predict_image(upload(data))
+        return first, second
+
+    first, second = asyncio.run(with_batcher(main()))
+    assert first == second
+    assert forward.calls == 1
@@ -0,0 +1,82 @@
+# tests/test_postprocessing.py
+import numpy as np
+
+from utils.backends import ACTIVATIONS
+from utils.prediction_helper import (DEFAULT_CLASS_NAMES, get_output_activation, normalize_predictions,
+                                     postprocess_batch, predict_batch)
+
+BATCH = np.zeros((2, 64, 64, 3), dtype="float32")
+
+
+class PredictOnlyModel:
+    """sklearn-style classifier without predict_proba; run_model one-hot encodes its labels."""
+
+    def predict(self, X):
+        return np.full(len(X), 3)
+
+
+class Softmax:
+    """Stand-in for keras.layers.Softmax: no .activation attribute."""
+
+
+class Dense:
+    def __init__(self, activation):
+        self.activation = ACTIVATIONS[activation]
+
+
+class LayeredModel:
+    def __init__(self, last_layer, output):
+        self.layers = [Dense("relu"), last_layer]
+        self.output = np.asarray(output, dtype="float32")
+
+    def predict(self, arr):
+        return np.tile(self.output, (len(arr), 1))
+
+
+def test_predict_only_model_keeps_its_one_hot_score():
+    model = PredictOnlyModel()
+    assert get_output_activation(model) == "probabilities"
+    top = predict_batch(BATCH, model, DEFAULT_CLASS_NAMES, k=1)
+    assert top["labels"][0, 0] == DEFAULT_CLASS_NAMES[3]
+    assert top["scores"][0, 0] == 1.0
+
+
+def test_standalone_softmax_layer_is_not_softmaxed_twice():
+    probs = [0.9, 0.1] + [0.0] * 8
+    model = LayeredModel(Softmax(), probs)
+    assert get_output_activation(model) == "softmax"
+    top = predict_batch(BATCH, model, DEFAULT_CLASS_NAMES, k=2)
+    np.testing.assert_allclose(top["scores"][0], [0.9, 0.1], rtol=1e-6)
+
+
+def test_linear_output_is_treated_as_logits():
+    model = LayeredModel(Dense("linear"), [2.0, 1.0] + [0.0] * 8)
+    assert get_output_activation(model) == "linear"
+    scores = predict_batch(BATCH, model, DEFAULT_CLASS_NAMES, k=1)["scores"]
+    expected = np.exp(2.0) / (np.exp([2.0, 1.0]).sum() + 8)
+    np.testing.assert_allclose(scores[0, 0], expected, rtol=1e-5)
+
+
+def test_declared_activation_decides_not_the_values():
+    # small non-negative logits that happen to sum to 1 are still logits ...
+    logits = np.array([[0.6, 0.4] + [0.0] * 8], dtype="float32")
+    expected = np.exp(logits) / np.exp(logits).sum()
+    np.testing.assert_allclose(normalize_predictions(logits, "linear"), expected, rtol=1e-6)
+    # ... and probabilities pass through untouched
+    np.testing.assert_array_equal(normalize_predictions(logits, "softmax"), logits)
+
+
+def test_declared_output_activation_wins():
+    class Exported:
+        output_activation = "linear"
+
+        def predict_proba(self, X):
+            raise AssertionError("not called")
+
+    assert get_output_activation(Exported()) == "linear"
+
+
+def test_top_k_is_sorted_best_first():
+    top = postprocess_batch(np.array([[0.1, 0.7, 0.2], [0.5, 0.2, 0.3]]), ["a", "b", "c"], k=2,
+                            activation="probabilities")
+    assert top["labels"].tolist() == [["b", "c"], ["a", "c"]]
@@ -0,0 +1,39 @@
+# tests/test_preprocessing.py
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from utils.preprocessing import preprocess_image_bytes
+
+
+def png_bytes():
+    pixels = np.random.default_rng(0).integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_writes_into_a_batch_slot():
+    data = png_bytes()
+    batch = np.zeros((3, 64, 64, 3), dtype=np.float32)
+    preprocess_image_bytes(data, out=batch[1], fast=False)
+    np.testing.assert_array_equal(batch[1], preprocess_image_bytes(data, fast=False)[0])
+    assert not batch[0].any() and not batch[2].any()
+
+
+def test_writes_into_a_non_contiguous_out():
+    data = png_bytes()
+    # channels-first storage viewed as (H, W, 3): a valid but non-contiguous target
+    storage = np.zeros((3, 64, 64), dtype=np.float32)
+    out = storage.transpose(1, 2, 0)
+    assert not out.flags.c_contiguous
+    result = preprocess_image_bytes(data, out=out, fast=False)
+    assert result is out
+    np.testing.assert_array_equal(out, preprocess_image_bytes(data, fast=False)[0])
+
+
+def test_rejects_a_mismatched_out():
+    with pytest.raises(ValueError):
+        preprocess_image_bytes(png_bytes(), out=np.zeros((32, 32, 3), dtype=np.float32))
@@ -0,0 +1,110 @@
+# tests/test_uploads.py
+import asyncio
+import io
+import threading
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from utils.cache import content_digest
+from utils.uploads import IngestedUpload, RequestSizeLimit, UploadTooLarge, ingest_upload, persist_upload
+
+LIMIT = 1024
+
+
+async def echo_size(request):
+    return JSONResponse({"size": len(await request.body())})
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[Route("/upload", echo_size, methods=["POST"]),
+                            Route("/other", echo_size, methods=["POST"])])
+    app.add_middleware(RequestSizeLimit, limits={"/upload": LIMIT})
+    return TestClient(app)
+
+
+def chunks(total, size=256):
+    for start in range(0, total, size):
+        yield b"x" * min(size, total - start)
+
+
+def test_declared_length_over_limit_is_refused(client):
+    response = client.post("/upload", content=b"x" * (LIMIT + 1))
+    assert response.status_code == 413
+    assert "limit" in response.json()["error"]
+
+
+def test_chunked_body_is_cut_off_once_past_the_limit():
+    # drive the middleware with raw ASGI messages: no Content-Length, 100 chunks of 256 bytes
+    app = Starlette(routes=[Route("/upload", echo_size, methods=["POST"])])
+    guarded = RequestSizeLimit(app, limits={"/upload": LIMIT})
+    pending = [{"type": "http.request", "body": b"x" * 256, "more_body": True} for _ in range(100)]
+    pending[-1]["more_body"] = False
+    delivered, sent = [], []
+
+    async def receive():
+        delivered.append(pending.pop(0))
+        return delivered[-1]
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/upload", "raw_path": b"/upload",
+             "query_string": b"", "headers": [], "scheme": "http", "server": ("test", 80),
+             "client": ("test", 1), "root_path": "", "http_version": "1.1", "app": app}
+    asyncio.run(guarded(scope, receive, send))
+
+    assert [m["status"] for m in sent if m["type"] == "http.response.start"] == [413]
+    assert len(delivered) == LIMIT // 256 + 1  # stopped reading at the first chunk past the limit
+
+
+def test_bodies_within_limit_and_other_paths_pass(client):
+    assert client.post("/upload", content=chunks(LIMIT)).json() == {"size": LIMIT}
+    assert client.post("/other", content=b"x" * (LIMIT * 4)).json() == {"size": LIMIT * 4}
+
+
+class FakeUploadFile:
+    def __init__(self, data):
+        self.file = io.BytesIO(data)
+        self.filename = "tile.png"
+        self.size = None
+
+    async def seek(self, offset):
+        self.file.seek(offset)
+
+    async def read(self, size):
+        return self.file.read(size)
+
+
+def test_ingest_rejects_oversized_upload_without_declared_size():
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(ingest_upload(FakeUploadFile(b"x" * (LIMIT + 1)), LIMIT, chunk_size=100))
+
+
+def test_concurrent_persists_of_the_same_content_store_one_file(tmp_path):
+    data = b"\x89PNG" + bytes(range(256)) * 64
+    start = threading.Barrier(8)
+    results, errors = [], []
+
+    def persist():
+        upload = IngestedUpload(io.BytesIO(data), "tile.png", len(data), content_digest(data))
+        start.wait()
+        try:
+            results.append(persist_upload(upload, tmp_path))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=persist) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert len(set(results)) == 1
+    assert [p.name for p in tmp_path.iterdir()] == [results[0].name]
+    assert results[0].read_bytes() == data
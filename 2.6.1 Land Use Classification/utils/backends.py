@@ -0,0 +1,365 @@
+# utils/backends.py
+"""
+Pluggable inference backends for exported (framework-free) model artifacts.
+- A registry maps backend name -> (artifact suffix, loader)
+- "onnx": ONNX Runtime session (.onnx), optional dependency
+- "tflite": TFLite interpreter (.tflite) via ai_edge_litert / tflite_runtime (tf.lite if forced), optional dependency
+- "numpy": pure-NumPy implementation of the EuroSAT CNN layers (.npz), no extra dependency
+- Every backend returns an ExportedModel whose predict(arr) maps (N,64,64,3) -> (N,C)
+- export_numpy_model() writes the .npz format from a Keras model (used by export_model.py)
+"""
+
+import abc
+import importlib.util
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ARTIFACT_STEM = "eurosat_cnn_model"
+
+
+class ExportedModel(abc.ABC):
+    """
+    Common interface for exported backends: predict((N,H,W,C) float32) -> (N,classes).
+    """
+    backend = "exported"
+
+    def __init__(self, source: str, output_activation: str = "softmax", class_names: Optional[List[str]] = None):
+        self.source = source
+        self.output_activation = output_activation
+        self.class_names = class_names
+
+    @abc.abstractmethod
+    def predict(self, arr: np.ndarray) -> np.ndarray:
+        """(N,H,W,C) float32 -> (N,classes) raw model outputs."""
+
+
+# name -> (suffix, is_available(), loader(path) -> ExportedModel)
+BACKENDS: Dict[str, Tuple[str, Callable[[], bool], Callable[[Path], ExportedModel]]] = {}
+
+
+def register_backend(name: str, suffix: str, is_available: Callable[[], bool] = lambda: True):
+    """
+    Decorator registering a loader for artifacts named <ARTIFACT_STEM><suffix>.
+    """
+    def wrap(loader):
+        BACKENDS[name] = (suffix, is_available, loader)
+        return loader
+    return wrap
+
+
+def available_backends() -> List[str]:
+    return [name for name, (_, is_available, _) in BACKENDS.items() if is_available()]
+
+
+def find_exported_model(models_dir, preferred: Optional[str] = None) -> Optional[Tuple[str, Path]]:
+    """
+    Return (backend_name, artifact_path) for the first exported artifact whose
+    lightweight runtime is installed, in registry order. With `preferred` only that
+    backend is considered and the runtime check is left to its loader.
+    """
+    models_dir = Path(models_dir)
+    names = [preferred] if preferred else list(BACKENDS)
+    for name in names:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown backend {name!r}; registered: {sorted(BACKENDS)}")
+        suffix, is_available, _ = BACKENDS[name]
+        path = models_dir / f"{ARTIFACT_STEM}{suffix}"
+        if path.exists() and (preferred or is_available()):
+            return name, path
+    return None
+
+
+def load_exported_model(name: str, path) -> ExportedModel:
+    _, _, loader = BACKENDS[name]
+    return loader(Path(path))
+
+
+def _has_module(module: str) -> Callable[[], bool]:
+    return lambda: importlib.util.find_spec(module) is not None
+
+
+# --- ONNX Runtime ---
+class OnnxModel(ExportedModel):
+    backend = "onnx"
+
+    def __init__(self, path: Path, **kwargs):
+        import onnxruntime as ort
+        super().__init__(str(path), **kwargs)
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, arr: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(arr, dtype=np.float32)})[0]
+
+
+@register_backend("onnx", ".onnx", _has_module("onnxruntime"))
+def _load_onnx(path: Path) -> ExportedModel:
+    return OnnxModel(path, **_read_sidecar(path))
+
+
+# --- TFLite ---
+def _tflite_interpreter_cls():
+    if importlib.util.find_spec("ai_edge_litert") is not None:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    if importlib.util.find_spec("tflite_runtime") is not None:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    # full TensorFlow works too, but defeats the point; only used when forced
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class TFLiteModel(ExportedModel):
+    backend = "tflite"
+
+    def __init__(self, path: Path, **kwargs):
+        super().__init__(str(path), **kwargs)
+        self.interpreter = _tflite_interpreter_cls()(model_path=str(path))
+        self.input_index = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self._batch = None
+
+    def predict(self, arr: np.ndarray) -> np.ndarray:
+        arr = np.ascontiguousarray(arr, dtype=np.float32)
+        if self._batch != arr.shape[0]:
+            # interpreter shapes are static; re-plan only when the batch size changes
+            self.interpreter.resize_tensor_input(self.input_index, list(arr.shape))
+            self.interpreter.allocate_tensors()
+            self._batch = arr.shape[0]
+        self.interpreter.set_tensor(self.input_index, arr)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+
+@register_backend("tflite", ".tflite", lambda: _has_module("ai_edge_litert")() or _has_module("tflite_runtime")())
+def _load_tflite(path: Path) -> ExportedModel:
+    return TFLiteModel(path, **_read_sidecar(path))
+
+
+def _read_sidecar(path: Path) -> Dict:
+    """
+    ONNX / TFLite files carry no activation / class metadata; export_model.py writes it
+    next to the artifact as <artifact>.json.
+    """
+    sidecar = path.with_name(path.name + ".json")
+    if not sidecar.exists():
+        return {}
+    meta = json.loads(sidecar.read_text(encoding="utf-8"))
+    return {k: meta[k] for k in ("output_activation", "class_names") if k in meta}
+
+
+# --- Pure NumPy ---
+def _relu(x):
+    return np.maximum(x, 0)
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+def _tanh(x):
+    return np.tanh(x)
+
+def _linear(x):
+    return x
+
+# keyed by Keras activation name; __name__ matches so get_output_activation() can read it back
+ACTIVATIONS = {"relu": _relu, "sigmoid": _sigmoid, "softmax": _softmax, "linear": _linear, "tanh": _tanh}
+for _name, _fn in ACTIVATIONS.items():
+    _fn.__name__ = _name
+
+
+def _same_padding(size: int, kernel: int, stride: int) -> Tuple[int, int]:
+    # TensorFlow "same": output = ceil(size / stride), extra pixel goes after
+    out = -(-size // stride)
+    total = max((out - 1) * stride + kernel - size, 0)
+    return total // 2, total - total // 2
+
+
+class _Layer(abc.ABC):
+    activation = ACTIVATIONS["linear"]
+
+    @abc.abstractmethod
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """Forward pass over a (N,...) batch."""
+
+
+class _Conv2D(_Layer):
+    def __init__(self, config: Dict, kernel: np.ndarray, bias: Optional[np.ndarray]):
+        self.kh, self.kw, _, self.filters = kernel.shape
+        self.strides = tuple(config.get("strides", (1, 1)))
+        self.padding = config.get("padding", "valid")
+        # (kh, kw, cin, f) -> (kh*kw*cin, f), matching the im2col patch layout below
+        self.kernel = np.ascontiguousarray(kernel.reshape(-1, self.filters), dtype=np.float32)
+        self.bias = None if bias is None else bias.astype(np.float32)
+        self.activation = ACTIVATIONS[config.get("activation", "linear")]
+
+    def __call__(self, x):
+        sh, sw = self.strides
+        if self.padding == "same":
+            pt, pb = _same_padding(x.shape[1], self.kh, sh)
+            pl, pr = _same_padding(x.shape[2], self.kw, sw)
+            x = np.pad(x, ((0, 0), (pt, pb), (pl, pr), (0, 0)))
+        # (N, Ho, Wo, C, kh, kw) view -> (N, Ho, Wo, kh, kw, C) patches, one GEMM
+        win = np.lib.stride_tricks.sliding_window_view(x, (self.kh, self.kw), axis=(1, 2))[:, ::sh, ::sw]
+        n, ho, wo = win.shape[:3]
+        cols = win.transpose(0, 1, 2, 4, 5, 3).reshape(n * ho * wo, -1)
+        out = cols @ self.kernel
+        if self.bias is not None:
+            out += self.bias
+        return self.activation(out.reshape(n, ho, wo, self.filters))
+
+
+class _MaxPooling2D(_Layer):
+    def __init__(self, config: Dict):
+        self.pool = tuple(config.get("pool_size", (2, 2)))
+        self.strides = tuple(config.get("strides") or self.pool)
+        self.padding = config.get("padding", "valid")
+
+    def __call__(self, x):
+        ph, pw = self.pool
+        sh, sw = self.strides
+        if self.padding == "same":
+            pt, pb = _same_padding(x.shape[1], ph, sh)
+            pl, pr = _same_padding(x.shape[2], pw, sw)
+            x = np.pad(x, ((0, 0), (pt, pb), (pl, pr), (0, 0)), constant_values=-np.inf)
+        if (ph, pw) == (sh, sw):
+            # non-overlapping windows: a reshape + max, no window view needed
+            n, h, w, c = x.shape
+            h, w = h // ph * ph, w // pw * pw
+            return x[:, :h, :w].reshape(n, h // ph, ph, w // pw, pw, c).max(axis=(2, 4))
+        win = np.lib.stride_tricks.sliding_window_view(x, (ph, pw), axis=(1, 2))[:, ::sh, ::sw]
+        return win.max(axis=(-2, -1))
+
+
+class _Flatten(_Layer):
+    def __call__(self, x):
+        return x.reshape(x.shape[0], -1)
+
+
+class _Dense(_Layer):
+    def __init__(self, config: Dict, kernel: np.ndarray, bias: Optional[np.ndarray]):
+        self.kernel = np.ascontiguousarray(kernel, dtype=np.float32)
+        self.bias = None if bias is None else bias.astype(np.float32)
+        self.activation = ACTIVATIONS[config.get("activation", "linear")]
+
+    def __call__(self, x):
+        out = x @ self.kernel
+        if self.bias is not None:
+            out += self.bias
+        return self.activation(out)
+
+
+class _Identity(_Layer):
+    # Dropout / InputLayer are no-ops at inference time
+    def __call__(self, x):
+        return x
+
+
+class _Rescaling(_Layer):
+    def __init__(self, config: Dict):
+        self.scale = np.float32(config.get("scale", 1.0))
+        self.offset = np.float32(config.get("offset", 0.0))
+
+    def __call__(self, x):
+        return x * self.scale + self.offset
+
+
+class _Activation(_Layer):
+    def __init__(self, config: Dict):
+        self.activation = ACTIVATIONS[config.get("activation", "linear")]
+
+    def __call__(self, x):
+        return self.activation(x)
+
+
+SUPPORTED_LAYERS = {"Conv2D", "MaxPooling2D", "Flatten", "Dense", "Dropout", "InputLayer", "Rescaling", "Activation"}
+
+
+def _build_layer(spec: Dict, weights: List[np.ndarray]) -> _Layer:
+    cls, config = spec["class_name"], spec["config"]
+    kernel = weights[0] if weights else None
+    bias = weights[1] if len(weights) > 1 else None
+    if cls == "Conv2D":
+        return _Conv2D(config, kernel, bias)
+    if cls == "Dense":
+        return _Dense(config, kernel, bias)
+    if cls == "MaxPooling2D":
+        return _MaxPooling2D(config)
+    if cls == "Flatten":
+        return _Flatten()
+    if cls == "Rescaling":
+        return _Rescaling(config)
+    if cls == "Activation":
+        return _Activation(config)
+    if cls in ("Dropout", "InputLayer"):
+        return _Identity()
+    raise ValueError(f"Layer type {cls!r} is not supported by the numpy backend")
+
+
+class NumpyModel(ExportedModel):
+    """
+    Sequential CNN evaluated with NumPy only (im2col + BLAS matmul for convolutions).
+    Exposes `layers` so get_output_activation() works the same as for Keras.
+    """
+    backend = "numpy"
+
+    def __init__(self, path: Path):
+        with np.load(str(path), allow_pickle=False) as data:
+            spec = json.loads(str(data["spec"]))
+            self.layers = [
+                _build_layer(layer, [data[f"layer{i}_w{j}"] for j in range(layer["n_weights"])])
+                for i, layer in enumerate(spec["layers"])
+            ]
+        super().__init__(str(path), spec.get("output_activation", self.layers[-1].activation.__name__),
+                         spec.get("class_names"))
+
+    def predict(self, arr: np.ndarray) -> np.ndarray:
+        x = np.asarray(arr, dtype=np.float32)
+        for layer in self.layers:
+            x = layer(x)
+        return x
+
+
+@register_backend("numpy", ".npz")
+def _load_numpy(path: Path) -> ExportedModel:
+    return NumpyModel(path)
+
+
+def export_numpy_model(keras_model, path, class_names: Optional[List[str]] = None) -> Path:
+    """
+    Write a Keras Sequential model as <path>.npz: a JSON layer spec plus raw weight arrays.
+    """
+    layers, arrays = [], {}
+    for i, layer in enumerate(keras_model.layers):
+        cls = layer.__class__.__name__
+        if cls not in SUPPORTED_LAYERS:
+            raise ValueError(f"Layer {layer.name!r} ({cls}) is not supported by the numpy backend")
+        config = layer.get_config()
+        keep = {k: config[k] for k in ("activation", "padding", "strides", "pool_size", "scale", "offset")
+                if k in config and config[k] is not None}
+        if isinstance(keep.get("activation"), dict):
+            raise ValueError(f"Layer {layer.name!r} uses a custom activation, not supported")
+        if keep.get("activation", "linear") not in ACTIVATIONS:
+            raise ValueError(f"Activation {keep['activation']!r} is not supported by the numpy backend")
+        if config.get("data_format", "channels_last") != "channels_last" or tuple(config.get("dilation_rate", (1, 1))) != (1, 1):
+            raise ValueError(f"Layer {layer.name!r} needs channels_last and no dilation for the numpy backend")
+        weights = layer.get_weights()
+        layers.append({"class_name": cls, "config": keep, "n_weights": len(weights)})
+        for j, w in enumerate(weights):
+            arrays[f"layer{i}_w{j}"] = np.asarray(w, dtype=np.float32)
+
+    spec = {"layers": layers, "output_activation": layers[-1]["config"].get("activation", "linear")}
+    if class_names:
+        spec["class_names"] = list(class_names)
+    path = Path(path)
+    np.savez(str(path), spec=np.array(json.dumps(spec)), **arrays)
+    return path
@@ -0,0 +1,184 @@
+# utils/batch_io.py
+"""
+Helpers for multi-image requests.
+- Expands zip / tar(.gz) archives of tiles into (name, bytes) pairs, one member
+  at a time, with caps on each member's and the archive's decompressed size
+- Decodes many images in parallel through preprocess_image_bytes, in chunks,
+  so only one chunk of raw member bytes is held at once
+- Stacks the decoded tiles into a single (N,64,64,3) float32 array
+"""
+
+import io
+import itertools
+import tarfile
+import zipfile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Dict
+
+from .preprocessing import preprocess_image_bytes, TARGET_SIZE
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".gif", ".webp"}
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+DECODE_CHUNK = 256  # images decoded per step of decode_stream
+
+
+class ArchiveTooLarge(ValueError):
+    """Raised when an archive member or the archive's decompressed total exceeds its cap; maps to HTTP 413."""
+
+
+def _is_image_name(name: str) -> bool:
+    path = PurePosixPath(name)
+    # skip hidden files and macOS resource forks (__MACOSX/._foo.jpg)
+    if any(part.startswith(".") or part == "__MACOSX" for part in path.parts):
+        return False
+    return path.suffix.lower() in IMAGE_EXTENSIONS
+
+
+def is_archive(filename: str, data: bytes) -> bool:
+    """
+    True when the upload looks like a zip or tar archive (by name or magic bytes).
+    Only the first 512 bytes of `data` are needed.
+    """
+    name = (filename or "").lower()
+    if name.endswith(ARCHIVE_EXTENSIONS):
+        return True
+    if data[:4] == b"PK\x03\x04":
+        return True
+    # ustar magic sits at offset 257 of the first header block
+    return data[257:262] == b"ustar"
+
+
+def iter_archive_images(data, max_files: int, max_member_bytes: Optional[int] = None,
+                        max_total_bytes: Optional[int] = None) -> Iterable[Tuple[str, bytes]]:
+    """
+    Yield (member_name, bytes) for every image inside a zip or tar archive.
+    `data` may be bytes or a seekable binary file object (e.g. a spooled upload).
+    Members are read one at a time; each size is checked before it is read.
+    Raises ValueError when the archive holds more than max_files images, and
+    ArchiveTooLarge when a member is over max_member_bytes or the members
+    together are over max_total_bytes (decompressed).
+    """
+    count = 0
+    total = 0
+
+    def admit(name, size):
+        nonlocal count, total
+        count += 1
+        if count > max_files:
+            raise ValueError(f"Archive contains more than {max_files} images.")
+        if max_member_bytes is not None and size > max_member_bytes:
+            raise ArchiveTooLarge(f"Archive member {name} is over the {max_member_bytes // (1024 * 1024)} MB "
+                                  f"per-image limit once decompressed.")
+        total += size
+        if max_total_bytes is not None and total > max_total_bytes:
+            raise ArchiveTooLarge(f"Archive contents exceed the {max_total_bytes // (1024 * 1024)} MB "
+                                  f"decompressed limit.")
+
+    buf = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    buf.seek(0)
+    if zipfile.is_zipfile(buf):
+        buf.seek(0)
+        with zipfile.ZipFile(buf) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not _is_image_name(info.filename):
+                    continue
+                # zipfile never returns more than the declared file_size, so checking it bounds the read
+                admit(info.filename, info.file_size)
+                yield info.filename, zf.read(info)
+        return
+
+    buf.seek(0)
+    try:
+        tf = tarfile.open(fileobj=buf, mode="r:*")
+    except tarfile.TarError:
+        raise ValueError("Unsupported archive format (expected zip or tar).")
+    with tf:
+        for member in tf:
+            if not member.isfile() or not _is_image_name(member.name):
+                continue
+            admit(member.name, member.size)
+            fobj = tf.extractfile(member)
+            if fobj is not None:
+                yield member.name, fobj.read()
+
+
+def iter_batch_items(uploads: Iterable[Tuple[str, Any]], max_files: int, max_member_bytes: Optional[int] = None,
+                     max_total_bytes: Optional[int] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Lazily expand (filename, seekable file object) uploads into (name, bytes or file) images:
+    archives are unpacked member by member (see iter_archive_images), other uploads pass through.
+    max_total_bytes caps the decompressed archive members of the whole request.
+    Raises ValueError beyond max_files images in total.
+    """
+    count = 0
+    remaining = max_total_bytes
+    for filename, fobj in uploads:
+        fobj.seek(0)
+        head = fobj.read(512)
+        fobj.seek(0)
+        if is_archive(filename, head):
+            members = iter_archive_images(fobj, max_files - count, max_member_bytes, remaining)
+            for name, raw in members:
+                count += 1
+                if remaining is not None:
+                    remaining -= len(raw)
+                yield name, raw
+        else:
+            count += 1
+            if count > max_files:
+                raise ValueError(f"Too many images in one request (max {max_files}).")
+            yield filename, fobj
+
+
+def decode_stream(items: Iterable[Tuple[str, Any]], max_workers: int = 4,
+                  chunk_size: int = DECODE_CHUNK) -> Tuple[np.ndarray, List[str], List[Dict]]:
+    """
+    decode_images over an iterator, chunk_size items at a time, so raw bytes of
+    at most one chunk are alive at once. Same return value as decode_images.
+    """
+    arrays, names, errors = [], [], []
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, chunk_size))
+        if not chunk:
+            break
+        arr, chunk_names, chunk_errors = decode_images(chunk, max_workers)
+        del chunk
+        arrays.append(arr)
+        names.extend(chunk_names)
+        errors.extend(chunk_errors)
+    if not arrays:
+        return np.empty((0, TARGET_SIZE[1], TARGET_SIZE[0], 3), dtype="float32"), names, errors
+    return (arrays[0] if len(arrays) == 1 else np.concatenate(arrays)), names, errors
+
+
+def decode_images(items: List[Tuple[str, Any]], max_workers: int = 4) -> Tuple[np.ndarray, List[str], List[Dict]]:
+    """
+    Decode (name, bytes or file object) pairs in parallel and stack them into one batch.
+    Each worker writes straight into its slot of a preallocated float32 batch.
+    Returns (array (N,64,64,3), names of the decoded images, errors) where
+    errors lists {"filename", "error"} for images that failed to decode.
+    """
+    batch = np.empty((len(items), TARGET_SIZE[1], TARGET_SIZE[0], 3), dtype="float32")
+
+    def _decode(i):
+        try:
+            preprocess_image_bytes(items[i][1], out=batch[i])
+            return None
+        except Exception as e:
+            return str(e)
+
+    if max_workers > 1 and len(items) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            failures = list(pool.map(_decode, range(len(items))))
+    else:
+        failures = [_decode(i) for i in range(len(items))]
+
+    ok = np.array([err is None for err in failures], dtype=bool)
+    names = [name for (name, _), good in zip(items, ok) if good]
+    errors = [{"filename": name, "error": err} for (name, _), err in zip(items, failures) if err is not None]
+    if errors:
+        batch = batch[ok]
+    return batch, names, errors
@@ -0,0 +1,183 @@
+# utils/batching.py
+"""
+Dynamic micro-batching for model inference.
+- Concurrent requests submit preprocessed arrays of shape (n,64,64,3)
+- A background collector groups them into one batch tensor, bounded by
+  max_batch_size (rows) and max_wait_ms (time since the first queued item)
+- Each forward pass runs on the inference executor (or a worker thread), off the event loop;
+  up to one batch per executor worker is in flight while the next one is collected
+- Submissions beyond max_queue waiting items are rejected with ExecutorSaturated
+- Output rows are scattered back to the awaiting coroutines in order
+"""
+
+import asyncio
+import numpy as np
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from serving_common.executor import ExecutorSaturated, InferenceExecutor
+
+
+class MicroBatcher:
+    """
+    Collects concurrent inference calls into batched forward passes.
+
+    predict_fn receives one stacked (N,...) array and must return an array-like
+    with N rows; it is executed on `executor` when given, else in the loop's
+    default thread pool. With a process executor predict_fn must be picklable.
+    max_concurrent: forward passes in flight at once (default: the executor's
+    worker count, 1 without an executor).
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 executor: Optional[InferenceExecutor] = None, max_queue: Optional[int] = None,
+                 max_concurrent: Optional[int] = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+        self.executor = executor
+        self.max_queue = max_queue
+        self.max_concurrent = max(int(max_concurrent or (executor.max_workers if executor is not None else 1)), 1)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._carry: Optional[Tuple[np.ndarray, asyncio.Future]] = None
+        self._batches = 0
+        self._items = 0
+        self._rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if not self.running:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for task in list(self._in_flight):
+            task.cancel()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        # fail anything still waiting so no request hangs forever
+        pending = [self._carry] if self._carry is not None else []
+        self._carry = None
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, fut in pending:
+            if not fut.done():
+                fut.set_exception(RuntimeError("Batcher stopped."))
+
+    async def submit(self, arr: np.ndarray) -> np.ndarray:
+        """
+        Queue one preprocessed array and wait for its slice of the batch output.
+        """
+        if not self.running:
+            await self.start()
+        if self.max_queue is not None and self._queue.qsize() >= self.max_queue:
+            self._rejected += 1
+            raise ExecutorSaturated(f"Batch queue is full ({self.max_queue} requests waiting).")
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((arr, fut))
+        return await fut
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_concurrent": self.max_concurrent,
+            "in_flight_batches": len(self._in_flight),
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "queued": (self._queue.qsize() if self._queue is not None else 0) + (self._carry is not None),
+            "max_queue": self.max_queue,
+            "rejected": self._rejected,
+        }
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = await self._queue.get()
+        batch = [first]
+        rows = first[0].shape[0]
+        deadline = loop.time() + self.max_wait
+        while rows < self.max_batch_size:
+            timeout = deadline - loop.time()
+            try:
+                if self._queue.empty() and timeout > 0:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            if rows + item[0].shape[0] > self.max_batch_size:
+                # never split a request across batches; it opens the next one
+                self._carry = item
+                break
+            batch.append(item)
+            rows += item[0].shape[0]
+        return batch
+
+    async def _run(self):
+        while True:
+            # wait for a free worker first, so requests keep piling into the next batch meanwhile
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            # callers that gave up (client disconnect) don't need a forward pass
+            batch = [(arr, fut) for arr, fut in batch if not fut.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[np.ndarray, asyncio.Future]]):
+        try:
+            stacked = np.concatenate([arr for arr, _ in batch], axis=0)
+            if self.executor is not None:
+                preds = await self.executor.run(self.predict_fn, stacked)
+            else:
+                preds = await asyncio.get_running_loop().run_in_executor(None, self.predict_fn, stacked)
+            preds = np.asarray(preds)
+        except asyncio.CancelledError:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(RuntimeError("Batcher stopped."))
+            raise
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        self._batches += 1
+        self._items += stacked.shape[0]
+        offset = 0
+        for arr, fut in batch:
+            n = arr.shape[0]
+            if not fut.done():
+                fut.set_result(preds[offset:offset + n])
+            offset += n
@@ -0,0 +1,135 @@
+# utils/cache.py
+"""
+In-memory prediction cache keyed by upload content.
+- Key = model version + BLAKE2 digest of the uploaded bytes, so identical
+  re-uploads skip decoding and inference entirely
+- LRU eviction bounded by max entries and approximate memory use
+- Optional TTL so stale entries age out
+- Hit / miss / eviction counters for /metrics
+"""
+
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+def new_content_hasher():
+    """
+    Incremental hasher matching content_digest(), for uploads read in chunks.
+    """
+    return hashlib.blake2b(digest_size=20)
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Hex digest used to identify an upload by content (not filename).
+    """
+    hasher = new_content_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _approx_size(key: str, value: Any) -> int:
+    size = sys.getsizeof(key) + sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(sys.getsizeof(v) for v in value)
+    elif isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache. max_entries <= 0 disables caching; ttl_seconds <= 0
+    keeps entries until evicted.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 3600.0,
+                 size_fn: Callable[[str, Any], int] = _approx_size):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl_seconds)
+        self.size_fn = size_fn
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(data: bytes, model_version: str) -> str:
+        return PredictionCache.key_for_digest(content_digest(data), model_version)
+
+    @staticmethod
+    def key_for_digest(digest: str, model_version: str) -> str:
+        return f"{model_version}:{digest}"
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._drop(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        size = self.size_fn(key, value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, (_, old_size, _) = self._data.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _drop(self, key: str, size: int):
+        del self._data[key]
+        self._bytes -= size
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -1,40 +1,87 @@
 # utils/prediction_helper.py
 """
 Model loader and prediction helper.
-- Tries to load a Keras native model (.keras/.h5) first
+- Tries exported framework-free artifacts first (.onnx / .tflite / .npz, see utils/backends.py)
+- Then a Keras native model (.keras/.h5)
 - Falls back to joblib (.joblib)
 - If joblib contains a Keras model object, we use it directly
 - If joblib contains a scikit-learn style model, we handle it (expected to return a label)
+- TensorFlow is imported lazily, only when a Keras artifact is loaded
 - Provides predict_from_image_bytes(image_bytes, model, class_names)
+- Exposes run_model / decode_prediction / decode_top_k separately so callers can batch the forward pass
+- predict_batch(arr, model, class_names, k) returns vectorized top-k for every row, normalizing
+  according to the model's known output activation (see get_output_activation)
 """
 
 import os
+import sys
+import hashlib
+import importlib.util
 from pathlib import Path
 import joblib
 import numpy as np
+import time
 import traceback
 
-# try import tensorflow lazily (only if needed)
-try:
+# TensorFlow is only imported when a Keras artifact actually needs it;
+# at import time we just check that it is installed (no multi-second import)
+TF_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
+
+def _import_tf():
     import tensorflow as tf
-    TF_AVAILABLE = True
-except Exception:
-    TF_AVAILABLE = False
+    return tf
+
+def _tf_loaded() -> bool:
+    # a Keras object can only exist if TF was imported (e.g. by unpickling it)
+    return "tensorflow" in sys.modules or "keras" in sys.modules
 
-from .preprocessing import preprocess_image_bytes
+from .preprocessing import preprocess_image_bytes, TARGET_SIZE
+from .backends import ExportedModel, BACKENDS, find_exported_model, load_exported_model
 from typing import Tuple, List, Any, Dict
 
+INPUT_SHAPE = (TARGET_SIZE[1], TARGET_SIZE[0], 3)
+
 DEFAULT_CLASS_NAMES = [
     "AnnualCrop","Forest","HerbaceousVegetation","Highway","Industrial",
     "Pasture","PermanentCrop","Residential","River","SeaLake"
 ]
 
-def load_model_for_inference(models_dir: str = "models") -> Tuple[Any, List[str], Dict]:
+def artifact_version(path) -> str:
+    """
+    Short identifier of a model artifact (name + size + mtime), used to key caches
+    so that replacing the model file never serves stale predictions.
+    """
+    st = os.stat(path)
+    raw = f"{Path(path).name}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+# "auto" (exported backends first, then Keras / joblib), "keras" (skip exported
+# artifacts), or a registered backend name such as "onnx", "tflite", "numpy"
+DEFAULT_BACKEND = os.environ.get("LANDUSE_BACKEND", "auto")
+
+def load_model_for_inference(models_dir: str = "models", backend: str = None) -> Tuple[Any, List[str], Dict]:
     """
     Returns: (model_object, class_names_list, metadata_dict)
     - metadata contains helpful info for the /about page and diagnostics.
     """
     models_dir = Path(models_dir)
+    backend = backend or DEFAULT_BACKEND
+
+    if backend != "keras":
+        found = find_exported_model(models_dir, None if backend == "auto" else backend)
+        if found is not None:
+            name, path = found
+            model = load_exported_model(name, path)
+            meta = {
+                "source": str(path),
+                "version": artifact_version(path),
+                "type": f"exported_{name}",
+                "output_activation": model.output_activation,
+            }
+            return model, model.class_names or DEFAULT_CLASS_NAMES, meta
+        if backend != "auto":
+            raise FileNotFoundError(f"No {backend} artifact ({BACKENDS[backend][0]}) found in {models_dir}/ "
+                                    "or its runtime is not installed. Create one with export_model.py.")
     keras_candidates = list(models_dir.glob("*.keras")) + list(models_dir.glob("*.h5"))
     joblib_candidate = models_dir / "eurosat_cnn_model.joblib"
 
@@ -45,9 +92,12 @@ def load_model_for_inference(models_dir: str = "models") -> Tuple[Any, List[str]
     if keras_candidates and TF_AVAILABLE:
         keras_path = str(keras_candidates[0])
         try:
+            tf = _import_tf()
             model = tf.keras.models.load_model(keras_path)
             meta["source"] = keras_path
+            meta["version"] = artifact_version(keras_path)
             meta["type"] = "keras_native"
+            meta["output_activation"] = get_output_activation(model)
             return model, DEFAULT_CLASS_NAMES, meta
         except Exception as e:
             meta["keras_load_error"] = str(e)
@@ -58,22 +108,28 @@ def load_model_for_inference(models_dir: str = "models") -> Tuple[Any, List[str]
         try:
             obj = joblib.load(str(joblib_candidate))
             # If this is a Keras model object (most likely), use it
-            if TF_AVAILABLE and hasattr(obj, "predict") and hasattr(obj, "get_config"):
+            if _tf_loaded() and hasattr(obj, "predict") and hasattr(obj, "get_config"):
                 model = obj
                 meta["source"] = str(joblib_candidate)
+                meta["version"] = artifact_version(joblib_candidate)
                 meta["type"] = "keras_object_joblib"
+                meta["output_activation"] = get_output_activation(model)
                 return model, DEFAULT_CLASS_NAMES, meta
             # If it's an sklearn pipeline/classifier
             if hasattr(obj, "predict") and not TF_AVAILABLE:
                 # we don't know expected input format; assume it takes flattened arrays or feature vectors.
                 model = obj
                 meta["source"] = str(joblib_candidate)
+                meta["version"] = artifact_version(joblib_candidate)
                 meta["type"] = "sklearn_joblib"
+                meta["output_activation"] = get_output_activation(model)
                 return model, DEFAULT_CLASS_NAMES, meta
             # If it's something else, return it but warn
             model = obj
             meta["source"] = str(joblib_candidate)
+            meta["version"] = artifact_version(joblib_candidate)
             meta["type"] = "unknown_joblib"
+            meta["output_activation"] = get_output_activation(model)
             return model, DEFAULT_CLASS_NAMES, meta
         except Exception as e:
             raise RuntimeError(f"Failed to load joblib model: {e}\n{traceback.format_exc()}")
@@ -107,20 +163,20 @@ def _predict_with_sklearn(model, arr: np.ndarray):
     else:
         preds = model.predict(flat)
         # convert to indices if labels are strings
-        return np.stack([np.eye(len(DEFAULT_CLASS_NAMES))[preds]], axis=0) if np.issubdtype(preds.dtype, np.integer) else np.array(preds)
+        return np.eye(len(DEFAULT_CLASS_NAMES), dtype="float32")[preds] if np.issubdtype(preds.dtype, np.integer) else np.array(preds)
 
-def predict_from_image_bytes(image_bytes: bytes, model, class_names: List[str]) -> Tuple[str, float]:
+def run_model(model, arr: np.ndarray) -> np.ndarray:
     """
-    Unified prediction function:
-      - preprocess bytes -> arr (1,64,64,3)
-      - detect how to call model and return (label, score)
+    Run one forward pass over a preprocessed batch (N,64,64,3).
+    Returns raw model output with one row per input image.
     """
     if model is None:
         raise RuntimeError("Model is not loaded.")
-    arr = preprocess_image_bytes(image_bytes)
     # detect Keras-like by presence of 'predict' and 'get_config' or 'layers'
     try:
-        if hasattr(model, "predict") and (TF_AVAILABLE and hasattr(model, "get_config") or hasattr(model, "layers")):
+        if isinstance(model, ExportedModel):
+            preds = np.asarray(model.predict(arr))
+        elif hasattr(model, "predict") and (_tf_loaded() and hasattr(model, "get_config") or hasattr(model, "layers")):
             preds = _predict_with_keras(model, arr)
         elif hasattr(model, "predict"):
             # sklearn-like
@@ -130,27 +186,141 @@ def predict_from_image_bytes(image_bytes: bytes, model, class_names: List[str])
     except Exception as e:
         # bubble up error with context
         raise RuntimeError(f"Prediction failed: {e}")
+    return preds
 
-    # normalize preds into probabilities vector and pick top
-    preds = np.asarray(preds, dtype="float32")
-    if preds.ndim == 1:
-        preds = np.expand_dims(preds, axis=0)
-    # If preds look like class labels (strings), handle separately
-    if preds.dtype.type is np.str_ or preds.dtype == object:
+# Model held by each process-pool worker (see init_worker_model)
+_WORKER_MODEL = None
+
+def init_worker_model(models_dir: str = "models", warmup_batch_sizes: Tuple[int, ...] = ()):
+    """
+    Process-pool initializer: load the model once per worker process and
+    optionally warm it up so the first real request skips graph tracing.
+    """
+    global _WORKER_MODEL
+    _WORKER_MODEL, _, _ = load_model_for_inference(models_dir=models_dir)
+    warm_up_model(_WORKER_MODEL, warmup_batch_sizes)
+
+def warm_up_model(model, batch_sizes) -> Dict[int, float]:
+    """
+    Run synthetic all-zero batches of each size through the model so that
+    tracing / kernel selection happens before real traffic arrives.
+    Returns {batch_size: seconds}.
+    """
+    timings = {}
+    for n in batch_sizes:
+        start = time.perf_counter()
+        run_model(model, np.zeros((int(n),) + INPUT_SHAPE, dtype="float32"))
+        timings[int(n)] = round(time.perf_counter() - start, 4)
+    return timings
+
+def run_worker_model(arr: np.ndarray) -> np.ndarray:
+    """
+    Picklable forward pass for process-pool workers (uses the worker-local model).
+    """
+    return np.asarray(run_model(_WORKER_MODEL, arr))
+
+# Output activations whose rows are already probabilities (no renormalization needed)
+PROBABILITY_ACTIVATIONS = {"softmax", "sigmoid", "probabilities"}
+# Standalone output layers that emit probabilities but carry no .activation attribute
+PROBABILITY_LAYERS = {"Softmax": "softmax"}
+
+def get_output_activation(model) -> str:
+    """
+    Report what the model's output rows mean, so post-processing never has to guess:
+      - a declared `output_activation` (exported backends) wins
+      - Keras: name of the last layer's activation ("softmax", "sigmoid", "linear", ...),
+        or "softmax" when the last layer is a standalone Softmax layer
+      - sklearn-style models: "probabilities" (predict_proba rows, or the one-hot
+        rows run_model builds from predict())
+    """
+    declared = getattr(model, "output_activation", None)
+    if isinstance(declared, str):
+        return declared
+    layers = getattr(model, "layers", None)
+    if layers:
+        last = layers[-1]
+        if type(last).__name__ in PROBABILITY_LAYERS:
+            return PROBABILITY_LAYERS[type(last).__name__]
+        activation = getattr(last, "activation", None)
+        name = getattr(activation, "__name__", None) or getattr(activation, "name", None)
+        return str(name).lower() if name else "linear"
+    return "probabilities"
+
+def normalize_predictions(preds, activation: str = "softmax") -> np.ndarray:
+    """
+    Convert a raw (N,C) output matrix into per-class scores, vectorized over rows.
+    `activation` comes from the model metadata (get_output_activation): probability
+    outputs pass through untouched, any other output is logits and gets a stable
+    row-wise softmax.
+    """
+    probs = np.asarray(preds, dtype="float32")
+    if probs.ndim == 1:
+        probs = np.expand_dims(probs, axis=0)
+    if activation in PROBABILITY_ACTIVATIONS:
+        return probs
+    exp = np.exp(probs - probs.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+def postprocess_batch(preds, class_names: List[str], k: int = 1, activation: str = "softmax") -> Dict[str, np.ndarray]:
+    """
+    Top-k post-processing for a whole batch without per-row Python loops.
+    Returns {"indices": (N,k) int, "labels": (N,k) str, "scores": (N,k) float32},
+    each row sorted best first.
+    """
+    raw = np.asarray(preds)
+    if raw.dtype.type is np.str_ or raw.dtype == object:
         # model returned labels directly
-        label = str(preds[0])
-        return label, 1.0
-
-    # ensure sum > 0 and softmax if needed
-    row = preds[0]
-    if row.sum() <= 0:
-        # fallback softmax
-        exp = np.exp(row - np.max(row))
-        probs = exp / exp.sum()
+        labels = raw.reshape(-1, 1).astype(str)
+        return {"indices": np.full(labels.shape, -1), "labels": labels,
+                "scores": np.ones(labels.shape, dtype="float32")}
+
+    probs = normalize_predictions(raw, activation)
+    n, c = probs.shape
+    k = max(1, min(int(k), c))
+    if k < c:
+        # O(C) partial selection, then sort only the k survivors
+        idx = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(probs, idx, axis=1), axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
     else:
-        probs = row / row.sum()
+        idx = np.argsort(-probs, axis=1, kind="stable")
+    scores = np.take_along_axis(probs, idx, axis=1)
+    names = np.array(list(class_names[:c]) + [str(i) for i in range(len(class_names), c)])
+    return {"indices": idx, "labels": names[idx], "scores": scores}
 
-    top_idx = int(np.argmax(probs))
-    score = float(probs[top_idx])
-    label = class_names[top_idx] if top_idx < len(class_names) else str(top_idx)
-    return label, score
+def predict_batch(arr: np.ndarray, model, class_names: List[str], k: int = 1, activation: str = None) -> Dict[str, np.ndarray]:
+    """
+    Batch-aware prediction API: one forward pass over (N,64,64,3), then
+    vectorized normalization and top-k. activation defaults to the model's own.
+    """
+    preds = run_model(model, arr)
+    if activation is None:
+        activation = get_output_activation(model)
+    return postprocess_batch(preds, class_names, k, activation)
+
+def decode_prediction(preds, class_names: List[str], activation: str = "softmax") -> Tuple[str, float]:
+    """
+    Turn the raw model output for a single image into (label, score).
+    """
+    top = postprocess_batch(preds, class_names, 1, activation)
+    return str(top["labels"][0, 0]), float(top["scores"][0, 0])
+
+def decode_top_k(preds, class_names: List[str], k: int = 3, activation: str = "softmax") -> List[List[Tuple[str, float]]]:
+    """
+    Turn raw model output for a whole batch (N,C) into the top-k
+    (label, score) pairs of every row, best first (JSON-friendly lists).
+    """
+    top = postprocess_batch(preds, class_names, k, activation)
+    return [list(zip(labels, scores)) for labels, scores in zip(top["labels"].tolist(), top["scores"].tolist())]
+
+def predict_from_image_bytes(image_bytes: bytes, model, class_names: List[str]) -> Tuple[str, float]:
+    """
+    Unified prediction function:
+      - preprocess bytes -> arr (1,64,64,3)
+      - detect how to call model and return (label, score)
+    """
+    if model is None:
+        raise RuntimeError("Model is not loaded.")
+    arr = preprocess_image_bytes(image_bytes)
+    top = predict_batch(arr, model, class_names, k=1)
+    return str(top["labels"][0, 0]), float(top["scores"][0, 0])
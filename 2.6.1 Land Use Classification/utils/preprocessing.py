@@ -2,32 +2,77 @@
 """
 Image preprocessing utilities.
 Handles reading bytes, resizing to model input, normalizing, and batch dimension.
+- Fast decode mode (default): JPEGs are decoded at reduced resolution via PIL's
+  draft mode (DCT scaling by 1/2, 1/4 or 1/8), other formats are box-reduced
+  before the final bilinear resize
+- Pixels are written straight into a float32 buffer (optionally caller-owned),
+  so no float64 or full-resolution float intermediates are created
 """
 
 from PIL import Image, ImageOps
 import numpy as np
 import io
+import os
 
 TARGET_SIZE = (64, 64)  # model input (width, height)
 
-def preprocess_image_bytes(image_bytes: bytes):
+# Set LANDUSE_FAST_DECODE=0 to fall back to full-resolution decoding
+FAST_DECODE = os.environ.get("LANDUSE_FAST_DECODE", "1") != "0"
+
+# keep at least this multiple of the target size before the final resize,
+# so the bilinear filter still sees enough source pixels
+_DRAFT_MARGIN = 2
+
+_SCALE = np.float32(255.0)
+
+
+def _load_full(src) -> Image.Image:
+    img = Image.open(src).convert("RGB")
+    # Some images may be smaller or have EXIF orientation tags
+    img = ImageOps.exif_transpose(img)
+    return img.resize(TARGET_SIZE, Image.BILINEAR)
+
+
+def _load_fast(src) -> Image.Image:
+    img = Image.open(src)
+    if img.format == "JPEG":
+        # decoder skips the detail we would throw away anyway
+        img.draft("RGB", (TARGET_SIZE[0] * _DRAFT_MARGIN, TARGET_SIZE[1] * _DRAFT_MARGIN))
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    # reducing_gap: cheap integer box-reduce first, bilinear only for the last step
+    return img.resize(TARGET_SIZE, Image.BILINEAR, reducing_gap=_DRAFT_MARGIN)
+
+
+def preprocess_image_bytes(image_bytes, out: np.ndarray = None, fast: bool = None):
     """
-    Convert raw image bytes to a NumPy array ready for model.predict:
+    Convert raw image bytes (or a binary file object) to a NumPy array ready for model.predict:
       - open bytes via PIL
       - convert to RGB
       - resize with bilinear interpolation
       - normalize to [0,1]
       - return shape (1, H, W, 3) dtype float32
+    If `out` is given (float32, shape (H, W, 3) or (1, H, W, 3)) the pixels are written
+    into it in place and it is returned, e.g. a slot of a preallocated batch; it may
+    be a non-contiguous view.
     """
-    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    # Some images may be smaller or have EXIF orientation tags
-    img = ImageOps.exif_transpose(img)
-    img = img.resize(TARGET_SIZE, Image.BILINEAR)
-    arr = np.asarray(img, dtype="float32") / 255.0
-    # ensure shape and dtype
-    if arr.ndim == 2:
-        arr = np.stack([arr]*3, axis=-1)
-    if arr.shape[2] == 4:
-        arr = arr[..., :3]
-    arr = np.expand_dims(arr, axis=0)
-    return arr
+    fast = FAST_DECODE if fast is None else fast
+    src = io.BytesIO(image_bytes) if isinstance(image_bytes, (bytes, bytearray, memoryview)) else image_bytes
+    img = _load_fast(src) if fast else _load_full(src)
+
+    pixels = np.asarray(img, dtype=np.uint8)
+    # ensure shape
+    if pixels.ndim == 2:
+        pixels = np.stack([pixels]*3, axis=-1)
+    if pixels.shape[2] == 4:
+        pixels = pixels[..., :3]
+
+    if out is None:
+        out = np.empty((1,) + pixels.shape, dtype=np.float32)
+    elif out.size != pixels.size or out.dtype != np.float32:
+        raise ValueError(f"out must be float32 with {pixels.size} elements, got {out.dtype} {out.shape}")
+    # reshape the freshly decoded (contiguous) pixels, never `out`: reshaping a
+    # non-contiguous out would return a copy and the result would be lost
+    np.divide(pixels.reshape(out.shape), _SCALE, out=out, dtype=np.float32, casting="unsafe")
+    return out
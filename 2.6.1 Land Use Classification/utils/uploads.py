@@ -0,0 +1,164 @@
+# utils/uploads.py
+"""
+Streaming upload ingestion.
+- Reads an UploadFile in fixed-size chunks (Starlette already spools large
+  uploads to disk), enforcing a maximum size as it goes
+- Hashes the content incrementally, so cache keys and file names never need
+  the whole upload as one bytes object
+- Hands the spooled file object to the decoder (PIL reads it lazily)
+- Persists uploads under a content-addressed name, off the event loop
+- RequestSizeLimit caps request bodies per path as they stream in, so an
+  oversized upload is cut off before Starlette spools all of it
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path, PurePath
+from typing import BinaryIO, Dict
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from .batch_io import IMAGE_EXTENSIONS
+from .cache import new_content_hasher
+
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured limit; maps to HTTP 413."""
+
+
+class IngestedUpload:
+    """
+    A fully received upload: its spooled file object (rewound), size and content digest.
+    """
+
+    def __init__(self, file: BinaryIO, filename: str, size: int, digest: str):
+        self.file = file
+        self.filename = filename or ""
+        self.size = size
+        self.digest = digest
+
+    @property
+    def suffix(self) -> str:
+        suffix = PurePath(self.filename).suffix.lower()
+        return suffix if suffix in IMAGE_EXTENSIONS else ".bin"
+
+    @property
+    def stored_name(self) -> str:
+        # content-addressed: duplicates map to one file and user-supplied names never touch the path
+        return f"{self.digest}{self.suffix}"
+
+
+async def ingest_upload(upload, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_SIZE) -> IngestedUpload:
+    """
+    Stream an UploadFile through the hasher in chunks, rejecting it as soon as it
+    grows past max_bytes. Returns an IngestedUpload whose file is rewound for decoding.
+    """
+    declared = getattr(upload, "size", None)
+    if declared is not None and declared > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+
+    hasher = new_content_hasher()
+    size = 0
+    await upload.seek(0)
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+        hasher.update(chunk)
+    if size == 0:
+        raise ValueError("Uploaded file is empty.")
+    await upload.seek(0)
+    return IngestedUpload(upload.file, upload.filename, size, hasher.hexdigest())
+
+
+def persist_upload(upload: IngestedUpload, dest_dir: Path) -> Path:
+    """
+    Copy an ingested upload to dest_dir/<digest><ext> (blocking; run it in a worker thread).
+    Existing content is never rewritten; writes go through a temp file unique to this
+    call + atomic rename, so concurrent calls for the same digest never collide.
+    """
+    target = Path(dest_dir) / upload.stored_name
+    if target.exists():
+        return target
+    fd, tmp = tempfile.mkstemp(dir=str(target.parent), prefix=f"{target.name}.", suffix=".part")
+    try:
+        upload.file.seek(0)
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(upload.file, out, UPLOAD_CHUNK_SIZE)
+        if target.exists():
+            return target  # another request stored the same content meanwhile
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            if not target.exists():
+                raise
+            # lost the rename race (e.g. the target is open on Windows); the content is identical
+        return target
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _too_large_message(limit: int) -> str:
+    return f"Upload exceeds the {limit // (1024 * 1024)} MB limit."
+
+
+class RequestSizeLimit:
+    """
+    ASGI middleware refusing POST bodies over a per-path limit with 413.
+    A declared Content-Length over the limit is refused before anything is read;
+    otherwise (chunked bodies included) the bytes are counted as the app receives
+    them and the request is aborted as soon as the count passes the limit.
+    """
+
+    def __init__(self, app, limits: Dict[str, int], overhead: int = 0):
+        self.app = app
+        self.limits = limits
+        self.overhead = overhead
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" and scope.get("method") == "POST" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        allowed = limit + self.overhead
+        declared = Headers(scope=scope).get("content-length", "")
+        if declared.isdigit() and int(declared) > allowed:
+            await JSONResponse({"error": _too_large_message(limit)}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+        tripped = False
+        started = False
+
+        async def counting_receive():
+            nonlocal received, tripped
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > allowed:
+                    tripped = True
+                    raise UploadTooLarge(_too_large_message(limit))
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if tripped and not started:
+                return  # whatever the app answers to the aborted body is replaced by the 413 below
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, guarded_send)
+        except Exception:
+            if not tripped:
+                raise
+        if tripped and not started:
+            await JSONResponse({"error": _too_large_message(limit)}, status_code=413)(scope, receive, send)
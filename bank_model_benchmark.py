@@ -0,0 +1,183 @@
+"""Model comparison harness for the bank marketing models: parallel processes, time/memory budgets, leaderboard.
+
+Each candidate is trained and scored in its own process (forked, so the
+training matrices are shared copy-on-write rather than pickled), up to
+n_parallel at a time. The parent polls every child's RSS and kills it when it
+runs past its time budget or memory budget, so one runaway model (SVC on the
+full data is quadratic in the sample count) can't stall or sink the whole
+comparison. Kernel methods are kept tractable either by training on a
+stratified subsample (max_train_samples) or by swapping the exact kernel for
+a Nystroem approximation feeding a linear model, which is linear in the
+sample count.
+
+The result is a leaderboard with, per model: test score(s), fit and predict
+seconds, peak RSS of the model's process, training rows used and a status
+(ok / timeout / memory / error), so models can be chosen on cost as well as
+accuracy.
+
+Usage:
+    leaderboard = run_benchmark(default_candidates(), X_train, y_train, X_test, y_test,
+                                time_budget=600, memory_budget_mb=4096)
+
+Memory budgets are enforced through /proc (Linux); elsewhere only the time
+budget applies and peak RSS comes from getrusage.
+"""
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, balanced_accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MaxAbsScaler
+from sklearn.svm import SVC
+
+from bank_preprocessing import dense_if_cheap
+
+SCORING = ("accuracy", "f1")
+# scoring names -> metric(y_true, y_pred); scored from the one timed predict() call
+METRICS = {"accuracy": accuracy_score, "balanced_accuracy": balanced_accuracy_score, "f1": f1_score,
+           "precision": precision_score, "recall": recall_score}
+POLL_SECONDS = 0.1
+SVC_MAX_TRAIN_SAMPLES = 10_000   # exact RBF SVC fit time grows ~quadratically past this
+NYSTROEM_COMPONENTS = 300
+
+
+def candidate(name, estimator, max_train_samples=None, dense=False):
+    """A model to benchmark. max_train_samples: fit on a stratified subsample of at most that
+    many rows; dense: hand the model a dense float32 copy (tree models)."""
+    return {"name": name, "estimator": estimator, "max_train_samples": max_train_samples, "dense": dense}
+
+
+def default_candidates(random_state=42):
+    """The script's three models, each in a form that scales, plus a linear-time kernel model."""
+    return [
+        candidate("logistic_regression", make_pipeline(MaxAbsScaler(), LogisticRegression(max_iter=1000))),
+        candidate("random_forest", RandomForestClassifier(n_jobs=1, random_state=random_state), dense=True),
+        candidate("svc_rbf_subsample", make_pipeline(MaxAbsScaler(), SVC()),
+                  max_train_samples=SVC_MAX_TRAIN_SAMPLES),
+        candidate("nystroem_rbf_logistic", make_pipeline(
+            MaxAbsScaler(), Nystroem(n_components=NYSTROEM_COMPONENTS, random_state=random_state),
+            LogisticRegression(max_iter=1000))),
+    ]
+
+
+def _rss_mb(pid="self", field="VmRSS"):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb():
+    peak = _rss_mb(field="VmHWM")
+    if peak is None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = maxrss / 1024 / (1024 if sys.platform == "darwin" else 1)  # bytes on macOS, kB on Linux
+    return peak
+
+
+def _run_candidate(spec, X_train, y_train, X_test, y_test, scoring, random_state, conn):
+    """Child process: fit, predict, score; sends one result dict back."""
+    try:
+        X_fit, y_fit = X_train, y_train
+        n = spec["max_train_samples"]
+        if n is not None and n < len(y_train):
+            idx, _ = train_test_split(np.arange(len(y_train)), train_size=n, stratify=y_train,
+                                      random_state=random_state)
+            X_fit, y_fit = X_train[np.sort(idx)], y_train[np.sort(idx)]
+        if spec["dense"]:
+            X_fit, X_test = dense_if_cheap(X_fit), dense_if_cheap(X_test)
+        model = clone(spec["estimator"])
+        start = time.perf_counter()
+        model.fit(X_fit, y_fit)
+        fit_time = time.perf_counter() - start
+        start = time.perf_counter()
+        predictions = model.predict(X_test)
+        predict_time = time.perf_counter() - start
+        scores = {name: float(METRICS[name](y_test, predictions)) for name in scoring}
+        conn.send({"status": "ok", "fit_s": fit_time, "predict_s": predict_time, "train_rows": len(y_fit),
+                   "peak_rss_mb": _peak_rss_mb(), **scores})
+    except MemoryError:
+        conn.send({"status": "memory", "peak_rss_mb": _peak_rss_mb()})
+    except Exception:
+        conn.send({"status": "error", "error": traceback.format_exc(limit=3), "peak_rss_mb": _peak_rss_mb()})
+    finally:
+        conn.close()
+
+
+def run_benchmark(candidates, X_train, y_train, X_test, y_test, time_budget=600.0, memory_budget_mb=None,
+                  n_parallel=None, scoring=SCORING, random_state=42, verbose=True):
+    """Leaderboard DataFrame (best first by scoring[0]); budgets apply per model process."""
+    unknown = [name for name in scoring if name not in METRICS]
+    if unknown:
+        raise ValueError(f"unsupported scoring {unknown}; choose from {sorted(METRICS)}")
+    y_train, y_test = np.asarray(y_train), np.asarray(y_test)
+    ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+    n_parallel = n_parallel or os.cpu_count() or 1
+    pending = list(candidates)
+    running = {}  # name -> (process, parent end of pipe, start time, peak rss seen, spec)
+    rows = []
+
+    def finish(name, result):
+        proc, conn, started, seen_rss, spec = running.pop(name)
+        conn.close()
+        proc.join(timeout=1)
+        row = {"model": name, "status": result.get("status", "error"), "wall_s": time.perf_counter() - started}
+        row.update(result)
+        if seen_rss and (row.get("peak_rss_mb") or 0) < seen_rss:
+            row["peak_rss_mb"] = seen_rss
+        rows.append(row)
+        if verbose:
+            print(f"{name}: {row['status']} in {row['wall_s']:.1f}s"
+                  + (f" ({scoring[0]} {row[scoring[0]]:.4f})" if row["status"] == "ok" else ""))
+
+    while pending or running:
+        while pending and len(running) < n_parallel:
+            spec = pending.pop(0)
+            parent_conn, child_conn = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_run_candidate, name=f"bench-{spec['name']}", daemon=True,
+                               args=(spec, X_train, y_train, X_test, y_test, scoring, random_state, child_conn))
+            proc.start()
+            child_conn.close()
+            running[spec["name"]] = (proc, parent_conn, time.perf_counter(), 0.0, spec)
+        time.sleep(POLL_SECONDS)
+        for name in list(running):
+            proc, conn, started, seen_rss, spec = running[name]
+            rss = _rss_mb(proc.pid)
+            if rss is not None and rss > seen_rss:
+                running[name] = (proc, conn, started, rss, spec)
+                seen_rss = rss
+            if conn.poll():
+                try:
+                    result = conn.recv()
+                except EOFError:
+                    result = {"status": "error", "error": f"exited with code {proc.exitcode}"}
+                finish(name, result)
+            elif not proc.is_alive():
+                finish(name, {"status": "error", "error": f"exited with code {proc.exitcode}"})
+            elif memory_budget_mb is not None and rss is not None and rss > memory_budget_mb:
+                proc.kill()
+                finish(name, {"status": "memory", "error": f"RSS {rss:.0f} MB > {memory_budget_mb} MB"})
+            elif time.perf_counter() - started > time_budget:
+                proc.kill()
+                finish(name, {"status": "timeout", "error": f"still running after {time_budget:.0f}s"})
+
+    columns = ["model", "status", *scoring, "fit_s", "predict_s", "peak_rss_mb", "train_rows", "wall_s", "error"]
+    board = pd.DataFrame(rows).reindex(columns=columns)
+    board["ok"] = board["status"] == "ok"
+    board = board.sort_values(["ok", scoring[0]], ascending=[False, False]).drop(columns="ok")
+    return board.reset_index(drop=True)
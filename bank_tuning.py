@@ -0,0 +1,191 @@
+"""Parallel successive-halving hyperparameter search with a resumable log (bank marketing models).
+
+GridSearchCV(..., refit=True) fits every candidate on every fold of the full
+training set, one fit at a time. HalvingSearch instead:
+    - runs successive halving: all candidates are cross-validated on a small
+      subsample, the best 1/factor of them move on to a factor-times larger
+      subsample, and so on until the survivors are scored on all the data.
+      Adding grid values mostly adds cheap small-sample fits
+    - fans every (candidate, fold) fit of a round out to n_jobs joblib
+      workers; X is written once to a .npy file and opened with
+      mmap_mode="r", so workers share one read-only copy instead of
+      receiving a pickled one each
+    - appends each finished fit to a JSON-lines log as it completes; a rerun
+      with the same data, estimator and settings skips every fit already in
+      the log, so an interrupted search resumes where it stopped
+
+Usage (same attributes as GridSearchCV for the script's purposes):
+    search = HalvingSearch(DecisionTreeClassifier(), {"max_depth": [10, 20, 30]}, n_jobs=-1,
+                           log_path=default_log_path())  # $BANK_CACHE_DIR/tuning/bank_tuning.jsonl
+    search.fit(X_train, y_train)
+    search.best_params_, search.best_score_, search.best_estimator_
+"""
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+
+def default_log_path(name="bank_tuning.jsonl"):
+    return os.path.join(os.environ.get("BANK_CACHE_DIR", ".bank_cache"), "tuning", name)
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True, default=repr)
+
+
+def share_matrix(X, folder):
+    """Dump X (ndarray or CSR) under folder and reopen it memory-mapped, read-only."""
+    def dump(name, a):
+        path = os.path.join(folder, name + ".npy")
+        np.save(path, np.ascontiguousarray(a))
+        return np.load(path, mmap_mode="r")
+
+    if sp.issparse(X):
+        X = X.tocsr()
+        return sp.csr_matrix((dump("data", X.data), dump("indices", X.indices), dump("indptr", X.indptr)),
+                             shape=X.shape, copy=False)
+    return dump("X", np.asarray(X))
+
+
+def _fit_and_score(task_id, estimator, params, X, y, train, test, scoring):
+    """One (candidate, fold) fit in a worker; task_id matches results that arrive out of order."""
+    est = clone(estimator).set_params(**params)
+    start = time.perf_counter()
+    est.fit(X[train], y[train])
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    score = check_scoring(est, scoring)(est, X[test], y[test])
+    return task_id, float(score), fit_time, time.perf_counter() - start
+
+
+class HalvingSearch:
+    def __init__(self, estimator, param_grid, factor=3, min_resources="auto", cv=5, scoring=None, n_jobs=-1,
+                 log_path=None, refit=True, random_state=42, verbose=1):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.factor = factor
+        self.min_resources = min_resources
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.log_path = log_path
+        self.refit = refit
+        self.random_state = random_state
+        self.verbose = verbose
+
+    def schedule(self, n_candidates, n_samples, n_classes):
+        """Samples per round; the last round always uses every sample."""
+        n_rounds = 1 + int(math.floor(math.log(max(n_candidates, 1), self.factor) + 1e-9))
+        floor = self.min_resources if self.min_resources != "auto" else 2 * self.cv * n_classes
+        sizes = [max(int(n_samples / self.factor ** (n_rounds - 1 - i)), floor) for i in range(n_rounds)]
+        return sorted({min(size, n_samples) for size in sizes})
+
+    def _fingerprint(self, X, y):
+        return joblib.hash((joblib.hash(X), joblib.hash(y), repr(self.estimator), self.cv, repr(self.scoring),
+                            self.random_state))
+
+    def _load_log(self, fingerprint):
+        done = {}
+        if self.log_path and os.path.exists(self.log_path):
+            with open(self.log_path) as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut off by an interrupted run
+                    if rec.get("fingerprint") == fingerprint:
+                        done[(rec["params_key"], rec["resources"], rec["fold"])] = rec
+        return done
+
+    def fit(self, X, y):
+        y = np.asarray(y)
+        candidates = list(ParameterGrid(self.param_grid))
+        fingerprint = self._fingerprint(X, y)
+        done = self._load_log(fingerprint)
+        rng = np.random.RandomState(self.random_state)
+        order = rng.permutation(len(y))  # nested subsamples: round i uses order[:size_i]
+        sizes = self.schedule(len(candidates), len(y), len(np.unique(y)))
+        folder = tempfile.mkdtemp(prefix="bank_tuning_")
+        if self.log_path:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        log = open(self.log_path, "a+") if self.log_path else None
+        if log and log.tell() > 0:
+            log.seek(log.tell() - 1)
+            if log.read(1) != "\n":
+                log.write("\n")  # don't glue the first new record onto a half-written line
+        records = []
+        try:
+            X_shared = share_matrix(X, folder)
+            survivors = candidates
+            for round_no, size in enumerate(sizes):
+                subset = np.sort(order[:size])
+                folds = list(StratifiedKFold(self.cv, shuffle=True, random_state=self.random_state)
+                             .split(np.zeros(size), y[subset]))
+                tasks, round_records = [], []
+                for params in survivors:
+                    key = _params_key(params)
+                    for fold, (train, test) in enumerate(folds):
+                        rec = done.get((key, size, fold))
+                        if rec is not None:
+                            round_records.append(rec)
+                        else:
+                            tasks.append((params, key, fold, subset[train], subset[test]))
+                if self.verbose:
+                    print(f"round {round_no}: {len(survivors)} candidates x {self.cv} folds on {size} samples "
+                          f"({len(tasks)} fits to run, {len(round_records)} from the log)")
+                results = Parallel(n_jobs=self.n_jobs, return_as="generator_unordered")(
+                    delayed(_fit_and_score)(i, self.estimator, params, X_shared, y, train, test, self.scoring)
+                    for i, (params, _, _, train, test) in enumerate(tasks))
+                for i, score, fit_time, score_time in results:
+                    params, key, fold, _, _ = tasks[i]
+                    rec = {"fingerprint": fingerprint, "params_key": key, "params": params, "round": round_no,
+                           "resources": size, "fold": fold, "score": score, "fit_time": fit_time,
+                           "score_time": score_time}
+                    round_records.append(rec)
+                    if log:
+                        log.write(json.dumps(rec, default=repr) + "\n")
+                        log.flush()
+                records.extend(round_records)
+                means = {}
+                for rec in round_records:
+                    means.setdefault(rec["params_key"], []).append(rec["score"])
+                ranked = sorted(survivors, key=lambda p: -np.mean(means[_params_key(p)]))
+                if round_no < len(sizes) - 1:
+                    survivors = ranked[:max(1, math.ceil(len(ranked) / self.factor))]
+                else:
+                    survivors = ranked
+        finally:
+            if log:
+                log.close()
+            shutil.rmtree(folder, ignore_errors=True)
+
+        self.results_ = (pd.DataFrame(records)
+                         .groupby(["round", "resources", "params_key"], as_index=False)
+                         .agg(mean_score=("score", "mean"), std_score=("score", "std"), fit_time=("fit_time", "mean"))
+                         .sort_values(["round", "mean_score"], ascending=[True, False], ignore_index=True))
+        final = self.results_[self.results_["round"] == self.results_["round"].max()]
+        best = final.iloc[0]
+        self.best_params_ = next(p for p in candidates if _params_key(p) == best["params_key"])
+        self.best_score_ = float(best["mean_score"])
+        self.n_fits_ = len(records)
+        if self.refit:
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def score(self, X, y):
+        return self.best_estimator_.score(X, y)
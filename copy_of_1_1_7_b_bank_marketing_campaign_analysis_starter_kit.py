@@ -50,7 +50,7 @@ We evaluate the performance of the decision tree model using metrics such as acc
 ### Step 7: Improving Model Performance
 
 #### Improving Model Performance
-To enhance the model's performance, we perform hyperparameter tuning using GridSearchCV. This involves searching for the best combination of hyperparameters to maximize model performance.
+To enhance the model's performance, we perform hyperparameter tuning using a parallel successive-halving search. This involves searching for the best combination of hyperparameters to maximize model performance.
 
 ### Step 8: Visualizations for Insights
 
@@ -102,12 +102,18 @@ import seaborn as sns  # Importing seaborn for data visualization
 
 from sklearn.tree import DecisionTreeClassifier  # Importing DecisionTreeClassifier for building decision tree models
 
-from sklearn.model_selection import train_test_split, GridSearchCV  # Importing train_test_split for splitting data and GridSearchCV for hyperparameter tuning
+from sklearn.model_selection import train_test_split  # Importing train_test_split for splitting data
 
 from sklearn.metrics import classification_report, confusion_matrix  # Importing metrics for model evaluation
 
 from sklearn.tree import plot_tree  # Importing plot_tree for visualizing decision trees
 
+from bank_data_loader import load_bank_data  # Importing the compact, cached CSV loader (category / downcast dtypes, Parquet cache)
+
+from bank_preprocessing import split_features, fit_transform_split, save_preprocessor, dense_if_cheap, discrete_mask  # Importing the sparse one-hot preprocessing pipeline
+
+from bank_tuning import HalvingSearch, default_log_path  # Importing the parallel successive-halving search for hyperparameter tuning
+
 
 
 
@@ -130,7 +136,7 @@ Stay tuned as we delve into EDA in the next step, where we'll visualize distribu
 
 url = "/content/bank-full.csv"  # Define the path to the dataset
 
-data = pd.read_csv(url, sep=';')  # Load the dataset using pandas, specifying the separator
+data = load_bank_data(url)  # Load the dataset with compact dtypes (text -> category, downcast ints); later runs read the cached Parquet copy
 
 
 
@@ -178,7 +184,7 @@ plt.show()  # Show the plots
 
 # Visualize distributions of categorical features
 
-for col in data.select_dtypes(include=['object']).columns:  # Loop through each categorical column
+for col in data.select_dtypes(include=['object', 'category']).columns:  # Loop through each categorical column
     sns.countplot(y=col, data=data)  # Create a count plot for each categorical column
     plt.show()  # Show the plot
 
@@ -216,7 +222,7 @@ plt.show()  # Show the plot
 
 <font color='blue'>**We embark on our preprocessing journey by meticulously examining the dataset for any missing values using `data.isnull().sum()`. This meticulous scrutiny enables us to identify columns with missing values and strategize effective approaches for handling them, whether through imputation or removal.**</font>
 
-<font color='blue'>**With missing values addressed, we pivot our focus to**</font> <font face='calibrinormal' color='green'>**encoding categorical variables**</font><font color='blue'>, **a crucial step to enable machine learning algorithms to interpret categorical data effectively. Leveraging the powerful `pd.get_dummies()` function, we seamlessly transform categorical variables into a numerical format, thereby enhancing the interpretability and predictive power of our model.**</font>
+<font color='blue'>**With missing values addressed, we pivot our focus to**</font> <font face='calibrinormal' color='green'>**encoding categorical variables**</font><font color='blue'>, **a crucial step to enable machine learning algorithms to interpret categorical data effectively. Leveraging a fitted one-hot encoder (`bank_preprocessing.py`), we seamlessly transform categorical variables into a sparse numerical format, thereby enhancing the interpretability and predictive power of our model.**</font>
 
 <font color='blue'>**Having successfully encoded categorical variables, we proceed to delineate the**</font> <font face='calibrinormal' color='green'>**feature matrix (X)**</font><font color='blue'> **and the**</font> <font face='calibrinormal' color='green'>**target variable (y)**</font><font color='blue'> **for our model. Through this delineation process, we meticulously craft the inputs and outputs that will drive our machine learning model's training and evaluation.**</font>
 
@@ -233,23 +239,27 @@ print(data.isnull().sum())  # Print the count of missing values for each column
 
 
 
-# Encode categorical variables
+# Define features and target variable
 
-data_encoded = pd.get_dummies(data, drop_first=True)  # Encode categorical variables using one-hot encoding, dropping the first category to avoid multicollinearity
+X_raw, y = split_features(data)  # Define the feature frame (all columns but 'y') and the boolean target (y == 'yes')
 
 
 
-# Define features and target variable
+# Split the dataset
 
-X = data_encoded.drop('y_yes', axis=1)  # Define the feature set by dropping the target variable
+X_train, X_test, y_train, y_test = train_test_split(X_raw, y, test_size=0.2, random_state=42)  # Split the dataset into training and testing sets with 80-20 ratio and a random state of 42
 
-y = data_encoded['y_yes']  # Define the target variable
 
 
+# Encode categorical variables
 
-# Split the dataset
+preprocessor, X_train, X_test = fit_transform_split(X_train, X_test)  # One-hot encode (dropping the first category, like get_dummies(drop_first=True)) into sparse CSR matrices, fitted on the training set only
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)  # Split the dataset into training and testing sets with 80-20 ratio and a random state of 42
+save_preprocessor(preprocessor)  # Save the fitted encoder (to $BANK_CACHE_DIR, default .bank_cache/) so inference reuses exactly the same column mapping
+
+feature_names = preprocessor.get_feature_names_out()  # Names of the encoded feature columns
+
+X = preprocessor.transform(X_raw)  # Encode the full dataset with the same mapping (used by the feature selection section)
 
 
 
@@ -276,7 +286,7 @@ X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_
 
 dtree = DecisionTreeClassifier()  # Initialize the DecisionTreeClassifier
 
-dtree.fit(X_train, y_train)  # Fit the classifier to the training data
+dtree.fit(dense_if_cheap(X_train), y_train)  # Fit the classifier to the training data (dense float32 copy: sklearn's dense tree splitter is much faster than its sparse one)
 
 
 
@@ -303,7 +313,7 @@ dtree.fit(X_train, y_train)  # Fit the classifier to the training data
 
 # Make predictions on the test set
 
-predictions = dtree.predict(X_test)  # Predict the target variable for the test set
+predictions = dtree.predict(dense_if_cheap(X_test))  # Predict the target variable for the test set
 
 
 
@@ -329,15 +339,15 @@ print(confusion_matrix(y_test, predictions))  # Print the confusion matrix
 
 <font color='blue'>In this crucial step, we strive to enhance the performance of our decision tree model through hyperparameter tuning. Hyperparameters are parameters that govern the learning process of the model, such as the maximum depth of the tree or the minimum number of samples required to split a node. By optimizing these hyperparameters, we aim to improve the model's predictive accuracy and generalization ability.</font>
 
-<font color='green'>We employ a systematic approach to hyperparameter tuning using **GridSearchCV**, a powerful technique provided by scikit-learn. GridSearchCV exhaustively searches through a specified hyperparameter grid and evaluates each combination using cross-validation to determine the optimal set of hyperparameters that maximizes model performance.</font>
+<font color='green'>We employ a systematic approach to hyperparameter tuning using **successive halving** (`bank_tuning.HalvingSearch`). Every combination in the hyperparameter grid is cross-validated on a small subsample, and only the best third moves on to a three times larger one, until the remaining candidates are evaluated on the full training set. The fits run in parallel on all cores and are written to a log, so an interrupted search resumes where it stopped.</font>
 
 <font color='blue'>To begin the hyperparameter tuning process, we define a parameter grid containing a range of values for the hyperparameters we wish to tune. For example, we may specify different values for the maximum depth of the tree or the minimum number of samples required to split a node.</font>
 
-<font color='green'>Next, we initialize a GridSearchCV object, specifying the decision tree classifier as the estimator and the parameter grid to search over. We also enable refitting, which means that GridSearchCV will automatically retrain the best model on the entire training dataset after hyperparameter tuning is complete.</font>
+<font color='green'>Next, we initialize a HalvingSearch object, specifying the decision tree classifier as the estimator and the parameter grid to search over. We also enable refitting, which means that the search will automatically retrain the best model on the entire training dataset after hyperparameter tuning is complete.</font>
 
-<font color='blue'>We then fit the GridSearchCV object to the training data, which initiates the hyperparameter tuning process. GridSearchCV exhaustively evaluates all combinations of hyperparameters using cross-validation and identifies the best combination based on a specified scoring metric, such as accuracy or F1-score.</font>
+<font color='blue'>We then fit the HalvingSearch object to the training data, which initiates the hyperparameter tuning process. HalvingSearch evaluates the combinations of hyperparameters using cross-validation on growing subsamples and identifies the best combination based on a specified scoring metric, such as accuracy or F1-score.</font>
 
-<font color='green'>Once hyperparameter tuning is complete, we can extract the best hyperparameters and the corresponding model performance metrics from the GridSearchCV object. These metrics provide valuable insights into the effectiveness of the tuned model and allow us to assess improvements in predictive accuracy compared to the baseline model.</font>
+<font color='green'>Once hyperparameter tuning is complete, we can extract the best hyperparameters and the corresponding model performance metrics from the HalvingSearch object. These metrics provide valuable insights into the effectiveness of the tuned model and allow us to assess improvements in predictive accuracy compared to the baseline model.</font>
 
 <font color='blue'>By systematically optimizing hyperparameters, we can unlock the full potential of our decision tree model and achieve superior performance on unseen data. This iterative process of hyperparameter tuning and model evaluation is essential for developing robust and reliable machine learning models that deliver accurate predictions in real-world scenarios.</font>
 """
@@ -348,11 +358,11 @@ param_grid = {'max_depth': [10, 20, 30], 'min_samples_split': [2, 5, 10]}  # Def
 
 
 
-# Initialize GridSearchCV
+# Initialize the successive-halving search
 
-grid = GridSearchCV(DecisionTreeClassifier(), param_grid, refit=True, verbose=3)  # Initialize GridSearchCV with the DecisionTreeClassifier and parameter grid
+grid = HalvingSearch(DecisionTreeClassifier(), param_grid, factor=3, n_jobs=-1, refit=True, log_path=default_log_path())  # Cross-validate every candidate on a small subsample, keep the best third for a 3x larger one, and so on up to the full training set; fits run on all cores and are logged so a rerun resumes
 
-grid.fit(X_train, y_train)  # Fit the grid search to the training data
+grid.fit(dense_if_cheap(X_train), y_train)  # Fit the search to the training data
 
 
 
@@ -391,7 +401,7 @@ print(grid.best_score_)  # Print the best score achieved with the best hyperpara
 
 # Feature importances
 
-feat_importances = pd.Series(dtree.feature_importances_, index=X.columns)  # Get the feature importances from the decision tree model
+feat_importances = pd.Series(dtree.feature_importances_, index=feature_names)  # Get the feature importances from the decision tree model
 feat_importances.nlargest(10).plot(kind='barh')  # Plot the top 10 feature importances as a horizontal bar chart
 plt.show()  # Show the plot
 
@@ -402,7 +412,7 @@ plt.show()  # Show the plot
 # Visualize the decision tree
 
 plt.figure(figsize=(20,10))  # Set the figure size for the plot
-plot_tree(dtree, filled=True, feature_names=X.columns, max_depth=3)  # Plot the decision tree up to a depth of 3
+plot_tree(dtree, filled=True, feature_names=list(feature_names), max_depth=3)  # Plot the decision tree up to a depth of 3
 plt.show()  # Show the plot
 
 
@@ -450,7 +460,7 @@ data['duration_per_call'] = data['duration'] / data['campaign']  # Calculate dur
 
 # 3. Interaction Features
 
-data['age_balance_interaction'] = data['age'] * data['balance']  # Create interaction feature by multiplying age and balance
+data['age_balance_interaction'] = data['age'].astype('int64') * data['balance']  # Create interaction feature by multiplying age and balance (in int64: the loader downcasts both columns)
 
 
 
@@ -475,43 +485,31 @@ selector = SelectKBest(score_func=f_classif, k=10)
 X_selected = selector.fit_transform(X_train, y_train)
 """
 
-# 1. Recursive Feature Elimination (RFE)
-
-from sklearn.feature_selection import RFE
-
-rfe = RFE(estimator=DecisionTreeClassifier(), n_features_to_select=5)  # Initialize RFE for feature selection
+# Rank features four ways at once: SelectKBest's f_classif score, stepped RFE with a decision tree, random forest importance and mutual information
 
-rfe.fit(X, y)  # Fit RFE to data
+from bank_feature_selection import rank_features
 
+ranking = rank_features(X, y, feature_names, k=5, discrete_features=discrete_mask(preprocessor))  # Run the rankers concurrently; each result is cached by dataset fingerprint and parameters, so reruns are instant
 
+print(ranking.head(10))  # Print the consolidated ranking table (score and rank per method, mean rank, top-5 votes)
 
-selected_features_rfe = X.columns[rfe.support_]  # Get selected features
-
-
-
-# 2. Random Forest Feature Importance
 
-from sklearn.ensemble import RandomForestClassifier
 
-rf = RandomForestClassifier()  # Initialize Random Forest Classifier
+# 1. Recursive Feature Elimination (RFE)
 
-rf.fit(X, y)  # Fit Random Forest to data
+selected_features_rfe = ranking.index[ranking['rfe_rank'] == 1]  # Get the 5 features RFE kept
 
 
 
-importances = rf.feature_importances_  # Get feature importances
+# 2. Random Forest Feature Importance
 
-selected_features_rf = X.columns[np.argsort(importances)[::-1][:5]]  # Get top 5 selected features
+selected_features_rf = ranking['rf_importance_score'].nlargest(5).index  # Get top 5 selected features
 
 
 
 # 3. Mutual Information
 
-from sklearn.feature_selection import mutual_info_classif
-
-mutual_info = mutual_info_classif(X, y)  # Calculate mutual information between features and target
-
-selected_features_mi = X.columns[np.argsort(mutual_info)[::-1][:5]]  # Get top 5 selected features based on mutual information
+selected_features_mi = ranking['mutual_info_score'].nlargest(5).index  # Get top 5 selected features based on mutual information
 
 
 
@@ -534,6 +532,11 @@ selected_features_mi = X.columns[np.argsort(mutual_info)[::-1][:5]]  # Get top 5
 <font color='purple'>**Support Vector Machine:**</font>
 - Support vector machine is a powerful classification algorithm that finds the optimal hyperplane to separate different classes.
 - It's effective in high-dimensional spaces and is versatile with different kernel functions.
+- Its training time grows roughly quadratically with the number of rows, so it is trained on a stratified subsample, alongside a Nystroem kernel approximation feeding a logistic regression, which scales linearly.
+
+<font color='purple'>**Benchmark harness:**</font>
+- Each model is trained and scored in its own process, several at a time, with a time and a memory budget; a model that runs over either is stopped and reported instead of stalling the notebook.
+- The leaderboard lists accuracy, F1, fit and predict time, and peak memory per model.
 """
 
 from sklearn.linear_model import LogisticRegression  # Import Logistic Regression model
@@ -542,23 +545,50 @@ from sklearn.ensemble import RandomForestClassifier  # Import Random Forest Clas
 
 from sklearn.svm import SVC  # Import Support Vector Machine model
 
+from sklearn.pipeline import make_pipeline  # Import make_pipeline to chain scaling and the model
+
+from sklearn.preprocessing import MaxAbsScaler  # Import MaxAbsScaler, which scales sparse input without densifying it
+
+from bank_model_benchmark import candidate, run_benchmark, NYSTROEM_COMPONENTS, SVC_MAX_TRAIN_SAMPLES  # Import the parallel, budgeted model comparison harness
+
+from sklearn.kernel_approximation import Nystroem  # Import Nystroem kernel approximation
+
 
 
 # Logistic Regression
 
-log_reg = LogisticRegression()  # Initialize Logistic Regression model
+log_reg = make_pipeline(MaxAbsScaler(), LogisticRegression(max_iter=1000))  # Initialize Logistic Regression model on scaled features
 
 
 
 # Random Forest Classifier
 
-rf = RandomForestClassifier()  # Initialize Random Forest Classifier
+rf = RandomForestClassifier(n_jobs=1, random_state=42)  # Initialize Random Forest Classifier (one core each; the harness runs models in parallel)
 
 
 
 # Support Vector Machine
 
-svm = SVC()  # Initialize Support Vector Machine model
+svm = make_pipeline(MaxAbsScaler(), SVC())  # Initialize Support Vector Machine model
+
+
+
+# Nystroem-approximated RBF kernel + Logistic Regression
+
+kernel_log_reg = make_pipeline(MaxAbsScaler(), Nystroem(n_components=NYSTROEM_COMPONENTS, random_state=42), LogisticRegression(max_iter=1000))
+
+
+
+candidates = [
+    candidate('logistic_regression', log_reg),
+    candidate('random_forest', rf, dense=True),  # trees train faster on a dense copy
+    candidate('svc_rbf_subsample', svm, max_train_samples=SVC_MAX_TRAIN_SAMPLES),
+    candidate('nystroem_rbf_logistic', kernel_log_reg),
+]
+
+leaderboard = run_benchmark(candidates, X_train, y_train, X_test, y_test, time_budget=600, memory_budget_mb=4096)  # Train and score every model in parallel processes within the budgets
+
+print(leaderboard.drop(columns='error'))  # Print the leaderboard, best accuracy first
 
 
 
@@ -633,7 +663,7 @@ class_weights = class_weight.compute_class_weight('balanced', classes=np.unique(
 
 # Select numeric columns for outlier detection and removal
 
-numeric_columns = data.select_dtypes(include=['int64', 'float64']).columns  # Select numeric columns
+numeric_columns = data.select_dtypes(include='number').columns  # Select numeric columns (any int/float width)
 
 
 
@@ -653,7 +683,7 @@ data_no_outliers = data[~((data[numeric_columns] < (Q1 - 1.5 * IQR)) | (data[num
 
 from sklearn.preprocessing import StandardScaler
 
-scaler = StandardScaler()  # Initialize StandardScaler
+scaler = StandardScaler(with_mean=False)  # Initialize StandardScaler (without centering, which would densify the sparse matrix)
 
 X_scaled = scaler.fit_transform(X)  # Standardize features
 
@@ -0,0 +1,8 @@
+"""Serving helpers shared by the FastAPI / Flask apps in this repository.
+
+The apps run from their own directories (uvicorn app:app, gunicorn app:app)
+and put the repository root on sys.path to import this package, so one copy
+of each helper serves every app:
+    - serving_common.executor: bounded thread/process inference executor
+    - serving_common.assets: cached, precompressed responses for large static pages
+"""
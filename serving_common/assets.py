@@ -0,0 +1,222 @@
+# serving_common/assets.py
+"""
+In-memory cache for large, rarely changing responses (exported notebook HTML).
+- Each entry is built once from its source files and rebuilt when any of their
+  mtimes / sizes change
+- Precomputes gzip (and brotli, when the brotli package is installed) variants
+  plus strong ETags, so requests only pick a representation
+- Answers conditional requests (If-None-Match / If-Modified-Since) with 304
+  and single byte ranges with 206
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone covers every browser
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+
+
+class CachedAsset:
+    """
+    One built response body and its precompressed variants.
+    variants maps content-coding ("identity", "gzip", "br") -> bytes.
+    """
+
+    def __init__(self, body: bytes, media_type: str, mtime: float, gzip_level: int = 6):
+        self.media_type = media_type
+        self.last_modified = formatdate(int(mtime), usegmt=True)
+        self.mtime = int(mtime)
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=9)
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        # one strong ETag per representation, as required when Content-Encoding differs
+        self.etags = {coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+                      for coding in self.variants}
+
+    @property
+    def size(self) -> int:
+        return len(self.variants["identity"])
+
+    def stats(self) -> Dict:
+        return {coding: len(data) for coding, data in self.variants.items()}
+
+
+def _signature(paths: Iterable[str]) -> Tuple:
+    sig = []
+    for path in paths:
+        st = os.stat(path)
+        sig.append((str(path), st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+class AssetCache:
+    """
+    Thread-safe cache of CachedAsset keyed by name.
+    get() stats the source files on every call (cheap) and rebuilds only when they changed.
+    """
+
+    def __init__(self, gzip_level: int = 6):
+        self.gzip_level = gzip_level
+        self._entries: Dict[str, Tuple[Tuple, CachedAsset]] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+
+    def get(self, key: str, paths: Iterable[str], build: Optional[Callable[[], bytes]] = None,
+            media_type: str = "text/html; charset=utf-8") -> CachedAsset:
+        """
+        Return the cached asset for key. paths are the files it depends on (the first
+        one is read as-is when no build function is given). Raises FileNotFoundError
+        when a source file is missing.
+        """
+        paths = [str(p) for p in paths]
+        sig = _signature(paths)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == sig:
+            self.hits += 1
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == sig:
+                self.hits += 1
+                return entry[1]
+            if build is None:
+                with open(paths[0], "rb") as f:
+                    body = f.read()
+            else:
+                body = build()
+            mtime = max(s[1] for s in sig) / 1e9
+            asset = CachedAsset(body, media_type, mtime, self.gzip_level)
+            self._entries[key] = (sig, asset)
+            self.builds += 1
+            return asset
+
+    def stats(self) -> Dict:
+        return {
+            "entries": {key: asset.stats() for key, (_, asset) in self._entries.items()},
+            "builds": self.builds,
+            "hits": self.hits,
+            "brotli": brotli is not None,
+        }
+
+
+def _accepted_codings(accept_encoding: str) -> Dict[str, float]:
+    codings = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[token] = q
+    return codings
+
+
+def choose_coding(asset: CachedAsset, accept_encoding: str) -> str:
+    accepted = _accepted_codings(accept_encoding)
+    for coding in ("br", "gzip"):
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if coding in asset.variants and q > 0:
+            return coding
+    return "identity"
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=a-b" range. Returns (start, end) inclusive, or None when
+    unsatisfiable. Multi-range requests are served as the whole body (caller checks ",").
+    """
+    units, _, spec = header.partition("=")
+    if units.strip().lower() != "bytes":
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _not_modified(asset: CachedAsset, headers: Mapping[str, str]) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return any(etag in tags for etag in asset.etags.values())
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return asset.mtime <= int(parsedate_to_datetime(if_modified_since).timestamp())
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def build_response(asset: CachedAsset, request_headers: Mapping[str, str],
+                   cache_control: str = "no-cache", extra_headers: Optional[Dict[str, str]] = None
+                   ) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Pick the representation for a request. Returns (status, headers, body) for the
+    web framework to wrap: 200, 206 (byte range), 304 (not modified) or 416.
+    request_headers must do case-insensitive lookups (Starlette / Werkzeug headers do).
+    """
+    coding = choose_coding(asset, request_headers.get("accept-encoding", ""))
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header and if_range and if_range.strip() not in (asset.etags["identity"], asset.last_modified):
+        range_header = None
+    if range_header and "," not in range_header:
+        # byte ranges index the uncompressed body
+        coding = "identity"
+
+    headers = {
+        "ETag": asset.etags[coding],
+        "Last-Modified": asset.last_modified,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+        "Accept-Ranges": "bytes",
+    }
+    headers.update(extra_headers or {})
+    if _not_modified(asset, request_headers):
+        return 304, headers, b""
+
+    body = asset.variants[coding]
+    headers["Content-Type"] = asset.media_type
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+
+    if range_header and "," not in range_header:
+        span = _parse_range(range_header, len(body))
+        if span is None:
+            headers["Content-Range"] = f"bytes */{len(body)}"
+            return 416, headers, b""
+        start, end = span
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+        return 206, headers, body[start:end + 1]
+    return 200, headers, body
@@ -0,0 +1,113 @@
+"""
+Bounded inference executor shared by every model call in the apps.
+- Runs CPU-bound work in a thread pool or a process pool (configurable size)
+- Bounds the number of in-flight calls; callers beyond that get
+  ExecutorSaturated, which the routes turn into 503 responses, or wait for a
+  free slot (run_when_free, for long jobs that must not fail mid-stream)
+- Keeps counters (in flight, queued, completed, rejected, latency) for /metrics
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when the inference queue is full; maps to HTTP 503."""
+
+
+class InferenceExecutor:
+    """
+    Thin asyncio front-end over a thread/process pool with backpressure.
+
+    kind: "thread" or "process". Process workers do not share the parent's
+    globals, so pass an initializer that loads whatever the submitted
+    functions need.
+    max_queue: max calls admitted at once (running + waiting for a worker).
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: Optional[int] = None, max_queue: int = 64,
+                 initializer: Optional[Callable] = None, initargs: tuple = ()):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind!r} (expected 'thread' or 'process')")
+        self.kind = kind
+        self.max_workers = max(int(max_workers or 1), 1)
+        self.max_queue = max(int(max_queue), 1)
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             initializer=initializer, initargs=initargs)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference",
+                                            initializer=initializer, initargs=initargs)
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+        self._slot_waiters = deque()  # futures of run_when_free callers, oldest first
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) on the pool without blocking the event loop.
+        Raises ExecutorSaturated immediately when max_queue calls are already admitted.
+        """
+        if self._in_flight >= self.max_queue:
+            self._rejected += 1
+            raise ExecutorSaturated(f"Inference queue is full ({self.max_queue} requests in flight).")
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._busy_seconds += time.perf_counter() - start
+            self._wake_slot_waiter()
+
+    async def run_when_free(self, fn: Callable, *args) -> Any:
+        """
+        Like run(), but waits until fewer than max_queue calls are admitted instead of
+        raising ExecutorSaturated. Woken as slots free up, so waiting costs no CPU.
+        """
+        while self._in_flight >= self.max_queue:
+            waiter = asyncio.get_running_loop().create_future()
+            self._slot_waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._slot_waiters:
+                    self._slot_waiters.remove(waiter)
+        return await self.run(fn, *args)
+
+    def _wake_slot_waiter(self):
+        while self._slot_waiters:
+            waiter = self._slot_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def stats(self) -> Dict:
+        done = self._completed + self._failed
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": max(self._in_flight - self.max_workers, 0),
+            "peak_in_flight": self._peak_in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_latency_ms": round(1000.0 * self._busy_seconds / done, 3) if done else 0.0,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)